@@ -0,0 +1,109 @@
+"""
+Throughput of ``archive_trips`` moving a year of completed trips and their
+tickets out of the hot tables, and the time of listing the trips of a
+route with tickets available, which reads every trip the route still has,
+before and after.
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from benchmarks.utils import (
+    benchmark_database,
+    measure,
+    median_ms,
+    print_table,
+    setup_django,
+)
+
+
+def seed_tickets(trips_per_day, days, tickets_per_trip):
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    from train_station.bulk import insert_rows
+    from train_station.models import Order, Route, Ticket, Train, Trip
+
+    rng = random.Random(0)
+    routes = list(Route.objects.values_list("id", flat=True))
+    trains = list(Train.objects.values_list("id", flat=True))
+    first_day = timezone.now() - timedelta(days=days)
+    trip_ids = insert_rows(Trip, ["route_id", "train_id", "departure_time",
+                                  "arrival_time"], [
+        (
+            routes[number % len(routes)],
+            trains[number % len(trains)],
+            departure_time,
+            departure_time + timedelta(hours=5),
+        )
+        for number in range(trips_per_day * (days + 30))
+        for departure_time in [
+            first_day + timedelta(minutes=rng.randrange(1440),
+                                  days=number // trips_per_day)
+        ]
+    ])
+    customer = get_user_model().objects.create_user(
+        email="archive@benchmark.com", password="benchmark"
+    )
+    order = Order.objects.create(customer=customer)
+    insert_rows(Ticket, ["trip_id", "order_id", "cargo", "seat"], [
+        (trip_id, order.id, 1, seat)
+        for trip_id in trip_ids
+        for seat in range(1, tickets_per_trip + 1)
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trips-per-day", type=int, default=500)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--tickets-per-trip", type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.utils import timezone
+
+    from train_station.archive import archive_trips
+    from train_station.models import Ticket, Trip
+    from train_station.tests.test_trip_search_api import seed_network
+
+    def route_trips():
+        for route_id in range(1, 21):
+            list(
+                Trip.objects.with_tickets_available()
+                .filter(route_id=route_id)
+                .values("id", "departure_time", "tickets_available")
+            )
+
+    rows = []
+    with benchmark_database():
+        seed_network(stations=90, routes=1000, trains=200, trips_per_route=0)
+        seed_tickets(args.trips_per_day, args.days, args.tickets_per_trip)
+
+        def add_row(run, elapsed=None, archived=(0, 0)):
+            rows.append([
+                run,
+                f"{Trip.objects.count():,}",
+                f"{Ticket.objects.count():,}",
+                f"{median_ms(measure(route_trips)):,.1f}",
+                f"{elapsed * 1000:,.0f}" if elapsed else "",
+                f"{archived[0] / elapsed:,.0f}" if elapsed else "",
+                f"{archived[1] / elapsed:,.0f}" if elapsed else "",
+            ])
+
+        add_row("before")
+        started = time.perf_counter()
+        archived = archive_trips(timezone.now())
+        add_row("after", time.perf_counter() - started, archived)
+
+    print_table(
+        ["run", "hot trips", "hot tickets", "20 routes ms", "archive ms",
+         "trips/s", "tickets/s"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Many threads ordering random seats of one trip at the same time.
+
+Reports throughput, latency percentiles and the share of orders rejected
+with 409 because their seats were taken first. Run it against PostgreSQL
+for meaningful numbers; SQLite serializes all writers.
+"""
+import argparse
+import random
+import threading
+import time
+
+from benchmarks.utils import (
+    benchmark_database,
+    percentile_ms,
+    print_table,
+    setup_django,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--orders", type=int, default=400)
+    parser.add_argument("--max-tickets", type=int, default=4)
+    parser.add_argument("--cargo-num", type=int, default=10)
+    parser.add_argument("--places-in-cargo", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+
+    from train_station.exceptions import SeatConflict
+    from train_station.models import (
+        Route,
+        Station,
+        Ticket,
+        Train,
+        TrainType,
+        Trip,
+    )
+    from train_station.serializers import OrderSerializer
+
+    with benchmark_database():
+        customer = get_user_model().objects.create_user(
+            email="benchmark@benchmark.com", password="benchmark"
+        )
+        trip = Trip.objects.create(
+            route=Route.objects.create(
+                source_station=Station.objects.create(
+                    name="Source", latitude=10, longitude=10
+                ),
+                destination_station=Station.objects.create(
+                    name="Destination", latitude=20, longitude=20
+                ),
+                distance=100,
+            ),
+            train=Train.objects.create(
+                name="Benchmark",
+                cargo_num=args.cargo_num,
+                places_in_cargo=args.places_in_cargo,
+                train_type=TrainType.objects.create(name="Benchmark"),
+            ),
+            departure_time="2030-01-01T10:00:00Z",
+            arrival_time="2030-01-01T12:00:00Z",
+        )
+        seats = [
+            (cargo, seat)
+            for cargo in range(1, args.cargo_num + 1)
+            for seat in range(1, args.places_in_cargo + 1)
+        ]
+        results = []
+        results_lock = threading.Lock()
+
+        def worker(orders, seed):
+            rng = random.Random(seed)
+            for _ in range(orders):
+                payload = {
+                    "tickets": [
+                        {"trip": trip.id, "cargo": cargo, "seat": seat}
+                        for cargo, seat in rng.sample(
+                            seats, rng.randint(1, args.max_tickets)
+                        )
+                    ]
+                }
+                started = time.perf_counter()
+                try:
+                    serializer = OrderSerializer(data=payload)
+                    serializer.is_valid(raise_exception=True)
+                    serializer.save(customer=customer)
+                    outcome = "booked"
+                except SeatConflict:
+                    outcome = "conflict"
+                except Exception as error:
+                    outcome = type(error).__name__
+                with results_lock:
+                    results.append((outcome, time.perf_counter() - started))
+            connection.close()
+
+        threads = [
+            threading.Thread(
+                target=worker,
+                args=(args.orders // args.threads, index),
+            )
+            for index in range(args.threads)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        durations = [duration for _, duration in results]
+        outcomes = [outcome for outcome, _ in results]
+        rows = [[
+            args.threads,
+            len(results),
+            f"{len(results) / elapsed:.1f}",
+            f"{percentile_ms(durations, 50):.1f}",
+            f"{percentile_ms(durations, 99):.1f}",
+            f"{outcomes.count('conflict') / len(results):.1%}",
+            len(results) - outcomes.count("booked")
+            - outcomes.count("conflict"),
+            Ticket.objects.count(),
+        ]]
+
+    print_table(
+        ["threads", "orders", "orders/s", "p50 ms", "p99 ms",
+         "conflicts", "errors", "tickets"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Throughput and peak resident memory of streaming the tickets export as
+NDJSON and CSV. Peak RSS should not grow with the number of tickets.
+"""
+import argparse
+import resource
+import time
+
+from benchmarks.utils import benchmark_database, print_table, setup_django
+
+
+BATCH_SIZE = 10_000
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickets", type=int, default=5_000_000)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth import get_user_model
+
+    from train_station.exports import export
+    from train_station.models import Order, Ticket, Trip
+    from train_station.tests.test_trip_search_api import seed_network
+
+    with benchmark_database():
+        seed_network(stations=90, routes=100, trains=50, trips_per_route=10)
+        customer = get_user_model().objects.create_user(
+            email="bench@test.com", password="bench_password"
+        )
+        trip_ids = list(Trip.objects.values_list("id", flat=True))
+        orders = Order.objects.bulk_create(
+            [Order(customer=customer) for _ in range(1000)]
+        )
+        for start in range(0, args.tickets, BATCH_SIZE):
+            Ticket.objects.bulk_create([
+                Ticket(
+                    order=orders[number % len(orders)],
+                    trip_id=trip_ids[number % len(trip_ids)],
+                    cargo=1,
+                    seat=number // len(trip_ids) + 1,
+                )
+                for number in range(
+                    start, min(start + BATCH_SIZE, args.tickets)
+                )
+            ])
+
+        rows = []
+        for output in ("ndjson", "csv"):
+            before = peak_rss_mb()
+            started = time.perf_counter()
+            size = sum(len(chunk) for chunk in export("tickets", output))
+            seconds = time.perf_counter() - started
+            rows.append([
+                output,
+                f"{args.tickets:,}",
+                f"{size / 2 ** 20:,.0f}",
+                f"{args.tickets / seconds:,.0f}",
+                f"{before:,.0f}",
+                f"{peak_rss_mb():,.0f}",
+            ])
+
+    print_table(
+        ["output", "tickets", "MiB", "rows/s", "RSS before MiB",
+         "peak RSS MiB"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Time to write the GTFS feed from scratch, with nothing changed since the
+previous export and after a station change, which rebuilds only
+stops.txt and routes.txt.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.utils import benchmark_database, print_table, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--routes", type=int, default=1000)
+    parser.add_argument("--trips-per-route", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from train_station.gtfs_export import export_gtfs
+    from train_station.models import Trip
+    from train_station.tests.test_trip_search_api import seed_network
+    from train_station.versions import bump_versions
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory, benchmark_database():
+        seed_network(
+            stations=90,
+            routes=args.routes,
+            trains=args.trips_per_route,
+            trips_per_route=args.trips_per_route,
+        )
+        path = os.path.join(directory, "gtfs.zip")
+        for run, prepare, full in (
+            ("full", lambda: None, True),
+            ("unchanged", lambda: None, False),
+            ("station changed", lambda: bump_versions("station"), False),
+        ):
+            prepare()
+            started = time.perf_counter()
+            rebuilt = export_gtfs(path, full=full)
+            rows.append([
+                run,
+                f"{Trip.objects.count():,}",
+                len(rebuilt),
+                f"{(time.perf_counter() - started) * 1000:,.0f}",
+                f"{os.path.getsize(path) / 2 ** 20:,.1f}",
+            ])
+
+    print_table(["run", "trips", "files rebuilt", "ms", "MiB"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Journey planning on a synthetic timetable: stations on a grid linked to
+their neighbours, with trips spread over two days. Reports the time to
+build the connection array, to plan journeys with each optimisation and
+to apply a single trip change incrementally.
+"""
+import argparse
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.utils import (
+    measure,
+    median_ms,
+    percentile_ms,
+    print_table,
+    setup_django,
+)
+
+
+START = datetime(2030, 5, 1, tzinfo=timezone.utc)
+
+
+def build_timetable(timetable_class, stations, trips, seed):
+    rng = random.Random(seed)
+    side = math.isqrt(stations)
+    timetable = timetable_class()
+    for station_id in range(side * side):
+        row, column = divmod(station_id, side)
+        neighbours = []
+        if column < side - 1:
+            neighbours.append(station_id + 1)
+        if row < side - 1:
+            neighbours.append(station_id + side)
+        for neighbour in neighbours:
+            for source, destination in (
+                (station_id, neighbour), (neighbour, station_id)
+            ):
+                timetable.routes[len(timetable.routes)] = (
+                    source, destination
+                )
+
+    route_ids = list(timetable.routes)
+    rows = []
+    for trip_id in range(trips):
+        departure = START + timedelta(minutes=rng.randrange(2 * 24 * 60))
+        rows.append((
+            trip_id,
+            rng.choice(route_ids),
+            departure,
+            departure + timedelta(minutes=rng.randint(30, 240)),
+        ))
+
+    started = time.perf_counter()
+    connections = []
+    for trip_id, route_id, departure, arrival in rows:
+        connection = timetable._connection(
+            trip_id, route_id, departure, arrival
+        )
+        timetable.trips[trip_id] = connection
+        timetable.route_trips.setdefault(route_id, set()).add(trip_id)
+        connections.append(connection)
+    connections.sort()
+    timetable.connections = connections
+    return timetable, side, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stations", type=int, default=2500)
+    parser.add_argument(
+        "--trips", type=int, nargs="+", default=[10000, 100000]
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--max-legs", type=int, default=4)
+    parser.add_argument(
+        "--max-hops",
+        type=int,
+        default=3,
+        help="Grid distance between source and destination",
+    )
+    args = parser.parse_args()
+
+    setup_django()
+
+    from train_station.journeys import (
+        EARLIEST_ARRIVAL,
+        FEWEST_TRANSFERS,
+        Timetable,
+    )
+
+    rows = []
+    for trips in args.trips:
+        timetable, side, build_seconds = build_timetable(
+            Timetable, args.stations, trips, seed=0
+        )
+        rng = random.Random(1)
+        queries = []
+        for _ in range(args.queries):
+            row, column = rng.randrange(side), rng.randrange(side)
+            queries.append((
+                row * side + column,
+                min(side - 1, row + rng.randint(1, args.max_hops)) * side
+                + min(side - 1, column + rng.randint(0, args.max_hops)),
+                START + timedelta(minutes=rng.randrange(12 * 60)),
+            ))
+
+        for optimize in (EARLIEST_ARRIVAL, FEWEST_TRANSFERS):
+            pending = iter(queries)
+            found = 0
+
+            def plan():
+                nonlocal found
+                source, target, departure = next(pending)
+                found += timetable.plan(
+                    source,
+                    target,
+                    departure,
+                    min_transfer=timedelta(minutes=10),
+                    max_legs=args.max_legs,
+                    optimize=optimize,
+                ) is not None
+
+            durations = measure(plan, repeat=len(queries))
+            rows.append([
+                trips,
+                optimize,
+                f"{build_seconds * 1000:.0f}",
+                f"{found}/{len(queries)}",
+                f"{median_ms(durations):.3f}",
+                f"{percentile_ms(durations, 99):.3f}",
+            ])
+
+        trip_ids = iter(rng.sample(range(trips), 200))
+
+        def move_trip():
+            trip_id = next(trip_ids)
+            departure = START + timedelta(minutes=rng.randrange(2 * 24 * 60))
+            timetable.set_trip(
+                trip_id,
+                timetable.trips[trip_id][5],
+                departure,
+                departure + timedelta(hours=1),
+            )
+
+        durations = measure(move_trip, repeat=200)
+        rows.append([
+            trips,
+            "update trip",
+            "",
+            "",
+            f"{median_ms(durations):.3f}",
+            f"{percentile_ms(durations, 99):.3f}",
+        ])
+
+    print_table(
+        ["trips", "query", "build ms", "found", "median ms", "p99 ms"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
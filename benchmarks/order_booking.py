@@ -0,0 +1,117 @@
+"""
+Queries and latency of OrderSerializer.create per order size, comparing
+the per-ticket ``Ticket.objects.create`` loop with the bulk booking path.
+"""
+import argparse
+from itertools import count
+
+from benchmarks.utils import (
+    benchmark_database,
+    measure,
+    median_ms,
+    print_table,
+    setup_django,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth import get_user_model
+    from django.db import connection, transaction
+    from django.test.utils import CaptureQueriesContext
+
+    from train_station.models import (
+        Order,
+        Route,
+        Station,
+        Ticket,
+        Train,
+        TrainType,
+        Trip,
+    )
+    from train_station.serializers import OrderSerializer
+
+    class LoopOrderSerializer(OrderSerializer):
+        def create(self, validated_data):
+            with transaction.atomic():
+                tickets_data = validated_data.pop("tickets")
+                order = Order.objects.create(**validated_data)
+                for ticket_data in tickets_data:
+                    Ticket.objects.create(order=order, **ticket_data)
+                return order
+
+    with benchmark_database():
+        customer = get_user_model().objects.create_user(
+            email="benchmark@benchmark.com", password="benchmark"
+        )
+        route = Route.objects.create(
+            source_station=Station.objects.create(
+                name="Source", latitude=10, longitude=10
+            ),
+            destination_station=Station.objects.create(
+                name="Destination", latitude=20, longitude=20
+            ),
+            distance=100,
+        )
+        train_type = TrainType.objects.create(name="Benchmark")
+        trip_ids = count(1)
+
+        def new_trip():
+            trip_id = next(trip_ids)
+            return Trip.objects.create(
+                route=route,
+                train=Train.objects.create(
+                    name=f"Train {trip_id}",
+                    cargo_num=10,
+                    places_in_cargo=100,
+                    train_type=train_type,
+                ),
+                departure_time="2030-01-01T10:00:00Z",
+                arrival_time="2030-01-01T12:00:00Z",
+            )
+
+        def place_order(serializer_class, size):
+            trip = new_trip()
+            payload = {
+                "tickets": [
+                    {"trip": trip.id, "cargo": 1 + seat // 100,
+                     "seat": 1 + seat % 100}
+                    for seat in range(size)
+                ]
+            }
+
+            def run():
+                serializer = serializer_class(data=payload)
+                serializer.is_valid(raise_exception=True)
+                serializer.save(customer=customer)
+            return run
+
+        rows = []
+        for size in args.sizes:
+            for name, serializer_class in (
+                ("loop", LoopOrderSerializer),
+                ("bulk", OrderSerializer),
+            ):
+                run = place_order(serializer_class, size)
+                with CaptureQueriesContext(connection) as queries:
+                    run()
+                durations = []
+                for _ in range(args.repeat):
+                    durations += measure(
+                        place_order(serializer_class, size), repeat=1
+                    )
+                rows.append([
+                    size, name, len(queries), f"{median_ms(durations):.2f}"
+                ])
+
+    print_table(["tickets", "path", "queries", "median ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Queries and time spent serving a customer's order list with every nested
+serializer expanded against sparser ``?fields=`` and ``?expand=`` picks.
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from benchmarks.utils import (
+    benchmark_database,
+    measure,
+    median_ms,
+    print_table,
+    setup_django,
+)
+
+
+VARIANTS = (
+    ("default", {}),
+    ("expand=tickets", {"expand": "tickets"}),
+    ("tickets.trip.departure_time", {
+        "fields": "id,created_at,tickets.seat,tickets.trip.departure_time"
+    }),
+    ("fields=id,created_at", {"fields": "id,created_at"}),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=100)
+    parser.add_argument("--tickets-per-order", type=int, default=4)
+    parser.add_argument("--trips", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from django.utils import timezone
+    from rest_framework.reverse import reverse
+    from rest_framework.test import APIClient
+
+    from train_station.models import (
+        Crew,
+        Order,
+        Route,
+        Station,
+        Ticket,
+        Train,
+        TrainType,
+        Trip,
+    )
+
+    rng = random.Random(0)
+    with benchmark_database():
+        customer = get_user_model().objects.create_user(
+            email="bench@test.com", password="bench_password"
+        )
+        stations = Station.objects.bulk_create([
+            Station(name=f"Station {number}", latitude=number % 90,
+                    longitude=number % 180)
+            for number in range(50)
+        ])
+        routes = Route.objects.bulk_create([
+            Route(source_station=source, destination_station=destination,
+                  distance=100)
+            for source, destination in zip(stations, stations[1:])
+        ])
+        train_type = TrainType.objects.create(name="Intercity")
+        trains = Train.objects.bulk_create([
+            Train(name=f"Train {number}", cargo_num=10, places_in_cargo=50,
+                  train_type=train_type)
+            for number in range(20)
+        ])
+        crew = Crew.objects.bulk_create([
+            Crew(first_name=f"First {number}", last_name=f"Last {number}")
+            for number in range(30)
+        ])
+        first_day = timezone.make_aware(datetime(2030, 1, 1))
+        pairs = rng.sample(
+            [(route, train) for route in routes for train in trains],
+            args.trips
+        )
+        trips = Trip.objects.bulk_create([
+            Trip(
+                route=route,
+                train=train,
+                departure_time=first_day + timedelta(hours=number),
+                arrival_time=first_day + timedelta(hours=number + 5),
+            )
+            for number, (route, train) in enumerate(pairs)
+        ])
+        for trip in trips:
+            trip.crew.set(rng.sample(crew, 3))
+        orders = Order.objects.bulk_create(
+            [Order(customer=customer) for _ in range(args.orders)]
+        )
+        seats = {}
+        tickets = []
+        for order in orders:
+            for _ in range(args.tickets_per_order):
+                trip = rng.choice(trips)
+                seat = seats[trip.id] = seats.get(trip.id, 0) + 1
+                tickets.append(Ticket(
+                    order=order,
+                    trip=trip,
+                    cargo=1 + (seat - 1) // 50,
+                    seat=1 + (seat - 1) % 50,
+                ))
+        Ticket.objects.bulk_create(tickets)
+
+        client = APIClient()
+        client.force_authenticate(customer)
+        url = reverse("train_station:order-list")
+        rows = []
+        for label, params in VARIANTS:
+            params = {"limit": args.orders, **params}
+            with CaptureQueriesContext(connection) as queries:
+                client.get(url, params)
+            # read before the next requests reset the query log
+            query_count = len(queries)
+            durations = measure(
+                lambda: client.get(url, params), repeat=args.repeat
+            )
+            rows.append([
+                label, query_count, f"{median_ms(durations):.1f}"
+            ])
+
+    print_table(["order list", "queries", "median ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Sustained orders/sec of synchronous booking against queued intake plus the
+batch worker, for orders spread over a few trips.
+"""
+import argparse
+import time
+
+from benchmarks.utils import benchmark_database, print_table, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--trips", type=int, default=4)
+    parser.add_argument("--tickets", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth import get_user_model
+
+    from train_station.models import (
+        Route,
+        Station,
+        Train,
+        TrainType,
+        Trip,
+    )
+    from train_station.order_queue import (
+        claim_batch,
+        enqueue_order,
+        process_batch,
+    )
+    from train_station.serializers import OrderSerializer
+
+    with benchmark_database():
+        customer = get_user_model().objects.create_user(
+            email="benchmark@benchmark.com", password="benchmark"
+        )
+        route = Route.objects.create(
+            source_station=Station.objects.create(
+                name="Source", latitude=10, longitude=10
+            ),
+            destination_station=Station.objects.create(
+                name="Destination", latitude=20, longitude=20
+            ),
+            distance=100,
+        )
+        train_type = TrainType.objects.create(name="Benchmark")
+        places_in_cargo = 100
+        cargo_num = args.orders * args.tickets // places_in_cargo + 1
+
+        def new_trips(mode):
+            return [
+                Trip.objects.create(
+                    route=route,
+                    train=Train.objects.create(
+                        name=f"{mode} {index}",
+                        cargo_num=cargo_num,
+                        places_in_cargo=places_in_cargo,
+                        train_type=train_type,
+                    ),
+                    departure_time="2030-01-01T10:00:00Z",
+                    arrival_time="2030-01-01T12:00:00Z",
+                )
+                for index in range(args.trips)
+            ]
+
+        def payloads(trips):
+            for index in range(args.orders):
+                first_seat = index * args.tickets
+                seats = range(first_seat, first_seat + args.tickets)
+                yield {
+                    "tickets": [
+                        {
+                            "trip": trips[index % len(trips)].id,
+                            "cargo": 1 + seat // places_in_cargo,
+                            "seat": 1 + seat % places_in_cargo,
+                        }
+                        for seat in seats
+                    ]
+                }
+
+        sync_trips = new_trips("sync")
+        started = time.perf_counter()
+        for payload in payloads(sync_trips):
+            serializer = OrderSerializer(data=payload)
+            serializer.is_valid(raise_exception=True)
+            serializer.save(customer=customer)
+        sync_elapsed = time.perf_counter() - started
+
+        queued_trips = new_trips("queued")
+        started = time.perf_counter()
+        for payload in payloads(queued_trips):
+            serializer = OrderSerializer(data=payload)
+            serializer.is_valid(raise_exception=True)
+            enqueue_order(customer, serializer.validated_data["tickets"])
+        intake_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        while True:
+            order_requests = claim_batch(args.batch_size)
+            if not order_requests:
+                break
+            process_batch(order_requests)
+        drain_elapsed = time.perf_counter() - started
+
+    print_table(
+        ["mode", "orders", "request orders/s", "end-to-end orders/s"],
+        [
+            ["sync", args.orders, f"{args.orders / sync_elapsed:.0f}",
+             f"{args.orders / sync_elapsed:.0f}"],
+            ["queued", args.orders, f"{args.orders / intake_elapsed:.0f}",
+             f"{args.orders / (intake_elapsed + drain_elapsed):.0f}"],
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Page latency of limit/offset against keyset pagination on a customer's
+order list, for pages further and further from the start.
+"""
+import argparse
+import base64
+import json
+
+from benchmarks.utils import (
+    benchmark_database,
+    measure,
+    median_ms,
+    print_table,
+    setup_django,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=1_000_100)
+    parser.add_argument(
+        "--offsets",
+        type=int,
+        nargs="+",
+        default=[0, 10_000, 100_000, 1_000_000],
+    )
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth import get_user_model
+    from django.test import RequestFactory
+    from rest_framework.pagination import LimitOffsetPagination
+    from rest_framework.request import Request
+
+    from train_station.models import Order
+    from train_station.pagination import KeysetPagination, _to_json
+
+    with benchmark_database():
+        customer = get_user_model().objects.create_user(
+            email="bench@test.com", password="bench_password"
+        )
+        for start in range(0, args.orders, 50_000):
+            Order.objects.bulk_create(
+                [
+                    Order(customer=customer)
+                    for _ in range(min(50_000, args.orders - start))
+                ],
+                batch_size=10_000,
+            )
+        orders = Order.objects.filter(customer=customer)
+
+        rows = []
+        for offset in args.offsets:
+            request = Request(RequestFactory().get(
+                "/orders/", {"limit": args.limit, "offset": offset}
+            ))
+            durations = measure(
+                lambda: LimitOffsetPagination().paginate_queryset(
+                    orders, request
+                ),
+                repeat=args.repeat,
+            )
+            rows.append(
+                [offset, "limit/offset", f"{median_ms(durations):.1f}"]
+            )
+
+            params = {"limit": args.limit}
+            if offset:
+                created_at, order_id = orders.order_by(
+                    "created_at", "pk"
+                ).values_list("created_at", "pk")[offset - 1]
+                params["cursor"] = base64.urlsafe_b64encode(json.dumps(
+                    {"r": 0, "p": [_to_json(created_at), order_id]}
+                ).encode()).decode()
+            request = Request(RequestFactory().get("/orders/", params))
+            durations = measure(
+                lambda: KeysetPagination().paginate_queryset(
+                    orders, request
+                ),
+                repeat=args.repeat,
+            )
+            rows.append([offset, "keyset", f"{median_ms(durations):.1f}"])
+
+    print_table(["offset", "pagination", "median ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
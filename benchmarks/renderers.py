@@ -0,0 +1,115 @@
+"""
+Encode time and size on the wire of real serializer output (trip list,
+station list and order list pages) with DRF's ``JSONRenderer``, the orjson
+renderer and the MessagePack renderer, plain and gzipped.
+"""
+import argparse
+import gzip
+import random
+from decimal import Decimal
+
+from benchmarks.utils import (
+    benchmark_database,
+    measure,
+    median_ms,
+    print_table,
+    setup_django,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth import get_user_model
+    from rest_framework.renderers import JSONRenderer
+
+    from train_station.models import Order, Station, Ticket, Trip
+    from train_station.renderers import MessagePackRenderer, ORJSONRenderer
+    from train_station.serializers import (
+        OrderListSerializer,
+        StationSerializer,
+        TripListSerializer,
+    )
+    from train_station.tests.test_trip_search_api import seed_network
+
+    rng = random.Random(0)
+    with benchmark_database():
+        seed_network(
+            stations=90,
+            routes=args.rows // 10,
+            trains=50,
+            trips_per_route=10,
+        )
+        Station.objects.bulk_create([
+            Station(
+                name=f"Extra station {number}",
+                latitude=Decimal(f"{rng.uniform(-89, 89):.15f}"),
+                longitude=Decimal(f"{rng.uniform(-99, 99):.15f}"),
+            )
+            for number in range(args.rows)
+        ])
+        customer = get_user_model().objects.create_user(
+            email="bench@test.com", password="bench_password"
+        )
+        trips = list(Trip.objects.all())
+        orders = Order.objects.bulk_create(
+            [Order(customer=customer) for _ in range(args.rows // 4)]
+        )
+        Ticket.objects.bulk_create([
+            Ticket(order=order, trip=trip, cargo=1, seat=number + 1)
+            for number, order in enumerate(orders)
+            for trip in rng.sample(trips, 4)
+        ])
+
+        payloads = {
+            "trips": TripListSerializer(
+                Trip.objects.with_tickets_available().select_related(
+                    "train",
+                    "route__source_station",
+                    "route__destination_station",
+                ).prefetch_related("crew")[:args.rows],
+                many=True,
+            ).data,
+            "stations": StationSerializer(
+                Station.objects.all()[:args.rows], many=True
+            ).data,
+            "orders": OrderListSerializer(
+                Order.objects.prefetch_related(
+                    "tickets__trip__train",
+                    "tickets__trip__route__source_station",
+                    "tickets__trip__route__destination_station",
+                    "tickets__trip__crew",
+                ),
+                many=True,
+            ).data,
+        }
+
+    rows = []
+    for name, data in payloads.items():
+        for renderer in (
+            JSONRenderer(), ORJSONRenderer(), MessagePackRenderer()
+        ):
+            durations = measure(
+                lambda: renderer.render(data), repeat=args.repeat
+            )
+            body = renderer.render(data)
+            rows.append([
+                name,
+                type(renderer).__name__,
+                f"{median_ms(durations):.2f}",
+                f"{len(body):,}",
+                f"{len(gzip.compress(body)):,}",
+            ])
+
+    print_table(
+        ["payload", "renderer", "encode ms", "bytes", "gzipped bytes"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
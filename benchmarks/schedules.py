@@ -0,0 +1,58 @@
+"""
+Time to materialize a year of daily trips from recurring schedules: the
+first run into an empty timetable and a re-run, where every trip exists.
+"""
+import argparse
+import time
+from datetime import date, time as day_time, timedelta
+
+from benchmarks.utils import benchmark_database, print_table, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--routes", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from train_station.models import Route, Schedule, Train
+    from train_station.schedules import materialize_schedules
+    from train_station.tests.test_trip_search_api import seed_network
+
+    rows = []
+    with benchmark_database():
+        seed_network(
+            stations=90, routes=args.routes, trains=50, trips_per_route=0
+        )
+        trains = list(Train.objects.all())
+        Schedule.objects.bulk_create([
+            Schedule(
+                route=route,
+                train=trains[number % len(trains)],
+                departure_time=day_time(number % 24, number % 60),
+                duration=timedelta(hours=5),
+                valid_from=date(2030, 1, 1),
+            )
+            for number, route in enumerate(Route.objects.all())
+        ])
+        for run in ("first run", "re-run"):
+            started = time.perf_counter()
+            created = materialize_schedules(
+                start=date(2030, 1, 1), days=args.days
+            )
+            elapsed = time.perf_counter() - started
+            rows.append([
+                run,
+                f"{args.routes * args.days:,}",
+                f"{created:,}",
+                f"{elapsed * 1000:,.0f}",
+                f"{args.routes * args.days / elapsed:,.0f}",
+            ])
+
+    print_table(["run", "trips", "created", "ms", "trips/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
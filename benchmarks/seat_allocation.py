@@ -0,0 +1,78 @@
+"""
+Seat allocation on large, mostly occupied trains: the run index built from
+the packed seat map against scanning every seat of a ticket list.
+"""
+import argparse
+import random
+
+from benchmarks.utils import measure, median_ms, print_table, setup_django
+
+
+def scan_allocate(tickets, cargo_num, places_in_cargo, count):
+    taken = set(tickets)
+    for cargo in range(1, cargo_num + 1):
+        run = []
+        for seat in range(1, places_in_cargo + 1):
+            run = [] if (cargo, seat) in taken else run + [(cargo, seat)]
+            if len(run) == count:
+                return run
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--places-in-cargo", type=int, default=100)
+    parser.add_argument(
+        "--cargo-nums", type=int, nargs="+", default=[20, 50, 100]
+    )
+    parser.add_argument(
+        "--occupancy", type=float, nargs="+", default=[0.5, 0.9, 0.98]
+    )
+    parser.add_argument("--group-size", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from train_station.allocation import SeatAllocator
+    from train_station.seat_map import SeatMap
+
+    rng = random.Random(0)
+    rows = []
+    for cargo_num in args.cargo_nums:
+        seats = [
+            (cargo, seat)
+            for cargo in range(1, cargo_num + 1)
+            for seat in range(1, args.places_in_cargo + 1)
+        ]
+        for occupancy in args.occupancy:
+            tickets = rng.sample(seats, int(len(seats) * occupancy))
+            seat_map = SeatMap(1, cargo_num, args.places_in_cargo)
+            seat_map.take(tickets)
+
+            index_durations = measure(
+                lambda: SeatAllocator(seat_map).allocate(
+                    args.group_size, together=True
+                ),
+                repeat=args.repeat,
+            )
+            scan_durations = measure(
+                lambda: scan_allocate(
+                    tickets, cargo_num, args.places_in_cargo, args.group_size
+                ),
+                repeat=args.repeat,
+            )
+            rows.append([
+                len(seats),
+                f"{occupancy:.0%}",
+                f"{median_ms(index_durations):.3f}",
+                f"{median_ms(scan_durations):.3f}",
+            ])
+
+    print_table(
+        ["seats", "occupied", "run index ms", "ticket scan ms"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
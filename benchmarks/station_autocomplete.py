@@ -0,0 +1,82 @@
+"""
+Autocomplete lookup time over synthetic station names, for queries of
+growing length typed one keystroke at a time, with and without fuzzy
+matching.
+"""
+import argparse
+import random
+import string
+
+from benchmarks.utils import (
+    measure,
+    median_ms,
+    percentile_ms,
+    print_table,
+    setup_django,
+)
+
+
+SYLLABLES = [
+    consonant + vowel
+    for consonant in "bdghklmnprstvz"
+    for vowel in "aeiouy"
+] + ["ów", "ü", "ří", "sk", "iv"]
+
+
+def station_name(rng) -> str:
+    words = [
+        "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize()
+        for _ in range(rng.choice((1, 1, 2, 3)))
+    ]
+    return rng.choice(("-", " ")).join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stations", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from train_station.autocomplete import StationNameIndex
+
+    rng = random.Random(0)
+    index = StationNameIndex()
+    names = set()
+    while len(names) < args.stations:
+        names.add(station_name(rng))
+    for station_id, name in enumerate(sorted(names)):
+        index.set_station(station_id, name)
+
+    names = sorted(names)
+    rows = []
+    for length in (1, 2, 3, 5, 8):
+        queries = [
+            rng.choice(names)[:length] for _ in range(args.queries)
+        ]
+        typos = [
+            query[:-1] + rng.choice(string.ascii_lowercase)
+            for query in queries
+        ]
+        for label, pending, fuzzy in (
+            ("prefix", queries, False),
+            ("fuzzy, with typo", typos, True),
+        ):
+            pending = iter(pending)
+            durations = measure(
+                lambda: index.search(next(pending), 10, fuzzy=fuzzy),
+                repeat=args.queries,
+            )
+            rows.append([
+                length,
+                label,
+                f"{median_ms(durations):.3f}",
+                f"{percentile_ms(durations, 99):.3f}",
+            ])
+
+    print_table(["query length", "mode", "median ms", "p99 ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
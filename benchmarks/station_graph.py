@@ -0,0 +1,102 @@
+"""
+Shortest-path query time on synthetic rail networks of tens of thousands
+of stations, for A* (great-circle heuristic) and plain Dijkstra.
+"""
+import argparse
+import math
+import random
+
+from benchmarks.utils import (
+    measure,
+    median_ms,
+    percentile_ms,
+    print_table,
+    setup_django,
+)
+
+
+def build_graph(graph_class, great_circle_km, stations, seed):
+    """Stations on a jittered grid, linked to their grid neighbours"""
+    rng = random.Random(seed)
+    side = math.isqrt(stations)
+    graph = graph_class()
+    for station_id in range(side * side):
+        row, column = divmod(station_id, side)
+        graph.set_station(
+            station_id,
+            str(station_id),
+            44 + 8 * (row + rng.random() * 0.5) / side,
+            22 + 18 * (column + rng.random() * 0.5) / side,
+        )
+    route_id = 0
+    for station_id in range(side * side):
+        row, column = divmod(station_id, side)
+        for neighbour in (station_id + 1, station_id + side):
+            if (neighbour == station_id + 1 and column == side - 1) or (
+                neighbour >= side * side
+            ):
+                continue
+            straight = great_circle_km(
+                graph.coordinates[station_id], graph.coordinates[neighbour]
+            )
+            for source, destination in (
+                (station_id, neighbour), (neighbour, station_id)
+            ):
+                graph.set_route(
+                    route_id, source, destination,
+                    math.ceil(straight * rng.uniform(1.05, 1.4))
+                )
+                route_id += 1
+    return graph, side
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--stations", type=int, nargs="+", default=[10000, 40000]
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument(
+        "--max-hops",
+        type=int,
+        default=10,
+        help="Grid distance between source and destination",
+    )
+    args = parser.parse_args()
+
+    setup_django()
+
+    from train_station.station_graph import great_circle_km, StationGraph
+
+    rows = []
+    for stations in args.stations:
+        graph, side = build_graph(
+            StationGraph, great_circle_km, stations, seed=0
+        )
+        rng = random.Random(1)
+        pairs = []
+        for _ in range(args.queries):
+            row, column = rng.randrange(side), rng.randrange(side)
+            pairs.append((
+                row * side + column,
+                min(side - 1, row + rng.randint(0, args.max_hops)) * side
+                + min(side - 1, column + rng.randint(0, args.max_hops)),
+            ))
+        for algorithm in ("astar", "dijkstra"):
+            queries = iter(pairs)
+            durations = measure(
+                lambda: graph.shortest_path(*next(queries), algorithm),
+                repeat=len(pairs),
+            )
+            rows.append([
+                side * side,
+                algorithm,
+                f"{median_ms(durations):.3f}",
+                f"{percentile_ms(durations, 99):.3f}",
+            ])
+
+    print_table(["stations", "algorithm", "median ms", "p99 ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Throughput of ``import_timetable`` on generated CSV files: a first import
+into an empty database and a re-import where every row is an update.
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.utils import benchmark_database, print_table, setup_django
+
+
+def write_csv(path, name, header, rows):
+    with open(os.path.join(path, name), "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def write_timetable(path, stations, routes, trains, trips):
+    rng = random.Random(0)
+    names = [f"Station {number}" for number in range(stations)]
+    write_csv(path, "stations.csv", ["name", "latitude", "longitude"], [
+        (name, f"{number * 0.01 - 80:.2f}", f"{number * 0.01:.2f}")
+        for number, name in enumerate(names)
+    ])
+    pairs = rng.sample(
+        [(source, destination) for source in names for destination in names
+         if source != destination],
+        routes,
+    )
+    write_csv(path, "routes.csv", ["source", "destination", "distance"], [
+        (source, destination, rng.randint(10, 1000))
+        for source, destination in pairs
+    ])
+    write_csv(
+        path, "trains.csv",
+        ["name", "cargo_num", "places_in_cargo", "train_type"],
+        [(f"Train {number}", 10, 50, f"Type {number % 5}")
+         for number in range(trains)],
+    )
+    first_day = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for number in range(trips):
+        source, destination = pairs[number % routes]
+        departure_time = first_day + timedelta(minutes=rng.randrange(525600))
+        rows.append((
+            source,
+            destination,
+            f"Train {number // routes % trains}",
+            departure_time.isoformat(),
+            (departure_time + timedelta(hours=5)).isoformat(),
+            "Taras Shevchenko; Lesia Ukrainka" if number % 10 == 0 else "",
+        ))
+    write_csv(
+        path, "trips.csv",
+        ["source", "destination", "train", "departure_time",
+         "arrival_time", "crew"],
+        rows,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stations", type=int, default=500)
+    parser.add_argument("--routes", type=int, default=1000)
+    parser.add_argument("--trains", type=int, default=200)
+    parser.add_argument("--trips", type=int, default=200_000)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from train_station.timetable_import import import_timetable, read_csv
+
+    rows = []
+    with tempfile.TemporaryDirectory() as path, benchmark_database():
+        write_timetable(
+            path, args.stations, args.routes, args.trains, args.trips
+        )
+        for run in ("empty database", "re-import"):
+            started = time.perf_counter()
+            timetable = read_csv(path)
+            parsed = time.perf_counter()
+            counts = import_timetable(timetable)
+            finished = time.perf_counter()
+            rows.append([
+                run,
+                f"{counts['trip'][0]:,}",
+                f"{counts['trip'][1]:,}",
+                f"{(parsed - started) * 1000:,.0f}",
+                f"{(finished - parsed) * 1000:,.0f}",
+                f"{counts['trip'][0] / (finished - started):,.0f}",
+            ])
+
+    print_table(
+        ["run", "trips", "new", "read ms", "write ms", "trips/s"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Rows per second building the trip list payload with ``TripListSerializer``
+over model instances against ``TripListFastSerializer`` over ``values()``
+rows, queries included, for pages of growing size.
+"""
+import argparse
+
+from benchmarks.utils import (
+    benchmark_database,
+    measure,
+    median_ms,
+    print_table,
+    setup_django,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[100, 1_000, 10_000]
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from train_station.fast_serializers import TripListFastSerializer
+    from train_station.models import Crew, Trip
+    from train_station.serializers import TripListSerializer
+    from train_station.tests.test_trip_search_api import seed_network
+
+    with benchmark_database():
+        seed_network(
+            stations=100,
+            routes=max(args.rows) // 20,
+            trains=50,
+            trips_per_route=20,
+        )
+        crew = Crew.objects.bulk_create([
+            Crew(first_name=f"First {number}", last_name=f"Last {number}")
+            for number in range(100)
+        ])
+        Trip.crew.through.objects.bulk_create([
+            Trip.crew.through(
+                trip_id=trip_id, crew=crew[(trip_id + shift) % len(crew)]
+            )
+            for trip_id in Trip.objects.values_list("id", flat=True)
+            for shift in range(2)
+        ])
+        trips = Trip.objects.with_tickets_available()
+
+        rows = []
+        for count in args.rows:
+            page = trips.order_by("departure_time", "pk")[:count]
+            for label, build in (
+                (
+                    "TripListSerializer",
+                    lambda: TripListSerializer(
+                        page.select_related(
+                            "train",
+                            "route__source_station",
+                            "route__destination_station",
+                        ).prefetch_related("crew"),
+                        many=True,
+                    ).data,
+                ),
+                (
+                    "TripListFastSerializer",
+                    lambda: TripListFastSerializer(
+                        TripListFastSerializer.values(page), many=True
+                    ).data,
+                ),
+            ):
+                duration = median_ms(measure(build, repeat=args.repeat))
+                rows.append([
+                    count,
+                    label,
+                    f"{duration:.1f}",
+                    f"{count / duration * 1000:,.0f}",
+                ])
+
+    print_table(["rows", "serializer", "median ms", "rows/sec"], rows)
+
+
+if __name__ == "__main__":
+    main()
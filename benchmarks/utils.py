@@ -0,0 +1,71 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Every benchmark runs against a throwaway test database created from the
+configured ``DJANGO_SETTINGS_MODULE``, exactly like the test suite does,
+so it never touches real data. Run one with e.g.::
+
+    python -m benchmarks.order_booking
+"""
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+
+def setup_django():
+    os.environ.setdefault(
+        "DJANGO_SETTINGS_MODULE", "train_station_api_service.settings"
+    )
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def benchmark_database():
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment,
+        teardown_test_environment,
+    )
+
+    old_name = connection.settings_dict["NAME"]
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, repeat=5) -> list[float]:
+    """Run ``func`` ``repeat`` times and return durations in seconds"""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def median_ms(durations) -> float:
+    return statistics.median(durations) * 1000
+
+
+def percentile_ms(durations, percent) -> float:
+    ordered = sorted(durations)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index] * 1000
+
+
+def print_table(headers, rows):
+    widths = [
+        max(len(str(value)) for value in column)
+        for column in zip(headers, *rows)
+    ]
+    for row in [headers, ["-" * width for width in widths], *rows]:
+        print("  ".join(
+            str(value).rjust(width) for value, width in zip(row, widths)
+        ))
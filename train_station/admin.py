@@ -1,14 +1,20 @@
 from django.contrib import admin
 
 from train_station.models import (
+    ArchivedTicket,
+    ArchivedTrip,
     Train,
     TrainType,
     Crew,
     Station,
     Route,
+    Schedule,
     Trip,
     Order,
-    Ticket
+    Ticket,
+    SeatHold,
+    HeldSeat,
+    OrderRequest,
 )
 
 
@@ -34,6 +40,15 @@ class RouteAdmin(admin.ModelAdmin):
     list_filter = ("source_station__name", "destination_station__name")
 
 
+@admin.register(Schedule)
+class ScheduleAdmin(admin.ModelAdmin):
+    list_display = (
+        "route", "train", "weekdays", "departure_time", "valid_from",
+        "valid_until",
+    )
+    list_filter = ("weekdays",)
+
+
 @admin.register(Trip)
 class TripAdmin(admin.ModelAdmin):
     list_display = ("route", "train", "departure_time", "arrival_time")
@@ -49,3 +64,33 @@ class OrderAdmin(admin.ModelAdmin):
 class TicketAdmin(admin.ModelAdmin):
     list_display = ("trip", "cargo", "seat", "order")
     search_fields = ("order",)
+
+
+class HeldSeatInline(admin.TabularInline):
+    model = HeldSeat
+    extra = 0
+
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    list_display = ("trip", "customer", "created_at", "expires_at")
+    inlines = (HeldSeatInline,)
+
+
+@admin.register(OrderRequest)
+class OrderRequestAdmin(admin.ModelAdmin):
+    list_display = (
+        "created_at", "customer", "trip", "status", "attempts", "order"
+    )
+    list_filter = ("status",)
+
+
+@admin.register(ArchivedTrip)
+class ArchivedTripAdmin(admin.ModelAdmin):
+    list_display = ("route", "train", "departure_time", "arrival_time")
+
+
+@admin.register(ArchivedTicket)
+class ArchivedTicketAdmin(admin.ModelAdmin):
+    list_display = ("trip", "cargo", "seat", "order")
+    search_fields = ("order",)
@@ -0,0 +1,79 @@
+"""
+Automatic seat allocation for group bookings.
+
+Free seats are indexed as runs of consecutive free seats per cargo, found
+straight from the packed seat map, so allocating does not read tickets.
+"""
+import re
+from bisect import bisect_left, insort
+
+from train_station.seat_map import SeatMap
+
+
+FREE_RUN = re.compile("0+")
+
+
+class SeatAllocator:
+    def __init__(self, seat_map: SeatMap, taken=()):
+        self.cargo_num = seat_map.cargo_num
+        self.places_in_cargo = seat_map.places_in_cargo
+
+        seat_map = SeatMap(
+            seat_map.trip_id,
+            seat_map.cargo_num,
+            seat_map.places_in_cargo,
+            seat_map.bits,
+        )
+        seat_map.take(taken)
+        occupancy = format(
+            int.from_bytes(seat_map.bits, "big"),
+            f"0{len(seat_map.bits) * 8}b"
+        )
+
+        # (length, cargo, first seat) of every free run, shortest first
+        self.runs = []
+        for cargo in range(1, self.cargo_num + 1):
+            start = (cargo - 1) * self.places_in_cargo
+            for match in FREE_RUN.finditer(
+                occupancy, start, start + self.places_in_cargo
+            ):
+                self.runs.append(
+                    (match.end() - match.start(), cargo,
+                     match.start() - start + 1)
+                )
+        self.runs.sort()
+
+    @property
+    def free_count(self) -> int:
+        return sum(length for length, _, _ in self.runs)
+
+    def _take(self, run_index, count) -> list[tuple[int, int]]:
+        length, cargo, first_seat = self.runs.pop(run_index)
+        if length > count:
+            insort(self.runs, (length - count, cargo, first_seat + count))
+        return [
+            (cargo, seat) for seat in range(first_seat, first_seat + count)
+        ]
+
+    def allocate(self, count, together=True):
+        """
+        Pick ``count`` free seats, or return None when there are not enough.
+        With ``together`` the smallest run that fits the whole group is
+        used; otherwise (or when no run is long enough) the group is split
+        over the longest runs to keep it in as few pieces as possible.
+        """
+        if count < 1 or count > self.free_count:
+            return None
+
+        if together:
+            run_index = bisect_left(self.runs, (count, 0, 0))
+            if run_index < len(self.runs):
+                return self._take(run_index, count)
+
+        seats = []
+        while len(seats) < count:
+            seats += self._take(
+                len(self.runs) - 1,
+                min(count - len(seats), self.runs[-1][0])
+            )
+        return sorted(seats)
@@ -0,0 +1,240 @@
+"""
+Archival of completed trips out of the hot trip and ticket tables.
+
+``archive_trips`` moves trips that arrived before a cutoff, with their
+crew and tickets, to ``ArchivedTrip`` and ``ArchivedTicket`` a chunk at a
+time. Each chunk is copied with ``INSERT ... SELECT`` and deleted in a
+transaction of its own, so rows are locked for one chunk only and an
+interrupted run resumes where it stopped. Trips of today are kept, as
+``materialize_schedules`` would create them again, and so are trips with
+order requests still waiting for the queue worker. Seat holds and
+finished order requests of the archived trips are deleted; orders keep
+their archived tickets.
+
+On PostgreSQL archived tickets can be partitioned by the month of the
+trip departure: the ``partition_archived_tickets`` command, run once
+after ``migrate``, recreates the empty table Django created as a
+partitioned one. The partition of a month is then created when its
+first trips are archived. Otherwise tickets are kept in a single table.
+"""
+from datetime import datetime, time, timedelta
+from functools import partial
+
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from train_station.bulk import delete_rows
+from train_station.models import (
+    ArchivedTicket,
+    ArchivedTrip,
+    OrderRequest,
+    SeatHold,
+    Ticket,
+    Trip,
+)
+from train_station.versions import bump_versions
+
+
+ARCHIVE_CHUNK_SIZE = 500
+# archive field: lookup of the copied value
+ARCHIVED_TRIP_FIELDS = {
+    "id": "id",
+    "route": "route_id",
+    "train": "train_id",
+    "departure_time": "departure_time",
+    "arrival_time": "arrival_time",
+}
+ARCHIVED_CREW_FIELDS = {"archivedtrip": "trip_id", "crew": "crew_id"}
+ARCHIVED_TICKET_FIELDS = {
+    "id": "id",
+    "cargo": "cargo",
+    "seat": "seat",
+    "trip": "trip_id",
+    "order": "order_id",
+    "departure_time": "trip__departure_time",
+}
+
+
+def _quote(name) -> str:
+    return connection.ops.quote_name(name)
+
+
+def _is_partitioned(model) -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table "
+            "WHERE partrelid = %s::regclass",
+            [model._meta.db_table],
+        )
+        return cursor.fetchone() is not None
+
+
+def partition_archived_tickets() -> bool:
+    """
+    On PostgreSQL, recreate the archived tickets table partitioned by
+    range of ``departure_time``, if it is still empty. Return whether the
+    table is partitioned. This is schema setup, run once by the
+    ``partition_archived_tickets`` command and never while archiving.
+    """
+    if connection.vendor != "postgresql":
+        return False
+    if _is_partitioned(ArchivedTicket):
+        return True
+    if ArchivedTicket.objects.exists():
+        return False
+
+    opts = ArchivedTicket._meta
+    table = _quote(opts.db_table)
+    partitioned = _quote(f"{opts.db_table}_partitioned")
+    partition_key = _quote(opts.get_field("departure_time").column)
+    statements = [
+        f"CREATE TABLE {partitioned} (LIKE {table} INCLUDING DEFAULTS "
+        f"INCLUDING CONSTRAINTS) PARTITION BY RANGE ({partition_key})",
+        # the primary key of a partitioned table includes the partition key
+        f"ALTER TABLE {partitioned} ADD PRIMARY KEY "
+        f"({_quote(opts.pk.column)}, {partition_key})",
+    ]
+    for field in opts.concrete_fields:
+        if field.remote_field:
+            statements += [
+                f"ALTER TABLE {partitioned} ADD FOREIGN KEY "
+                f"({_quote(field.column)}) REFERENCES "
+                f"{_quote(field.related_model._meta.db_table)} "
+                f"({_quote(field.target_field.column)}) "
+                f"DEFERRABLE INITIALLY DEFERRED",
+                f"CREATE INDEX ON {partitioned} ({_quote(field.column)})",
+            ]
+    statements += [
+        f"DROP TABLE {table}",
+        f"ALTER TABLE {partitioned} RENAME TO {table}",
+    ]
+    with transaction.atomic(), connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    return True
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time()))
+
+
+def _month_start(day):
+    return _day_start(day.replace(day=1))
+
+
+def _create_partitions(trip_ids, months):
+    """
+    Create the archived tickets partitions of the departure months of
+    ``trip_ids`` missing from ``months``, in the default time zone
+    """
+    table = ArchivedTicket._meta.db_table
+    with connection.cursor() as cursor:
+        for month in Trip.objects.filter(id__in=trip_ids).dates(
+            "departure_time", "month"
+        ):
+            if month in months:
+                continue
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS "
+                f"{_quote(f'{table}_{month:%Y_%m}')} "
+                f"PARTITION OF {_quote(table)} FOR VALUES FROM (%s) TO (%s)",
+                [
+                    _month_start(month),
+                    _month_start(month + timedelta(days=31)),
+                ],
+            )
+            months.add(month)
+
+
+def _copy_rows(model, fields, queryset) -> int:
+    """Insert the ``fields`` lookups of ``queryset`` rows into ``model``"""
+    opts = model._meta
+    sql, params = queryset.order_by().values_list(
+        *fields.values()
+    ).query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO %s (%s) %s" % (
+                _quote(opts.db_table),
+                ", ".join(
+                    _quote(opts.get_field(name).column) for name in fields
+                ),
+                sql,
+            ),
+            params,
+        )
+        return cursor.rowcount
+
+
+def _archive_chunk(trip_ids) -> int:
+    _copy_rows(
+        ArchivedTrip,
+        ARCHIVED_TRIP_FIELDS,
+        Trip.objects.filter(id__in=trip_ids),
+    )
+    _copy_rows(
+        ArchivedTrip.crew.through,
+        ARCHIVED_CREW_FIELDS,
+        Trip.crew.through.objects.filter(trip_id__in=trip_ids),
+    )
+    tickets = _copy_rows(
+        ArchivedTicket,
+        ARCHIVED_TICKET_FIELDS,
+        Ticket.objects.filter(trip_id__in=trip_ids),
+    )
+
+    SeatHold.objects.filter(trip_id__in=trip_ids).delete()
+    # only finished requests, trips with open ones are not archived
+    OrderRequest.objects.filter(trip_id__in=trip_ids).delete()
+    delete_rows(Ticket, "trip", trip_ids)
+    delete_rows(Trip.crew.through, "trip", trip_ids)
+    delete_rows(Trip, "id", trip_ids)
+    return tickets
+
+
+def archive_trips(before, chunk_size=ARCHIVE_CHUNK_SIZE,
+                  progress=None) -> tuple[int, int]:
+    """
+    Move the trips that arrived before ``before`` (and before today in the
+    default time zone) to the archive, ``chunk_size`` trips per
+    transaction. ``progress`` is called with the running totals after
+    every chunk. Return the numbers of trips and tickets archived.
+    """
+    before = min(before, _day_start(timezone.localdate()))
+    partitioned = _is_partitioned(ArchivedTicket)
+    months = set()
+    trips = tickets = 0
+    open_requests = OrderRequest.objects.filter(
+        trip=OuterRef("pk"),
+        status__in=[
+            OrderRequest.Status.PENDING, OrderRequest.Status.PROCESSING
+        ],
+    )
+    while True:
+        with transaction.atomic():
+            completed = Trip.objects.filter(
+                ~Exists(open_requests),
+                departure_time__lt=before,
+                arrival_time__lt=before,
+            ).order_by("departure_time")
+            # skip trips being booked, a later run archives them
+            if connection.features.has_select_for_update_skip_locked:
+                completed = completed.select_for_update(skip_locked=True)
+            trip_ids = list(
+                completed.values_list("id", flat=True)[:chunk_size]
+            )
+            if not trip_ids:
+                break
+            if partitioned:
+                _create_partitions(trip_ids, months)
+            tickets += _archive_chunk(trip_ids)
+            trips += len(trip_ids)
+            transaction.on_commit(
+                partial(bump_versions, "trip", "ticket", "seathold")
+            )
+        if progress:
+            progress(trips, tickets)
+    return trips, tickets
@@ -0,0 +1,151 @@
+"""
+In-memory autocomplete index over station names.
+
+Names are folded (diacritics stripped, case folded, punctuation turned
+into single spaces) and kept in sorted arrays searched with ``bisect``:
+one of whole names and one of names from each later word on. Prefix
+matches on the whole name rank first, then matches on a later word.
+Optionally, names sharing enough trigrams with the query fill the
+remaining places, to survive typos.
+"""
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+
+from train_station.models import Station
+from train_station.versions import ProcessIndex
+
+
+WORD = re.compile(r"\w+")
+FUZZY_MIN_SIMILARITY = 0.3
+
+
+def fold(text) -> str:
+    """Lower case words without diacritics, separated by single spaces"""
+    return " ".join(WORD.findall("".join(
+        char
+        for char in unicodedata.normalize("NFKD", text)
+        if not unicodedata.combining(char)
+    ).casefold()))
+
+
+def trigrams(folded) -> set[str]:
+    padded = f"  {folded} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+class StationNameIndex:
+    def __init__(self):
+        self.names = {}
+        # sorted (folded text, station id) pairs; words holds the name
+        # from each of its words but the first onwards
+        self.full_names = []
+        self.words = []
+        self.trigrams = {}
+        self.trigram_counts = {}
+
+    @classmethod
+    def load(cls):
+        index = cls()
+        for station_id, name in Station.objects.order_by().values_list(
+            "id", "name"
+        ):
+            index._add(
+                station_id,
+                name,
+                index.full_names.append,
+                index.words.append,
+            )
+        index.full_names.sort()
+        index.words.sort()
+        return index
+
+    @staticmethod
+    def _keys(station_id, name):
+        folded = fold(name)
+        words = [
+            (folded[match.start():], station_id)
+            for match in WORD.finditer(folded)
+            if match.start() > 0
+        ]
+        return folded, (folded, station_id), words
+
+    def _add(self, station_id, name, add_name, add_word):
+        folded, full_name, words = self._keys(station_id, name)
+        self.names[station_id] = name
+        add_name(full_name)
+        for word in words:
+            add_word(word)
+        name_trigrams = trigrams(folded)
+        self.trigram_counts[station_id] = len(name_trigrams)
+        for trigram in name_trigrams:
+            self.trigrams.setdefault(trigram, set()).add(station_id)
+
+    def set_station(self, station_id, name):
+        self.remove_station(station_id)
+        self._add(
+            station_id,
+            name,
+            lambda key: insort(self.full_names, key),
+            lambda key: insort(self.words, key),
+        )
+
+    def remove_station(self, station_id):
+        name = self.names.pop(station_id, None)
+        if name is None:
+            return
+        folded, full_name, words = self._keys(station_id, name)
+        for keys, key in [(self.full_names, full_name)] + [
+            (self.words, word) for word in words
+        ]:
+            del keys[bisect_left(keys, key)]
+        del self.trigram_counts[station_id]
+        for trigram in trigrams(folded):
+            self.trigrams[trigram].discard(station_id)
+
+    @staticmethod
+    def _prefixed(keys, prefix, limit, found):
+        position = bisect_left(keys, (prefix,))
+        while len(found) < limit and position < len(keys):
+            folded, station_id = keys[position]
+            if not folded.startswith(prefix):
+                return
+            found.setdefault(station_id)
+            position += 1
+
+    def _similar(self, folded, limit, found):
+        query = trigrams(folded)
+        shared = Counter()
+        for trigram in query:
+            shared.update(self.trigrams.get(trigram, ()))
+        scored = []
+        for station_id, count in shared.items():
+            similarity = count / (
+                len(query) + self.trigram_counts[station_id] - count
+            )
+            if similarity >= FUZZY_MIN_SIMILARITY and station_id not in found:
+                scored.append(
+                    (-similarity, self.names[station_id], station_id)
+                )
+        for _, _, station_id in sorted(scored)[:limit - len(found)]:
+            found[station_id] = None
+
+    def search(self, query, limit=10, fuzzy=False) -> list[int]:
+        """Ids of stations matching ``query``, best matches first"""
+        folded = fold(query)
+        if not folded:
+            return []
+        found = {}
+        self._prefixed(self.full_names, folded, limit, found)
+        self._prefixed(self.words, folded, limit, found)
+        if fuzzy and len(found) < limit:
+            self._similar(folded, limit, found)
+        return list(found)
+
+
+station_names = ProcessIndex(StationNameIndex.load, ("station",))
+
+
+def get_station_names() -> StationNameIndex:
+    return station_names.get()
@@ -0,0 +1,340 @@
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+from functools import partial, reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import Q
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from train_station.allocation import SeatAllocator
+from train_station.models import HeldSeat, Order, SeatHold, Ticket, Trip
+from train_station.seat_map import (
+    get_seat_map,
+    invalidate_seat_map,
+    mark_seats_taken,
+)
+from train_station.versions import bump_object_versions, bump_versions
+
+
+SEAT_ALLOCATION_ATTEMPTS = 3
+# object stamp of the sold and held seats of a trip
+TRIP_AVAILABILITY = "trip_availability"
+
+
+class SeatsTaken(Exception):
+    """Some of the requested seats are already sold or held"""
+
+    def __init__(self, seats):
+        self.seats = sorted(seats)
+        super().__init__(f"Seats already taken: {format_seats(self.seats)}")
+
+
+def _trip_id(trip) -> int:
+    return getattr(trip, "pk", trip)
+
+
+def _hold_ttl() -> timedelta:
+    return getattr(settings, "SEAT_HOLD_TTL", timedelta(minutes=10))
+
+
+# serialization_failure, deadlock_detected
+RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+
+def is_retryable(error) -> bool:
+    """Whether ``error`` is a deadlock or serialization failure"""
+    cause = error.__cause__
+    sqlstate = (
+        getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)
+    )
+    if sqlstate is not None:
+        return sqlstate in RETRYABLE_SQLSTATES
+    # SQLite reports lock contention only in the message
+    return "database is locked" in str(error)
+
+
+def _violates(error, model, constraint) -> bool:
+    """Whether ``error`` is a violation of the unique ``constraint``"""
+    cause = error.__cause__
+    diag = getattr(cause, "diag", None)
+    if diag is not None:
+        return diag.constraint_name == constraint
+    # SQLite names the table and columns instead of the constraint
+    columns = next(
+        [model._meta.get_field(field).column for field in item.fields]
+        for item in model._meta.constraints
+        if item.name == constraint
+    )
+    return str(error) == "UNIQUE constraint failed: " + ", ".join(
+        f"{model._meta.db_table}.{column}" for column in columns
+    )
+
+
+def run_with_retry(func, *args, **kwargs):
+    """
+    Run ``func`` in its own transaction, retrying it up to
+    ``BOOKING_MAX_RETRIES`` times when the database reports a deadlock or
+    a serialization failure. Other errors can never succeed on retry and
+    are raised at once. Inside an outer transaction ``func`` runs once, as
+    a failed transaction can only be retried as a whole.
+    """
+    attempts = getattr(settings, "BOOKING_MAX_RETRIES", 3)
+    if transaction.get_connection().in_atomic_block:
+        attempts = 1
+    for attempt in range(1, attempts + 1):
+        try:
+            with transaction.atomic():
+                return func(*args, **kwargs)
+        except OperationalError as error:
+            if attempt == attempts or not is_retryable(error):
+                raise
+            time.sleep(random.uniform(0, 0.01 * attempt))
+
+
+def lock_trips(trip_ids):
+    """
+    Lock trip rows in primary key order for the rest of the transaction,
+    so concurrent bookings of one trip run their seat checks one by one.
+    """
+    list(
+        Trip.objects.select_for_update()
+        .filter(pk__in=trip_ids)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def seat_conflicts(seats, exclude_hold=None) -> list[tuple[int, int, int]]:
+    """
+    Return the (trip, cargo, seat) triples that are already sold or held
+    by an active hold other than ``exclude_hold``, in a single query.
+    """
+    seats = list(seats)
+    if not seats:
+        return []
+    query = reduce(or_, (
+        Q(trip_id=trip_id, cargo=cargo, seat=seat)
+        for trip_id, cargo, seat in seats
+    ))
+    held_seats = HeldSeat.objects.filter(query, hold__expires_at__gt=Now())
+    if exclude_hold is not None:
+        held_seats = held_seats.exclude(hold=exclude_hold)
+    return sorted(set(
+        Ticket.objects.filter(query)
+        .order_by()
+        .values_list("trip_id", "cargo", "seat")
+        .union(
+            held_seats.order_by().values_list("trip_id", "cargo", "seat")
+        )
+    ))
+
+
+def format_seats(seats) -> str:
+    return ", ".join(
+        f"trip {trip_id} (cargo: {cargo}, seat: {seat})"
+        for trip_id, cargo, seat in sorted(seats)
+    )
+
+
+def _validate_seats(seats, trips, error_to_raise, field="tickets"):
+    for trip_id, cargo, seat in seats:
+        if trip_id not in trips:
+            raise error_to_raise(
+                {"trip": f'Invalid pk "{trip_id}" - object does not exist.'}
+            )
+        Ticket.validate_ticket(
+            cargo, seat, trips[trip_id].train, error_to_raise
+        )
+
+    repeated = [seat for seat, count in Counter(seats).items() if count > 1]
+    if repeated:
+        raise error_to_raise(
+            {field: f"Seats repeated: {format_seats(repeated)}"}
+        )
+
+
+def book_tickets(
+    order, tickets_data, error_to_raise, hold=None
+) -> list[Ticket]:
+    """
+    Create all tickets of an order with a constant number of queries:
+    one to load trips with their trains (skipped for ``Trip`` instances),
+    one to lock the trips, one to look for taken seats and one bulk
+    insert. Errors are raised with ``error_to_raise`` using the messages of
+    ``Ticket.validate_ticket``. Seats of ``hold`` are not treated as taken,
+    the others raise ``SeatsTaken``.
+    """
+    seats = [
+        (_trip_id(ticket["trip"]), ticket["cargo"], ticket["seat"])
+        for ticket in tickets_data
+    ]
+    trips = {
+        ticket["trip"].pk: ticket["trip"]
+        for ticket in tickets_data
+        if isinstance(ticket["trip"], Trip)
+    }
+    missing_trip_ids = {trip_id for trip_id, _, _ in seats} - trips.keys()
+    if missing_trip_ids:
+        trips.update(
+            Trip.objects.select_related("train").in_bulk(missing_trip_ids)
+        )
+
+    _validate_seats(seats, trips, error_to_raise)
+
+    try:
+        with transaction.atomic():
+            lock_trips(trips)
+
+            taken = seat_conflicts(seats, exclude_hold=hold)
+            if taken:
+                raise SeatsTaken(taken)
+
+            tickets = Ticket.objects.bulk_create([
+                Ticket(
+                    order=order, trip=trips[trip_id], cargo=cargo, seat=seat
+                )
+                for trip_id, cargo, seat in seats
+            ])
+    except IntegrityError as error:
+        if not _violates(error, Ticket, "unique ticket"):
+            raise
+        raise SeatsTaken(seat_conflicts(seats, exclude_hold=hold) or seats)
+
+    seats_by_trip = {}
+    for trip_id, cargo, seat in seats:
+        seats_by_trip.setdefault(trip_id, []).append((cargo, seat))
+    for trip_id, trip_seats in seats_by_trip.items():
+        transaction.on_commit(partial(mark_seats_taken, trip_id, trip_seats))
+    # bulk_create sends no post_save
+    transaction.on_commit(partial(bump_versions, "ticket"))
+    transaction.on_commit(
+        partial(bump_object_versions, TRIP_AVAILABILITY, *seats_by_trip)
+    )
+
+    return tickets
+
+
+def hold_seats(customer, trip, seats_data, error_to_raise) -> SeatHold:
+    """
+    Reserve seats of ``trip`` for ``customer`` for ``SEAT_HOLD_TTL``.
+    Expired holds of the trip are dropped first, so their seats can be
+    held again before the sweep command gets to them. Seats sold or held
+    by somebody else raise ``SeatsTaken``.
+    """
+    seats = [
+        (trip.pk, seat_data["cargo"], seat_data["seat"])
+        for seat_data in seats_data
+    ]
+    _validate_seats(seats, {trip.pk: trip}, error_to_raise, field="seats")
+
+    try:
+        with transaction.atomic():
+            lock_trips([trip.pk])
+            SeatHold.objects.filter(trip=trip).expired().delete()
+
+            taken = seat_conflicts(seats)
+            if taken:
+                raise SeatsTaken(taken)
+
+            hold = SeatHold.objects.create(
+                customer=customer,
+                trip=trip,
+                expires_at=timezone.now() + _hold_ttl()
+            )
+            HeldSeat.objects.bulk_create([
+                HeldSeat(hold=hold, trip=trip, cargo=cargo, seat=seat)
+                for _, cargo, seat in seats
+            ])
+    except IntegrityError as error:
+        if not _violates(error, HeldSeat, "unique held seat"):
+            raise
+        raise SeatsTaken(seat_conflicts(seats) or seats)
+    transaction.on_commit(
+        partial(bump_object_versions, TRIP_AVAILABILITY, trip.pk)
+    )
+    return hold
+
+
+def confirm_hold(hold, error_to_raise) -> Order:
+    """Turn an active hold into an order with tickets for its seats"""
+    with transaction.atomic():
+        if hold.expires_at <= timezone.now():
+            raise error_to_raise({"hold": "Seat hold has expired"})
+
+        order = Order.objects.create(customer=hold.customer)
+        book_tickets(
+            order,
+            [
+                {"trip": hold.trip, "cargo": seat.cargo, "seat": seat.seat}
+                for seat in hold.seats.all()
+            ],
+            error_to_raise,
+            hold=hold
+        )
+        hold.delete()
+    return order
+
+
+def _place_order(customer, tickets_data, error_to_raise) -> Order:
+    order = Order.objects.create(customer=customer)
+    book_tickets(order, tickets_data, error_to_raise)
+    return order
+
+
+def allocate_order(
+    customer, trip, seats_count, error_to_raise, together=True
+) -> Order:
+    """
+    Book ``seats_count`` seats of ``trip`` chosen by the server, together
+    in one cargo if possible. Seats are picked from the cached seat map and
+    active holds; if the map turns out to be stale the conflicting seats
+    are excluded and allocation is retried, at most
+    ``SEAT_ALLOCATION_ATTEMPTS`` times before ``SeatsTaken`` is raised.
+    """
+    taken = set(
+        HeldSeat.objects.filter(trip=trip, hold__expires_at__gt=Now())
+        .values_list("cargo", "seat")
+    )
+    for attempt in range(1, SEAT_ALLOCATION_ATTEMPTS + 1):
+        seats = SeatAllocator(get_seat_map(trip), taken).allocate(
+            seats_count, together=together
+        )
+        if seats is None:
+            raise error_to_raise(
+                {"seats_count": "Not enough free seats on this trip"}
+            )
+        try:
+            return run_with_retry(
+                _place_order,
+                customer,
+                [
+                    {"trip": trip, "cargo": cargo, "seat": seat}
+                    for cargo, seat in seats
+                ],
+                error_to_raise
+            )
+        except SeatsTaken as error:
+            invalidate_seat_map(trip.id)
+            if attempt == SEAT_ALLOCATION_ATTEMPTS:
+                raise
+            taken.update((cargo, seat) for _, cargo, seat in error.seats)
+
+
+def release_expired_holds(batch_size=1000) -> int:
+    """Delete expired holds in small batches, return how many were removed"""
+    released = 0
+    while True:
+        hold_ids = list(
+            SeatHold.objects.expired()
+            .order_by("expires_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not hold_ids:
+            return released
+        SeatHold.objects.filter(id__in=hold_ids).delete()
+        released += len(hold_ids)
@@ -0,0 +1,99 @@
+"""
+Bulk writes of plain value rows for imports and generators of many rows.
+
+``bulk_create()`` builds a model instance per row and prepares every value
+through its field, which dominates the time of inserting hundreds of
+thousands of rows. These helpers send batched multi-row statements built
+with ``connection.ops``, so they stay portable across backends.
+"""
+from django.db import connection
+from django.db.models.constants import OnConflict
+
+
+def batches(items, batch_size):
+    for start in range(0, len(items), batch_size):
+        yield items[start:start + batch_size]
+
+
+def insert_rows(model, fields, rows, unique_fields=(), update_fields=(),
+                ignore_conflicts=False, returning=None):
+    """
+    ``bulk_create()`` of value tuples, without model instances and per
+    value field preparation, updating rows that conflict on
+    ``unique_fields``, or skipping them with ``ignore_conflicts``. Return
+    the primary keys in row order, which ``bulk_create`` relies on as
+    well, or the ``returning`` field values of every inserted row.
+    """
+    ops = connection.ops
+    opts = model._meta
+    fields = [opts.get_field(name) for name in fields]
+    adapters = [
+        ops.adapt_datetimefield_value
+        if field.get_internal_type() == "DateTimeField" else None
+        for field in fields
+    ]
+    insert = "INSERT INTO %s (%s) VALUES " % (
+        ops.quote_name(opts.db_table),
+        ", ".join(ops.quote_name(field.column) for field in fields),
+    )
+    returned = [
+        opts.get_field(name).get_col(opts.db_table)
+        for name in (returning or [opts.pk.name])
+    ]
+    converters = [
+        ops.get_db_converters(col) + col.field.get_db_converters(connection)
+        for col in returned
+    ]
+    suffix = " RETURNING %s" % ", ".join(
+        ops.quote_name(col.target.column) for col in returned
+    )
+    if ignore_conflicts:
+        suffix = " ON CONFLICT (%s) DO NOTHING" % ", ".join(
+            ops.quote_name(opts.get_field(name).column)
+            for name in unique_fields
+        ) + suffix
+    elif unique_fields:
+        suffix = " " + ops.on_conflict_suffix_sql(
+            fields,
+            OnConflict.UPDATE,
+            [opts.get_field(name).column for name in update_fields],
+            [opts.get_field(name).column for name in unique_fields],
+        ) + suffix
+    placeholder = "(%s)" % ", ".join(["%s"] * len(fields))
+
+    inserted = []
+    with connection.cursor() as cursor:
+        for batch in batches(rows, ops.bulk_batch_size(fields, rows)):
+            cursor.execute(
+                insert + ", ".join([placeholder] * len(batch)) + suffix,
+                [
+                    value if adapt is None else adapt(value)
+                    for row in batch
+                    for value, adapt in zip(row, adapters)
+                ],
+            )
+            for row in cursor.fetchall():
+                values = []
+                for value, col, col_converters in zip(
+                    row, returned, converters
+                ):
+                    for converter in col_converters:
+                        value = converter(value, col, connection)
+                    values.append(value)
+                inserted.append(tuple(values) if returning else values[0])
+    return inserted
+
+
+def delete_rows(model, field, values):
+    """Delete rows whose ``field`` is in ``values`` with plain SQL"""
+    ops = connection.ops
+    delete = "DELETE FROM %s WHERE %s IN " % (
+        ops.quote_name(model._meta.db_table),
+        ops.quote_name(model._meta.get_field(field).column),
+    )
+    batch_size = connection.features.max_query_params or len(values)
+    with connection.cursor() as cursor:
+        for batch in batches(values, batch_size):
+            cursor.execute(
+                delete + "(%s)" % ", ".join(["%s"] * len(batch)), batch
+            )
@@ -0,0 +1,185 @@
+"""
+Station-to-station network distances derived from ``Route.distance``.
+
+Stations are split into the weakly connected components of the route
+graph; distances only exist inside a component. Each component keys its
+stations by a dense index and memoizes one row of distances per source
+station as a ``float32`` NumPy array (``inf`` for unreachable stations),
+computed on first lookup or all at once by ``rebuild_distance_matrix``,
+which also persists them to ``DISTANCE_MATRIX_PATH`` for fast startup.
+
+A component is identified by a fingerprint of its stations and routes, so
+a route change only drops the rows of the components it touches.
+"""
+import hashlib
+import math
+
+import numpy as np
+from django.conf import settings
+
+from train_station.station_graph import GRAPH_MODELS, get_station_graph
+from train_station.versions import ProcessIndex
+
+
+def _matrix_path():
+    return getattr(
+        settings,
+        "DISTANCE_MATRIX_PATH",
+        settings.BASE_DIR / "distance_matrix.npz",
+    )
+
+
+class Component:
+    def __init__(self, fingerprint, stations, rows=None):
+        self.fingerprint = fingerprint
+        self.stations = np.asarray(stations, dtype=np.int64)
+        # position of the source station -> distances to every station
+        self.rows = rows if rows is not None else {}
+
+    def __len__(self):
+        return len(self.stations)
+
+    def position(self, station_id) -> int:
+        return int(np.searchsorted(self.stations, station_id))
+
+    def row(self, graph, position):
+        row = self.rows.get(position)
+        if row is None:
+            distances = graph.distances_from(int(self.stations[position]))
+            row = np.array(
+                [
+                    distances.get(station_id, math.inf)
+                    for station_id in self.stations.tolist()
+                ],
+                dtype=np.float32,
+            )
+            self.rows[position] = row
+        return row
+
+    @property
+    def complete(self) -> bool:
+        return len(self.rows) == len(self.stations)
+
+
+class DistanceMatrix:
+    def __init__(self, graph, components=None):
+        self.components = []
+        self.component_of = {}
+        self._split(graph, components or {})
+
+    @classmethod
+    def load(cls, path=None):
+        """Build from the station graph, reusing persisted rows if any"""
+        try:
+            components = cls.read(path or _matrix_path())
+        except (OSError, ValueError, KeyError):
+            components = {}
+        return cls(get_station_graph(), components)
+
+    def _split(self, graph, previous):
+        """Group stations into components, keeping rows of unchanged ones"""
+        parents = {station_id: station_id for station_id in graph.names}
+
+        def find(station_id):
+            while parents[station_id] != station_id:
+                parents[station_id] = parents[parents[station_id]]
+                station_id = parents[station_id]
+            return station_id
+
+        edges = []
+        for source_id, destinations in graph.edges.items():
+            for destination_id, (distance, _) in destinations.items():
+                if source_id in parents and destination_id in parents:
+                    edges.append((source_id, destination_id, distance))
+                    parents[find(source_id)] = find(destination_id)
+
+        members, component_edges = {}, {}
+        for station_id in parents:
+            members.setdefault(find(station_id), []).append(station_id)
+        for edge in edges:
+            component_edges.setdefault(find(edge[0]), []).append(edge)
+
+        components, component_of = [], {}
+        for root, stations in members.items():
+            stations.sort()
+            fingerprint = hashlib.blake2b(
+                repr((stations, sorted(component_edges.get(root, ()))))
+                .encode(),
+                digest_size=16,
+            ).hexdigest()
+            component = previous.get(fingerprint) or Component(
+                fingerprint, stations
+            )
+            components.append(component)
+            for station_id in stations:
+                component_of[station_id] = component
+        self.components, self.component_of = components, component_of
+
+    def refresh(self):
+        """Regroup after a station or route change"""
+        self._split(
+            get_station_graph(),
+            {
+                component.fingerprint: component
+                for component in self.components
+            },
+        )
+
+    def distance(self, source_id, destination_id):
+        """Network distance between two stations, None if unreachable"""
+        component = self.component_of.get(source_id)
+        if component is None or self.component_of.get(
+            destination_id
+        ) is not component:
+            return None
+        distance = component.row(
+            get_station_graph(), component.position(source_id)
+        )[component.position(destination_id)]
+        return None if math.isinf(distance) else int(distance)
+
+    def compute_all(self):
+        graph = get_station_graph()
+        for component in self.components:
+            for position in range(len(component)):
+                component.row(graph, position)
+
+    def save(self, path=None):
+        arrays = {}
+        for number, component in enumerate(self.components):
+            positions = sorted(component.rows)
+            arrays[f"fingerprint_{number}"] = np.array(component.fingerprint)
+            arrays[f"stations_{number}"] = component.stations
+            arrays[f"positions_{number}"] = np.array(
+                positions, dtype=np.int64
+            )
+            arrays[f"rows_{number}"] = np.array(
+                [component.rows[position] for position in positions],
+                dtype=np.float32,
+            ).reshape(len(positions), len(component))
+        with open(path or _matrix_path(), "wb") as matrix_file:
+            np.savez_compressed(matrix_file, **arrays)
+
+    @staticmethod
+    def read(path) -> dict:
+        components = {}
+        with np.load(path) as arrays:
+            number = 0
+            while f"fingerprint_{number}" in arrays:
+                fingerprint = str(arrays[f"fingerprint_{number}"])
+                components[fingerprint] = Component(
+                    fingerprint,
+                    arrays[f"stations_{number}"],
+                    dict(zip(
+                        arrays[f"positions_{number}"].tolist(),
+                        arrays[f"rows_{number}"],
+                    )),
+                )
+                number += 1
+        return components
+
+
+distance_matrix = ProcessIndex(DistanceMatrix.load, GRAPH_MODELS)
+
+
+def get_distance_matrix() -> DistanceMatrix:
+    return distance_matrix.get()
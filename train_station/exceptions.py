@@ -0,0 +1,18 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class SeatConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Seats already taken."
+    default_code = "seat_conflict"
+
+    def __init__(self, seats, detail=None):
+        super().__init__(detail)
+        self.detail = {
+            "detail": self.detail,
+            "seats": [
+                {"trip": trip_id, "cargo": cargo, "seat": seat}
+                for trip_id, cargo, seat in seats
+            ],
+        }
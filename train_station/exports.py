@@ -0,0 +1,127 @@
+"""
+Full-table exports of trips, orders and tickets as NDJSON or CSV.
+
+Rows are read with ``values_list().iterator(chunk_size=...)``, a server
+side cursor on PostgreSQL, and encoded a chunk at a time, so memory stays
+flat however many rows are exported. Datetimes are exported in UTC.
+"""
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal
+
+import orjson
+
+from train_station.models import Order, Ticket, Trip
+
+
+NDJSON = "ndjson"
+CSV = "csv"
+OUTPUTS = {NDJSON: "application/x-ndjson", CSV: "text/csv"}
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORTS = {
+    "trips": (
+        Trip,
+        {
+            "id": "id",
+            "route": "route_id",
+            "source_station": "route__source_station__name",
+            "destination_station": "route__destination_station__name",
+            "train": "train__name",
+            "departure_time": "departure_time",
+            "arrival_time": "arrival_time",
+        },
+    ),
+    "orders": (
+        Order,
+        {
+            "id": "id",
+            "customer": "customer__email",
+            "created_at": "created_at",
+        },
+    ),
+    "tickets": (
+        Ticket,
+        {
+            "id": "id",
+            "order": "order_id",
+            "customer": "order__customer__email",
+            "ordered_at": "order__created_at",
+            "trip": "trip_id",
+            "departure_time": "trip__departure_time",
+            "cargo": "cargo",
+            "seat": "seat",
+        },
+    ),
+}
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError
+
+
+def export_rows(name, chunk_size=EXPORT_CHUNK_SIZE):
+    """Column names and an iterator over the rows of export ``name``"""
+    model, columns = EXPORTS[name]
+    rows = (
+        model.objects.order_by("pk")
+        .values_list(*columns.values())
+        .iterator(chunk_size=chunk_size)
+    )
+    return list(columns), rows
+
+
+def _chunks(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def ndjson_lines(columns, rows, chunk_size=EXPORT_CHUNK_SIZE):
+    option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_APPEND_NEWLINE
+    for chunk in _chunks(rows, chunk_size):
+        yield b"".join(
+            orjson.dumps(dict(zip(columns, row)), default=_value,
+                         option=option)
+            for row in chunk
+        )
+
+
+def csv_lines(columns, rows, chunk_size=EXPORT_CHUNK_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in _chunks(rows, chunk_size):
+        writer.writerows(
+            [
+                value if value is None or isinstance(value, (int, str))
+                else _value(value)
+                for value in row
+            ]
+            for row in chunk
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def export(name, output=NDJSON, chunk_size=EXPORT_CHUNK_SIZE):
+    """Encoded chunks of export ``name`` in ``output`` format"""
+    columns, rows = export_rows(name, chunk_size)
+    lines = ndjson_lines if output == NDJSON else csv_lines
+    return lines(columns, rows, chunk_size)
@@ -0,0 +1,73 @@
+"""
+Read-only serializers building list payloads from ``values()`` rows
+instead of model instances and DRF fields, for hot list endpoints.
+Each renders exactly what its ``ModelSerializer`` counterpart does.
+"""
+from django.db.models import F
+from django.utils import timezone
+
+from train_station.models import Trip
+
+
+def _datetime(value) -> str:
+    """``serializers.DateTimeField().to_representation`` for aware values"""
+    value = value.astimezone(timezone.get_current_timezone()).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+class TripListFastSerializer:
+    """
+    ``TripListSerializer`` output for rows of ``values(queryset)``, where
+    ``queryset`` is annotated ``with_tickets_available()``. Crew names of
+    the whole page are loaded with one query.
+    """
+
+    def __init__(self, instance=None, many=True, **kwargs):
+        self.instance = instance
+
+    @staticmethod
+    def values(queryset):
+        return queryset.select_related(None).prefetch_related(None).values(
+            "id",
+            "tickets_available",
+            "departure_time",
+            "arrival_time",
+            "schedule",
+            train_name=F("train__name"),
+            source_station_name=F("route__source_station__name"),
+            destination_station_name=F("route__destination_station__name"),
+        )
+
+    @staticmethod
+    def crew_names(trip_ids) -> dict:
+        crew = {}
+        if not trip_ids:
+            return crew
+        for trip_id, first_name, last_name in (
+            Trip.crew.through.objects.filter(trip_id__in=trip_ids)
+            .order_by("crew__last_name", "crew_id")
+            .values_list("trip_id", "crew__first_name", "crew__last_name")
+        ):
+            crew.setdefault(trip_id, []).append(f"{first_name} {last_name}")
+        return crew
+
+    @property
+    def data(self) -> list[dict]:
+        rows = list(self.instance)
+        crew = self.crew_names([row["id"] for row in rows])
+        return [
+            {
+                "id": row["id"],
+                "tickets_available": row["tickets_available"],
+                "train": row["train_name"],
+                "route": f"{row['source_station_name']} - "
+                         f"{row['destination_station_name']}",
+                "crew": crew.get(row["id"], []),
+                "departure_time": _datetime(row["departure_time"]),
+                "arrival_time": _datetime(row["arrival_time"]),
+                "schedule": row["schedule"],
+            }
+            for row in rows
+        ]
@@ -0,0 +1,222 @@
+"""
+GTFS feed of stations, routes and trips for journey planners.
+
+Every station is a stop, every route a GTFS route and every trip a GTFS
+trip with two stop times, running on the service day of its departure in
+the agency time zone. Members are written to the zip as CSV straight from
+``values_list().iterator()``, so no queryset is materialized.
+
+The zip comment records the change stamps of the tables every member was
+built from. A later export copies the members whose stamps are unchanged
+from the previous zip and only queries the database for the others.
+Stamps are read before the queries, so a change made during an export is
+picked up by the next one.
+"""
+import csv
+import io
+import json
+import os
+import shutil
+import zipfile
+
+from django.conf import settings
+from django.utils import timezone
+
+from train_station.exports import EXPORT_CHUNK_SIZE
+from train_station.models import Route, Station, Trip
+from train_station.timetable_import import service_day_start
+from train_station.versions import get_versions
+
+
+RAIL_ROUTE_TYPE = 2
+
+
+def _feed_path():
+    return getattr(
+        settings, "GTFS_FEED_PATH", settings.BASE_DIR / "gtfs.zip"
+    )
+
+
+def _agency() -> dict:
+    return getattr(settings, "GTFS_AGENCY", {
+        "agency_id": "TS",
+        "agency_name": "Train Station",
+        "agency_url": "https://example.com",
+    })
+
+
+def _gtfs_time(seconds) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def _service_id(day) -> str:
+    return day.strftime("%Y%m%d")
+
+
+def agency_rows(zone, chunk_size):
+    agency = _agency()
+    yield [*agency, "agency_timezone"]
+    yield [*agency.values(), str(zone)]
+
+
+def stop_rows(zone, chunk_size):
+    yield ["stop_id", "stop_name", "stop_lat", "stop_lon", "location_type"]
+    for row in Station.objects.order_by("pk").values_list(
+        "id", "name", "latitude", "longitude"
+    ).iterator(chunk_size=chunk_size):
+        yield [*row, 0]
+
+
+def route_rows(zone, chunk_size):
+    agency_id = _agency()["agency_id"]
+    yield ["route_id", "agency_id", "route_long_name", "route_type"]
+    for route_id, source, destination in Route.objects.order_by(
+        "pk"
+    ).values_list(
+        "id", "source_station__name", "destination_station__name"
+    ).iterator(chunk_size=chunk_size):
+        yield [
+            route_id, agency_id, f"{source} - {destination}",
+            RAIL_ROUTE_TYPE,
+        ]
+
+
+def trip_rows(zone, chunk_size):
+    yield ["route_id", "service_id", "trip_id", "trip_short_name"]
+    for trip_id, route_id, train, departure_time in Trip.objects.order_by(
+        "pk"
+    ).values_list(
+        "id", "route_id", "train__name", "departure_time"
+    ).iterator(chunk_size=chunk_size):
+        day = departure_time.astimezone(zone).date()
+        yield [route_id, _service_id(day), trip_id, train]
+
+
+def stop_time_rows(zone, chunk_size):
+    """The departure from the source and the arrival at the destination"""
+    yield [
+        "trip_id", "arrival_time", "departure_time", "stop_id",
+        "stop_sequence", "shape_dist_traveled",
+    ]
+    for (
+        trip_id, departure_time, arrival_time, source_id, destination_id,
+        distance,
+    ) in Trip.objects.order_by("pk").values_list(
+        "id",
+        "departure_time",
+        "arrival_time",
+        "route__source_station_id",
+        "route__destination_station_id",
+        "route__distance",
+    ).iterator(chunk_size=chunk_size):
+        start = service_day_start(
+            departure_time.astimezone(zone).date(), zone
+        )
+        departure = _gtfs_time((departure_time - start).total_seconds())
+        arrival = _gtfs_time((arrival_time - start).total_seconds())
+        yield [trip_id, departure, departure, source_id, 1, 0]
+        yield [trip_id, arrival, arrival, destination_id, 2, distance]
+
+
+def calendar_date_rows(zone, chunk_size):
+    yield ["service_id", "date", "exception_type"]
+    for day in Trip.objects.datetimes(
+        "departure_time", "day", tzinfo=zone
+    ).iterator(chunk_size=chunk_size):
+        yield [_service_id(day), _service_id(day), 1]
+
+
+# member: (models it is built from, rows)
+GTFS_MEMBERS = {
+    "agency.txt": ((), agency_rows),
+    "stops.txt": (("station",), stop_rows),
+    "routes.txt": (("route", "station"), route_rows),
+    "trips.txt": (("trip", "train"), trip_rows),
+    "stop_times.txt": (("trip", "route"), stop_time_rows),
+    "calendar_dates.txt": (("trip",), calendar_date_rows),
+}
+
+
+def _stamps(zone) -> dict:
+    versions = get_versions(*{
+        model for models, _ in GTFS_MEMBERS.values() for model in models
+    })
+    return {
+        name: {
+            "zone": str(zone),
+            "agency": _agency(),
+            **{model: versions[model][0] for model in models},
+        }
+        for name, (models, _) in GTFS_MEMBERS.items()
+    }
+
+
+def _previous_stamps(archive) -> dict:
+    try:
+        stamps = json.loads(archive.comment)
+    except ValueError:
+        return {}
+    return stamps if isinstance(stamps, dict) else {}
+
+
+def _write_member(archive, name, rows):
+    with io.TextIOWrapper(
+        archive.open(name, "w", force_zip64=True),
+        encoding="utf-8",
+        newline="",
+    ) as member:
+        csv.writer(member).writerows(rows)
+
+
+def export_gtfs(path=None, full=False,
+                chunk_size=EXPORT_CHUNK_SIZE) -> list[str]:
+    """
+    Write the feed to ``path``, reusing the members of the feed already
+    there that are still current unless ``full``. The new zip replaces the
+    old one when complete. Return the names of the members rebuilt.
+    """
+    path = path or _feed_path()
+    zone = timezone.get_default_timezone()
+    stamps = _stamps(zone)
+
+    previous = None
+    if not full and os.path.exists(path) and zipfile.is_zipfile(path):
+        previous = zipfile.ZipFile(path)
+    previous_stamps = _previous_stamps(previous) if previous else {}
+    current = {
+        name
+        for name in GTFS_MEMBERS
+        if previous_stamps.get(name) == stamps[name]
+        and name in previous.namelist()
+    }
+    if len(current) == len(GTFS_MEMBERS):
+        previous.close()
+        return []
+
+    rebuilt = []
+    temporary_path = f"{path}.tmp"
+    try:
+        with zipfile.ZipFile(
+            temporary_path, "w", zipfile.ZIP_DEFLATED
+        ) as archive:
+            for name, (_, rows) in GTFS_MEMBERS.items():
+                if name in current:
+                    with previous.open(name) as source, archive.open(
+                        name, "w", force_zip64=True
+                    ) as target:
+                        shutil.copyfileobj(source, target)
+                else:
+                    _write_member(archive, name, rows(zone, chunk_size))
+                    rebuilt.append(name)
+            archive.comment = json.dumps(stamps).encode()
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+    finally:
+        if previous:
+            previous.close()
+    os.replace(temporary_path, path)
+    return rebuilt
@@ -0,0 +1,126 @@
+"""
+Storage for ``Idempotency-Key`` replays.
+
+A key is first reserved, so that concurrent retries of a request still in
+progress can be told apart, then completed with the response to replay.
+Entries older than ``IDEMPOTENCY_KEY_TTL`` are treated as absent. The
+backend is chosen with the ``IDEMPOTENCY_STORE`` setting.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from train_station.models import IdempotencyKey
+
+
+def _ttl() -> timedelta:
+    return getattr(settings, "IDEMPOTENCY_KEY_TTL", timedelta(hours=24))
+
+
+def request_fingerprint(data) -> str:
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+class StoredResponse:
+    def __init__(self, fingerprint, status_code=None, data=None):
+        self.fingerprint = fingerprint
+        self.status_code = status_code
+        self.data = data
+
+    @property
+    def in_progress(self) -> bool:
+        return self.status_code is None
+
+
+class DatabaseIdempotencyStore:
+    def _entries(self, user_id, key):
+        return IdempotencyKey.objects.filter(user_id=user_id, key=key)
+
+    def get(self, user_id, key):
+        entry = self._entries(user_id, key).filter(
+            created_at__gt=timezone.now() - _ttl()
+        ).first()
+        if entry is None:
+            return None
+        return StoredResponse(
+            entry.fingerprint, entry.status_code, entry.response
+        )
+
+    def reserve(self, user_id, key, fingerprint) -> bool:
+        self._entries(user_id, key).filter(
+            created_at__lte=timezone.now() - _ttl()
+        ).delete()
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(
+                    user_id=user_id, key=key, fingerprint=fingerprint
+                )
+        except IntegrityError:
+            return False
+        return True
+
+    def complete(self, user_id, key, status_code, data):
+        self._entries(user_id, key).update(
+            status_code=status_code, response=data
+        )
+
+    def release(self, user_id, key):
+        self._entries(user_id, key).delete()
+
+    def purge_expired(self) -> int:
+        deleted, _ = IdempotencyKey.objects.filter(
+            created_at__lte=timezone.now() - _ttl()
+        ).delete()
+        return deleted
+
+
+class CacheIdempotencyStore:
+    def _cache_key(self, user_id, key):
+        return "idempotency:{}:{}".format(
+            user_id, hashlib.sha256(key.encode()).hexdigest()
+        )
+
+    def get(self, user_id, key):
+        stored = cache.get(self._cache_key(user_id, key))
+        if stored is None:
+            return None
+        return StoredResponse(*stored)
+
+    def reserve(self, user_id, key, fingerprint) -> bool:
+        return cache.add(
+            self._cache_key(user_id, key),
+            (fingerprint, None, None),
+            _ttl().total_seconds(),
+        )
+
+    def complete(self, user_id, key, status_code, data):
+        stored = self.get(user_id, key)
+        cache.set(
+            self._cache_key(user_id, key),
+            (stored.fingerprint if stored else "", status_code, data),
+            _ttl().total_seconds(),
+        )
+
+    def release(self, user_id, key):
+        cache.delete(self._cache_key(user_id, key))
+
+    def purge_expired(self) -> int:
+        return 0
+
+
+def get_idempotency_store():
+    return import_string(
+        getattr(
+            settings,
+            "IDEMPOTENCY_STORE",
+            "train_station.idempotency.DatabaseIdempotencyStore",
+        )
+    )()
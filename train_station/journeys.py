@@ -0,0 +1,222 @@
+"""
+Multi-leg journey planner over the trip timetable.
+
+Every trip is one connection from the source to the destination station
+of its route. Connections are held in memory sorted by departure time and
+searched with the Connection Scan Algorithm, keeping the earliest arrival
+at every station per number of legs used. The timetable is kept up to date
+by trip and route signals like the station graph.
+"""
+import math
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from django.conf import settings
+from django.utils import timezone
+
+from train_station.models import Route, Trip
+from train_station.versions import ProcessIndex
+
+
+TIMETABLE_MODELS = ("trip", "route")
+EARLIEST_ARRIVAL = "earliest"
+FEWEST_TRANSFERS = "transfers"
+
+
+def _search_window() -> timedelta:
+    return getattr(settings, "JOURNEY_SEARCH_WINDOW", timedelta(days=1))
+
+
+def _timestamp(value: datetime) -> float:
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value.timestamp()
+
+
+def _datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, dt_timezone.utc)
+
+
+class Timetable:
+    def __init__(self):
+        # (departure, arrival, source, destination, trip id, route id)
+        self.connections = []
+        self.trips = {}
+        self.routes = {}
+        self.route_trips = {}
+
+    @classmethod
+    def load(cls):
+        timetable = cls()
+        for route_id, source_id, destination_id in (
+            Route.objects.order_by().values_list(
+                "id", "source_station_id", "destination_station_id"
+            )
+        ):
+            timetable.routes[route_id] = (source_id, destination_id)
+        connections = []
+        for trip_id, route_id, departure_time, arrival_time in (
+            Trip.objects.order_by().values_list(
+                "id", "route_id", "departure_time", "arrival_time"
+            )
+        ):
+            connection = timetable._connection(
+                trip_id, route_id, departure_time, arrival_time
+            )
+            timetable.trips[trip_id] = connection
+            timetable.route_trips.setdefault(route_id, set()).add(trip_id)
+            connections.append(connection)
+        connections.sort()
+        timetable.connections = connections
+        return timetable
+
+    def _connection(self, trip_id, route_id, departure_time, arrival_time):
+        source_id, destination_id = self.routes[route_id]
+        return (
+            _timestamp(departure_time),
+            _timestamp(arrival_time),
+            source_id,
+            destination_id,
+            trip_id,
+            route_id,
+        )
+
+    def set_trip(self, trip_id, route_id, departure_time, arrival_time):
+        self.remove_trip(trip_id)
+        connection = self._connection(
+            trip_id, route_id, departure_time, arrival_time
+        )
+        insort(self.connections, connection)
+        self.trips[trip_id] = connection
+        self.route_trips.setdefault(route_id, set()).add(trip_id)
+
+    def remove_trip(self, trip_id):
+        connection = self.trips.pop(trip_id, None)
+        if connection is None:
+            return
+        del self.connections[bisect_left(self.connections, connection)]
+        self.route_trips[connection[5]].discard(trip_id)
+
+    def set_route(self, route_id, source_id, destination_id):
+        self.routes[route_id] = (source_id, destination_id)
+        for trip_id in list(self.route_trips.get(route_id, ())):
+            departure, arrival = self.trips[trip_id][:2]
+            self.set_trip(
+                trip_id, route_id, _datetime(departure), _datetime(arrival)
+            )
+
+    def remove_route(self, route_id):
+        for trip_id in list(self.route_trips.pop(route_id, ())):
+            self.remove_trip(trip_id)
+        self.routes.pop(route_id, None)
+
+    def plan(
+        self,
+        source_id,
+        target_id,
+        departure_time,
+        min_transfer=timedelta(0),
+        max_legs=3,
+        optimize=EARLIEST_ARRIVAL,
+    ):
+        """
+        Return the legs of the best journey leaving ``source_id`` not
+        before ``departure_time`` as a list of connections, or None if
+        ``target_id`` cannot be reached within ``max_legs`` trips and the
+        search window. Changing trains takes at least ``min_transfer``.
+        ``optimize`` picks the earliest arrival, or the fewest transfers
+        with the earliest arrival among those.
+        """
+        departure = _timestamp(departure_time)
+        transfer = min_transfer.total_seconds()
+        horizon = departure + _search_window().total_seconds()
+
+        # arrivals[legs][station] is the earliest arrival using ``legs``
+        # trips; the origin counts as reached a transfer before departure
+        arrivals = [{source_id: departure - transfer}]
+        arrivals += [{} for _ in range(max_legs)]
+        parents = [{} for _ in range(max_legs + 1)]
+        fewest_legs = {source_id: 0}
+        legs_limit = max_legs
+        # connections leaving later than this cannot improve the answer
+        bound = math.inf
+
+        start = bisect_left(self.connections, (departure,))
+        for connection in islice(self.connections, start, None):
+            (
+                connection_departure,
+                connection_arrival,
+                source,
+                destination,
+                _,
+                _,
+            ) = connection
+            if connection_departure >= min(bound, horizon):
+                break
+            first_legs = fewest_legs.get(source)
+            if first_legs is None or first_legs >= legs_limit:
+                continue
+
+            improved = False
+            for legs in range(first_legs + 1, legs_limit + 1):
+                if (
+                    arrivals[legs - 1].get(source, math.inf) + transfer
+                    <= connection_departure
+                    and connection_arrival
+                    < arrivals[legs].get(destination, math.inf)
+                ):
+                    arrivals[legs][destination] = connection_arrival
+                    parents[legs][destination] = connection
+                    if legs < fewest_legs.get(destination, math.inf):
+                        fewest_legs[destination] = legs
+                    improved = True
+
+            if improved and destination == target_id:
+                if optimize == FEWEST_TRANSFERS:
+                    legs_limit = fewest_legs[target_id]
+                    if legs_limit == 1:
+                        bound = arrivals[1][target_id]
+                else:
+                    bound = min(bound, connection_arrival)
+
+        if target_id not in fewest_legs or target_id == source_id:
+            return None
+        if optimize == FEWEST_TRANSFERS:
+            legs = fewest_legs[target_id]
+        else:
+            _, legs = min(
+                (arrivals[legs][target_id], legs)
+                for legs in range(1, max_legs + 1)
+                if target_id in arrivals[legs]
+            )
+
+        journey, station_id = [], target_id
+        for legs in range(legs, 0, -1):
+            connection = parents[legs][station_id]
+            journey.append(connection)
+            station_id = connection[2]
+        return journey[::-1]
+
+
+def journey_legs(journey) -> list[dict]:
+    return [
+        {
+            "trip": trip_id,
+            "route": route_id,
+            "source": source_id,
+            "destination": destination_id,
+            "departure_time": timezone.localtime(_datetime(departure)),
+            "arrival_time": timezone.localtime(_datetime(arrival)),
+        }
+        for (
+            departure, arrival, source_id, destination_id, trip_id, route_id
+        ) in journey
+    ]
+
+
+timetable = ProcessIndex(Timetable.load, TIMETABLE_MODELS)
+
+
+def get_timetable() -> Timetable:
+    return timetable.get()
@@ -0,0 +1,47 @@
+from datetime import datetime, time
+
+from django.core.management import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from train_station.archive import ARCHIVE_CHUNK_SIZE, archive_trips
+
+
+class Command(BaseCommand):
+    """Django command to move completed trips and tickets to the archive"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before",
+            required=True,
+            help="Archive trips that arrived before this date "
+                 "(YYYY-MM-DD, in the default time zone)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=ARCHIVE_CHUNK_SIZE,
+            help="Trips moved per transaction",
+        )
+
+    def progress(self, trips, tickets):
+        self.stdout.write(f"{trips} trips, {tickets} tickets")
+
+    def handle(self, *args, **options):
+        try:
+            day = parse_date(options["before"])
+        except ValueError:
+            day = None
+        if day is None:
+            raise CommandError("--before must be a date as YYYY-MM-DD")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive")
+
+        trips, tickets = archive_trips(
+            timezone.make_aware(datetime.combine(day, time())),
+            options["chunk_size"],
+            self.progress if options["verbosity"] > 1 else None,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {trips} trips, {tickets} tickets")
+        )
@@ -0,0 +1,49 @@
+from django.core.management import BaseCommand
+
+from train_station.exports import (
+    EXPORT_CHUNK_SIZE,
+    EXPORTS,
+    NDJSON,
+    OUTPUTS,
+    export,
+)
+
+
+class Command(BaseCommand):
+    """Django command to export every trip, order or ticket"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=list(EXPORTS))
+        parser.add_argument(
+            "--output",
+            choices=list(OUTPUTS),
+            default=NDJSON,
+            help="Export format, ndjson by default",
+        )
+        parser.add_argument(
+            "--path",
+            help="File to write the export to, standard output by default",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help="Rows fetched from the database at a time",
+        )
+
+    def handle(self, *args, **options):
+        chunks = export(
+            options["name"], options["output"], options["chunk_size"]
+        )
+        if options["path"] is None:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending="")
+            return
+
+        with open(options["path"], "wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+        self.stderr.write(
+            self.style.SUCCESS(f"Exported {options['name']} "
+                               f"to {options['path']}")
+        )
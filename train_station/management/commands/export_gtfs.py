@@ -0,0 +1,36 @@
+from django.core.management import BaseCommand
+
+from train_station.exports import EXPORT_CHUNK_SIZE
+from train_station.gtfs_export import GTFS_MEMBERS, export_gtfs
+
+
+class Command(BaseCommand):
+    """Django command to write the timetable as a GTFS feed"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            help="Zip file to write the feed to, GTFS_FEED_PATH by default",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rebuild every file, even if its tables did not change",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help="Rows fetched from the database at a time",
+        )
+
+    def handle(self, *args, **options):
+        rebuilt = export_gtfs(
+            options["path"], options["full"], options["chunk_size"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {', '.join(rebuilt) or 'no files'} "
+                f"({len(GTFS_MEMBERS) - len(rebuilt)} unchanged)"
+            )
+        )
@@ -0,0 +1,89 @@
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management import BaseCommand, CommandError
+
+from train_station.timetable_import import (
+    GTFS_CARGO_NUM,
+    GTFS_TRAIN_TYPE,
+    IMPORT_BATCH_SIZE,
+    import_timetable,
+    read_csv,
+    read_gtfs,
+)
+
+
+class Command(BaseCommand):
+    """Django command to load a timetable from CSV files or a GTFS feed"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="Directory or zip file with the timetable files",
+        )
+        parser.add_argument(
+            "--gtfs",
+            action="store_true",
+            help="Read a GTFS feed instead of stations.csv, routes.csv, "
+                 "trains.csv and trips.csv",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate and import, then roll everything back",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help="Rows written at a time",
+        )
+        parser.add_argument(
+            "--train-type",
+            default=GTFS_TRAIN_TYPE,
+            help="Type of trains created from a GTFS feed",
+        )
+        parser.add_argument(
+            "--cargo-num",
+            type=int,
+            default=GTFS_CARGO_NUM,
+            help="Cars of trains created from a GTFS feed",
+        )
+
+    def progress(self, label, done, total):
+        self.stdout.write(f"{label}: {done}/{total}")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options["gtfs"]:
+            timetable = read_gtfs(
+                options["path"], options["train_type"], options["cargo_num"]
+            )
+        else:
+            timetable = read_csv(options["path"])
+        for label, count in timetable.duplicates.items():
+            self.stdout.write(
+                self.style.WARNING(f"{label}: {count} repeated rows replaced")
+            )
+
+        try:
+            counts = import_timetable(
+                timetable,
+                options["batch_size"],
+                options["dry_run"],
+                self.progress if options["verbosity"] > 0 else None,
+            )
+        except ValidationError as error:
+            raise CommandError("\n".join(error.messages))
+
+        for label, (rows, created) in counts.items():
+            self.stdout.write(f"{label}: {rows} rows, {created} new")
+        seconds = time.perf_counter() - started
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING(
+                f"Dry run, rolled back after {seconds:.1f}s"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Imported timetable in {seconds:.1f}s"
+            ))
@@ -0,0 +1,30 @@
+from django.core.management import BaseCommand
+
+from train_station.schedules import (
+    MATERIALIZE_BATCH_SIZE,
+    materialize_schedules,
+)
+
+
+class Command(BaseCommand):
+    """Django command to create the trips of recurring schedules"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Days from today to create trips for, "
+                 "SCHEDULE_HORIZON by default",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=MATERIALIZE_BATCH_SIZE,
+            help="Trips inserted per statement batch",
+        )
+
+    def handle(self, *args, **options):
+        created = materialize_schedules(
+            days=options["days"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Created {created} trips"))
@@ -0,0 +1,22 @@
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+
+from train_station.archive import partition_archived_tickets
+
+
+class Command(BaseCommand):
+    """
+    Django command to recreate the archived tickets table partitioned by
+    month on PostgreSQL, once after migrate and before the first archival
+    """
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitioning needs PostgreSQL")
+        if not partition_archived_tickets():
+            raise CommandError(
+                "Archived tickets exist already, the table is left as it is"
+            )
+        self.stdout.write(
+            self.style.SUCCESS("Archived tickets are partitioned by month")
+        )
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management import BaseCommand
+
+from train_station.order_queue import (
+    claim_batch,
+    process_batch,
+    requeue_stale,
+)
+
+
+class Command(BaseCommand):
+    """Django command to book orders accepted in queued intake mode"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Requests claimed at once",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when the queue is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit as soon as the queue is empty",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Processing order queue...")
+        while True:
+            requeued = requeue_stale()
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale requests")
+
+            order_requests = claim_batch(options["batch_size"])
+            if order_requests:
+                counts = process_batch(order_requests)
+                self.stdout.write(", ".join(
+                    f"{status}: {count}" for status, count in counts.items()
+                ))
+            elif options["once"]:
+                break
+            else:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS("Order queue is empty"))
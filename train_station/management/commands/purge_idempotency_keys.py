@@ -0,0 +1,13 @@
+from django.core.management import BaseCommand
+
+from train_station.idempotency import get_idempotency_store
+
+
+class Command(BaseCommand):
+    """Django command to delete stored responses of expired idempotency keys"""
+
+    def handle(self, *args, **options):
+        purged = get_idempotency_store().purge_expired()
+        self.stdout.write(
+            self.style.SUCCESS(f"Purged {purged} expired idempotency keys")
+        )
@@ -0,0 +1,28 @@
+from django.core.management import BaseCommand
+
+from train_station.distance_matrix import DistanceMatrix
+
+
+class Command(BaseCommand):
+    """Django command to compute all station distances and save them"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            help="File to save the matrix to, DISTANCE_MATRIX_PATH "
+                 "by default",
+        )
+
+    def handle(self, *args, **options):
+        matrix = DistanceMatrix.load(options["path"])
+        reused = sum(component.complete for component in matrix.components)
+        matrix.compute_all()
+        matrix.save(options["path"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Saved distances of {len(matrix.component_of)} stations "
+                f"in {len(matrix.components)} components "
+                f"({reused} unchanged)"
+            )
+        )
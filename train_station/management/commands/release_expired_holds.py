@@ -0,0 +1,21 @@
+from django.core.management import BaseCommand
+
+from train_station.booking import release_expired_holds
+
+
+class Command(BaseCommand):
+    """Django command to delete seat holds whose time to live has passed"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Holds deleted per transaction",
+        )
+
+    def handle(self, *args, **options):
+        released = release_expired_holds(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Released {released} expired seat holds")
+        )
@@ -1,4 +1,8 @@
+from datetime import timedelta
+
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Now
 from django.core.exceptions import ValidationError
 
 from train_station_api_service import settings
@@ -111,6 +115,101 @@ class Route(models.Model):
                 f" ({self.distance} km)")
 
 
+class Schedule(models.Model):
+    """Recurring trip of a train on a route, materialized into trips"""
+
+    route = models.ForeignKey(
+        Route,
+        on_delete=models.CASCADE,
+        related_name="schedules"
+    )
+    train = models.ForeignKey(
+        Train,
+        on_delete=models.CASCADE,
+        related_name="schedules"
+    )
+    crew = models.ManyToManyField(Crew, related_name="schedules", blank=True)
+    weekdays = models.CharField(
+        max_length=7,
+        default="1111111",
+        help_text="Days the train runs, Monday first, e.g. 1111100"
+    )
+    departure_time = models.TimeField()
+    duration = models.DurationField()
+    valid_from = models.DateField()
+    valid_until = models.DateField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["departure_time"]
+
+    @staticmethod
+    def validate_schedule(
+        weekdays, duration, valid_from, valid_until, error_to_raise
+    ):
+        if len(weekdays) != 7 or set(weekdays) - {"0", "1"}:
+            raise error_to_raise(
+                {"weekdays": "Weekdays must be 7 digits 0 or 1, "
+                             "Monday first"}
+            )
+        if "1" not in weekdays:
+            raise error_to_raise(
+                {"weekdays": "Schedule must run on at least one day"}
+            )
+        if duration <= timedelta(0):
+            raise error_to_raise({"duration": "Duration must be positive"})
+        if valid_until is not None and valid_until < valid_from:
+            raise error_to_raise(
+                {"valid_until": "Schedule cannot end before it starts"}
+            )
+
+    def clean(self) -> None:
+        self.validate_schedule(
+            self.weekdays,
+            self.duration,
+            self.valid_from,
+            self.valid_until,
+            ValidationError
+        )
+
+    def runs_on(self, day) -> bool:
+        return (
+            self.valid_from <= day
+            and (self.valid_until is None or day <= self.valid_until)
+            and self.weekdays[day.weekday()] == "1"
+        )
+
+    def __str__(self) -> str:
+        return (f"{self.route} {self.train.name} - "
+                f"{self.departure_time} ({self.weekdays})")
+
+
+class TripQuerySet(models.QuerySet):
+    def with_tickets_available(self):
+        sold_tickets = (
+            Ticket.objects.filter(trip=OuterRef("pk"))
+            .order_by()
+            .values("trip")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        held_seats = (
+            HeldSeat.objects.filter(
+                trip=OuterRef("pk"), hold__expires_at__gt=Now()
+            )
+            .order_by()
+            .values("trip")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return self.annotate(
+            tickets_available=(
+                F("train__cargo_num") * F("train__places_in_cargo")
+                - Coalesce(Subquery(sold_tickets), Value(0))
+                - Coalesce(Subquery(held_seats), Value(0))
+            )
+        )
+
+
 class Trip(models.Model):
     route = models.ForeignKey(
         Route,
@@ -125,16 +224,39 @@ class Trip(models.Model):
     crew = models.ManyToManyField(Crew, related_name="trips")
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
+    schedule = models.ForeignKey(
+        Schedule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="trips"
+    )
+
+    objects = TripQuerySet.as_manager()
 
     class Meta:
         constraints = [
             models.UniqueConstraint(
-                fields=["route", "train"],
+                fields=["route", "train", "departure_time"],
                 name="unique trip"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["departure_time"],
+                name="trip_departure_idx"
+            ),
+            models.Index(
+                fields=["route", "departure_time"],
+                name="trip_route_departure_idx"
+            ),
+        ]
         ordering = ["departure_time"]
 
+    @property
+    def capacity(self) -> int:
+        return self.train.cargo_num * self.train.places_in_cargo
+
     def __str__(self) -> str:
         return f"{str(self.route)} {self.train.name} - {self.departure_time}"
 
@@ -148,6 +270,12 @@ class Order(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=["customer", "created_at"],
+                name="order_customer_created_idx"
+            )
+        ]
         ordering = ["created_at"]
 
     def __str__(self) -> str:
@@ -218,3 +346,206 @@ class Ticket(models.Model):
         return (
             f"{str(self.trip)} (cargo: {self.cargo}, seat: {self.seat})"
         )
+
+
+class SeatHoldQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(expires_at__gt=Now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=Now())
+
+
+class SeatHold(models.Model):
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    customer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds"
+    )
+    trip = models.ForeignKey(
+        Trip,
+        on_delete=models.CASCADE,
+        related_name="seat_holds"
+    )
+
+    objects = SeatHoldQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["expires_at"]
+
+    def __str__(self) -> str:
+        return f"{self.customer} - {self.trip_id} (until {self.expires_at})"
+
+
+class HeldSeat(models.Model):
+    cargo = models.PositiveIntegerField()
+    seat = models.PositiveIntegerField()
+    trip = models.ForeignKey(
+        Trip,
+        on_delete=models.CASCADE,
+        related_name="held_seats"
+    )
+    hold = models.ForeignKey(
+        SeatHold,
+        on_delete=models.CASCADE,
+        related_name="seats"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["trip", "cargo", "seat"],
+                name="unique held seat"
+            )
+        ]
+        ordering = ["cargo", "seat"]
+
+    def __str__(self) -> str:
+        return f"{self.hold} (cargo: {self.cargo}, seat: {self.seat})"
+
+
+class IdempotencyKey(models.Model):
+    key = models.CharField(max_length=255)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys"
+    )
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"],
+                name="unique idempotency key"
+            )
+        ]
+        ordering = ["created_at"]
+
+    def __str__(self) -> str:
+        return f"{self.user} - {self.key}"
+
+
+class OrderRequest(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        PROCESSING = "processing"
+        DONE = "done"
+        FAILED = "failed"
+
+    customer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="order_requests"
+    )
+    trip = models.ForeignKey(
+        Trip,
+        on_delete=models.CASCADE,
+        related_name="order_requests"
+    )
+    tickets = models.JSONField()
+    status = models.CharField(
+        max_length=10,
+        choices=Status,
+        default=Status.PENDING
+    )
+    order = models.OneToOneField(
+        Order,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="request"
+    )
+    errors = models.JSONField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "created_at"],
+                name="order_request_queue_idx"
+            )
+        ]
+        ordering = ["created_at"]
+
+    def __str__(self) -> str:
+        return f"{self.customer} - {self.created_at} ({self.status})"
+
+
+class ArchivedTrip(models.Model):
+    """Completed trip moved out of ``Trip`` by ``archive_trips``, same id"""
+
+    route = models.ForeignKey(
+        Route,
+        on_delete=models.CASCADE,
+        related_name="archived_trips"
+    )
+    train = models.ForeignKey(
+        Train,
+        on_delete=models.CASCADE,
+        related_name="archived_trips"
+    )
+    crew = models.ManyToManyField(Crew, related_name="archived_trips")
+    departure_time = models.DateTimeField()
+    arrival_time = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["departure_time"],
+                name="archived_trip_departure_idx"
+            ),
+        ]
+        ordering = ["departure_time"]
+
+    def __str__(self) -> str:
+        return f"{str(self.route)} {self.train.name} - {self.departure_time}"
+
+
+class ArchivedTicket(models.Model):
+    """
+    Ticket of an archived trip. The trip departure is kept on the ticket,
+    so the table can be partitioned by its month on PostgreSQL with the
+    ``partition_archived_tickets`` command.
+    """
+
+    cargo = models.PositiveIntegerField()
+    seat = models.PositiveIntegerField()
+    trip = models.ForeignKey(
+        ArchivedTrip,
+        on_delete=models.CASCADE,
+        related_name="tickets"
+    )
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name="archived_tickets"
+    )
+    departure_time = models.DateTimeField()
+
+    class Meta:
+        ordering = ["departure_time", "cargo", "seat"]
+
+    def __str__(self) -> str:
+        return (
+            f"{str(self.trip)} (cargo: {self.cargo}, seat: {self.seat})"
+        )
+
+
+class ModelVersion(models.Model):
+    """Last change stamp of a model, kept when the cache is cleared"""
+
+    label = models.CharField(max_length=100, primary_key=True)
+    token = models.CharField(max_length=32)
+    timestamp = models.FloatField()
+
+    def __str__(self) -> str:
+        return f"{self.label} - {self.token}"
@@ -0,0 +1,190 @@
+"""
+Database-backed queue for orders accepted in asynchronous intake mode.
+
+The API only validates ticket ranges and stores an ``OrderRequest``; the
+``process_order_queue`` worker claims pending requests in batches and
+books them trip by trip, taking each trip lock once per batch. A request
+that keeps failing, or whose worker keeps dying, is marked failed after
+``ORDER_REQUEST_MAX_ATTEMPTS`` claims.
+"""
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db import connection, OperationalError, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from train_station.booking import (
+    book_tickets,
+    is_retryable,
+    lock_trips,
+    run_with_retry,
+    SeatsTaken,
+)
+from train_station.models import Order, OrderRequest, Trip
+
+
+PROCESSING_FAILED = "Order could not be processed."
+
+
+def queued_intake_enabled(request) -> bool:
+    """Queue orders when configured to, or when the client asks for it"""
+    return (
+        getattr(settings, "ORDER_INTAKE_QUEUED", False)
+        or "respond-async" in request.headers.get("Prefer", "")
+    )
+
+
+def enqueue_order(customer, tickets_data) -> OrderRequest:
+    return OrderRequest.objects.create(
+        customer=customer,
+        trip=tickets_data[0]["trip"],
+        tickets=[
+            {
+                "trip": ticket["trip"].pk,
+                "cargo": ticket["cargo"],
+                "seat": ticket["seat"],
+            }
+            for ticket in tickets_data
+        ],
+    )
+
+
+def _max_attempts() -> int:
+    return getattr(settings, "ORDER_REQUEST_MAX_ATTEMPTS", 3)
+
+
+def requeue_stale(timeout=timedelta(minutes=5)) -> int:
+    """
+    Give back requests claimed by a worker that died before finishing.
+    Requests claimed ``ORDER_REQUEST_MAX_ATTEMPTS`` times already are
+    marked failed instead, so a request that kills workers is not retried
+    forever. Returns the number of requests given back.
+    """
+    now = timezone.now()
+    stale = OrderRequest.objects.filter(
+        status=OrderRequest.Status.PROCESSING,
+        claimed_at__lt=now - timeout,
+    )
+    stale.filter(attempts__gte=_max_attempts()).update(
+        status=OrderRequest.Status.FAILED,
+        errors={"detail": PROCESSING_FAILED},
+        processed_at=now,
+    )
+    return stale.update(status=OrderRequest.Status.PENDING, claimed_at=None)
+
+
+def claim_batch(batch_size) -> list[OrderRequest]:
+    """Mark up to ``batch_size`` oldest pending requests as processing"""
+    with transaction.atomic():
+        pending = OrderRequest.objects.filter(
+            status=OrderRequest.Status.PENDING
+        ).order_by("created_at")
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)
+        request_ids = list(pending.values_list("id", flat=True)[:batch_size])
+        OrderRequest.objects.filter(id__in=request_ids).update(
+            status=OrderRequest.Status.PROCESSING,
+            claimed_at=timezone.now(),
+            attempts=F("attempts") + 1,
+        )
+    return list(
+        OrderRequest.objects.filter(id__in=request_ids)
+        .select_related("customer")
+        .order_by("trip_id", "created_at")
+    )
+
+
+def _place_order(order_request, trips) -> Order:
+    order = Order.objects.create(customer=order_request.customer)
+    book_tickets(
+        order,
+        [
+            {
+                "trip": trips.get(ticket["trip"], ticket["trip"]),
+                "cargo": ticket["cargo"],
+                "seat": ticket["seat"],
+            }
+            for ticket in order_request.tickets
+        ],
+        ValidationError,
+    )
+    return order
+
+
+def _process(order_request, trips):
+    order_request.order = order_request.errors = None
+    order_request.status = OrderRequest.Status.FAILED
+    try:
+        # a savepoint per request, so a failed one leaves the others booked
+        with transaction.atomic():
+            order_request.order = _place_order(order_request, trips)
+        order_request.status = OrderRequest.Status.DONE
+    except SeatsTaken as error:
+        order_request.errors = {
+            "detail": str(error),
+            "seats": [
+                {"trip": trip_id, "cargo": cargo, "seat": seat}
+                for trip_id, cargo, seat in error.seats
+            ],
+        }
+    except ValidationError as error:
+        order_request.errors = error.detail
+    except Exception as error:
+        # a deadlock aborts the whole group, which is retried as a whole
+        if isinstance(error, OperationalError) and is_retryable(error):
+            raise
+        order_request.errors = {"detail": PROCESSING_FAILED}
+    order_request.processed_at = timezone.now()
+
+
+def _process_group(trip_id, group, trips):
+    lock_trips([trip_id])
+    for order_request in group:
+        _process(order_request, trips)
+    OrderRequest.objects.bulk_update(
+        group, ["status", "order", "errors", "processed_at"]
+    )
+
+
+def process_batch(order_requests) -> dict:
+    """
+    Book claimed requests, one transaction per trip so the trip lock is
+    taken once for the whole group, retried as a whole on a deadlock.
+    A group that still fails stays claimed for ``requeue_stale``. Returns
+    the number of requests that ended up in each status.
+    """
+    trips = Trip.objects.select_related("train").in_bulk({
+        ticket["trip"]
+        for order_request in order_requests
+        for ticket in order_request.tickets
+    })
+    for trip_id, group in groupby(
+        order_requests, key=lambda order_request: order_request.trip_id
+    ):
+        group = list(group)
+        try:
+            run_with_retry(_process_group, trip_id, group, trips)
+        except OperationalError:
+            for order_request in group:
+                order_request.status = OrderRequest.Status.PROCESSING
+                order_request.order = order_request.errors = None
+                order_request.processed_at = None
+
+    counts = {}
+    for order_request in order_requests:
+        counts[order_request.status] = counts.get(order_request.status, 0) + 1
+    return counts
+
+
+def drain(batch_size=100) -> int:
+    """Process pending requests until the queue is empty"""
+    processed = 0
+    while True:
+        order_requests = claim_batch(batch_size)
+        if not order_requests:
+            return processed
+        process_batch(order_requests)
+        processed += len(order_requests)
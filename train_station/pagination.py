@@ -0,0 +1,239 @@
+"""
+Keyset pagination: every page is fetched with a ``WHERE`` on the ordering
+key of the last row seen instead of an ``OFFSET``, and no ``COUNT(*)`` is
+issued, so a page costs the same however deep it is.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def _to_json(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginate by the ordering of the queryset, or of ``Meta.ordering``,
+    with the primary key appended to break ties. Ordering fields must be
+    fields or annotations of the model itself.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "limit"
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 1000
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_ordering(self, queryset) -> list[str]:
+        ordering = [
+            field
+            for field in (
+                queryset.query.order_by or queryset.model._meta.ordering
+            )
+            if isinstance(field, str)
+        ]
+        if not {"pk", "-pk", "id", "-id"} & set(ordering):
+            ordering.append("pk")
+        return ordering
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_ordering_field(self, queryset, name):
+        """Model field or annotation output field ordered by ``name``"""
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        if name == "pk":
+            return queryset.model._meta.pk
+        return queryset.model._meta.get_field(name)
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            reverse, position = bool(cursor["r"]), list(cursor["p"])
+            # a position value is compared with a field, which None or a
+            # JSON array or object can never be
+            if len(position) != len(self.ordering) or not all(
+                isinstance(value, (str, int, float)) for value in position
+            ):
+                raise NotFound(self.invalid_cursor_message)
+            position = [
+                self.get_ordering_field(
+                    queryset, field.lstrip("-")
+                ).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (
+            binascii.Error, ValueError, TypeError, KeyError, ValidationError
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, position
+
+    def encode_cursor(self, reverse, position) -> str:
+        encoded = base64.urlsafe_b64encode(
+            json.dumps({"r": int(reverse), "p": position}).encode()
+        ).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def row_position(self, row) -> list:
+        position = []
+        for field in self.ordering:
+            name = field.lstrip("-")
+            if isinstance(row, dict):
+                # rows of a values() queryset
+                value = row[self.pk_name if name == "pk" else name]
+            else:
+                value = getattr(row, name)
+            position.append(_to_json(value))
+        return position
+
+    def _after(self, position, reverse):
+        """Rows after ``position`` in the ordering, before it if reverse"""
+        conditions, equal = [], Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip("-")
+            lookup = "gt" if field.startswith("-") == reverse else "lt"
+            conditions.append(equal & Q(**{f"{name}__{lookup}": value}))
+            equal &= Q(**{name: value})
+        # the bound on the first field lets the database seek an index
+        first = self.ordering[0]
+        bound = "gte" if first.startswith("-") == reverse else "lte"
+        return Q(**{f"{first.lstrip('-')}__{bound}": position[0]}) & reduce(
+            or_, conditions
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(queryset)
+        self.pk_name = queryset.model._meta.pk.attname
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request, queryset)
+        reverse, position = cursor or (False, None)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [
+                field[1:] if field.startswith("-") else f"-{field}"
+                for field in ordering
+            ]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(position, reverse))
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # a page read backwards always has rows after it, and one read
+        # forwards from a cursor always has rows before it
+        first = self.row_position(rows[0]) if rows else position
+        last = self.row_position(rows[-1]) if rows else position
+        self.next = self.previous = None
+        if reverse or has_more:
+            self.next = self.encode_cursor(False, last)
+        if (reverse and has_more) or (not reverse and position is not None):
+            self.previous = self.encode_cursor(True, first)
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.next,
+            "previous": self.previous,
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {
+                    "type": "string", "nullable": True, "format": "uri"
+                },
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Position returned as next or previous",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+
+class SelectablePagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination unless the request asks for keyset pages with
+    ``?pagination=keyset`` or already carries a cursor.
+    """
+
+    pagination_query_param = "pagination"
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if (
+            request.query_params.get(self.pagination_query_param) == "keyset"
+            or self.keyset_class.cursor_query_param in request.query_params
+        ):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.pagination_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Use keyset pages (ex. ?pagination=keyset)",
+                "schema": {"type": "string", "enum": ["keyset"]},
+            },
+        ] + self.keyset_class().get_schema_operation_parameters(view)[:1]
@@ -0,0 +1,56 @@
+"""
+Faster JSON (orjson) and MessagePack renderers.
+
+Decimals are rendered as strings rather than floats, so coordinates keep
+all their digits, and datetimes exactly as ``JSONRenderer`` renders them,
+with their UTC offset.
+"""
+from decimal import Decimal
+
+import msgpack
+import orjson
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return str(obj)
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        elif indent:
+            # orjson only indents by two spaces
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        ret = orjson.dumps(data, default=_default, option=option)
+
+        # like JSONRenderer, keep the output valid inside <script> tags
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"  # noqa: VNE003
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_default, use_bin_type=True)
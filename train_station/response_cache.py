@@ -0,0 +1,87 @@
+"""
+Serialized responses of read-only actions kept in the Django cache.
+
+Keys include the change stamps of every model a response is built from, so
+a write makes the entries built before it unreachable instead of deleting
+them one by one; they are evicted after ``RESPONSE_CACHE_TIMEOUT``, which
+also bounds how long a response may show seat holds that have expired.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from train_station.versions import get_versions
+
+
+RESPONSE_CACHE_KEY = "response:{digest}"
+RESPONSE_CACHE_LOCK_KEY = "response:{digest}:lock"
+RESPONSE_CACHE_COUNTER_KEY = "response_cache:{outcome}"
+RESPONSE_CACHE_LOCK_TIMEOUT = 10
+RESPONSE_CACHE_WAIT_ATTEMPTS = 100
+HIT = "hit"
+MISS = "miss"
+
+
+def _cache_timeout():
+    return getattr(settings, "RESPONSE_CACHE_TIMEOUT", 60)
+
+
+def response_digest(parts, models) -> str:
+    """Digest of the request ``parts`` and the current stamps of ``models``"""
+    versions = get_versions(*models)
+    return hashlib.blake2b(
+        "|".join(
+            [*parts, *(versions[model][0] for model in models)]
+        ).encode(),
+        digest_size=16,
+    ).hexdigest()
+
+
+def _count(outcome):
+    key = RESPONSE_CACHE_COUNTER_KEY.format(outcome=outcome)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # evicted between add and incr
+        cache.set(key, 1, None)
+
+
+def response_cache_stats() -> dict:
+    keys = {
+        RESPONSE_CACHE_COUNTER_KEY.format(outcome=outcome): outcome
+        for outcome in (HIT, MISS)
+    }
+    counts = cache.get_many(list(keys))
+    return {outcome: counts.get(key, 0) for key, outcome in keys.items()}
+
+
+def get_or_render(digest, render):
+    """
+    Return ``(data, hit)`` for the response ``digest``, calling ``render()``
+    on a miss; it returns the data to cache, or ``None`` to cache nothing.
+    Only one caller renders a missing response at a time, the others wait
+    for its result and only render themselves if it does not show up.
+    """
+    key = RESPONSE_CACHE_KEY.format(digest=digest)
+    lock_key = RESPONSE_CACHE_LOCK_KEY.format(digest=digest)
+    for _ in range(RESPONSE_CACHE_WAIT_ATTEMPTS):
+        data = cache.get(key)
+        if data is not None:
+            _count(HIT)
+            return data, True
+        if cache.add(lock_key, 1, RESPONSE_CACHE_LOCK_TIMEOUT):
+            try:
+                _count(MISS)
+                data = render()
+                if data is not None:
+                    cache.set(key, data, _cache_timeout())
+                return data, False
+            finally:
+                cache.delete(lock_key)
+        time.sleep(0.01)
+
+    _count(MISS)
+    return render(), False
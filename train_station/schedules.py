@@ -0,0 +1,124 @@
+"""
+Materialization of recurring schedules into trips.
+
+A schedule is a template: a train on a route at a time of day on some
+weekdays within a validity period. ``materialize_schedules`` turns the
+days of a rolling horizon into trips, so search, booking and the exports
+keep working on plain trips. Trips already stored for a
+``(route, train, departure_time)`` are skipped, also when a concurrent
+run inserts them first, so running it again, e.g. daily from cron, only
+adds the days that entered the horizon. Changing a schedule does not
+touch its trips already materialized.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from train_station.bulk import batches, insert_rows
+from train_station.models import Schedule, Trip
+from train_station.versions import bump_versions
+
+
+MATERIALIZE_BATCH_SIZE = 5000
+TRIP_FIELDS = (
+    "route_id", "train_id", "departure_time", "arrival_time", "schedule_id"
+)
+TRIP_KEY_FIELDS = ("route_id", "train_id", "departure_time")
+
+
+def _horizon() -> timedelta:
+    return getattr(settings, "SCHEDULE_HORIZON", timedelta(days=90))
+
+
+def _days(start, days):
+    return [start + timedelta(days=offset) for offset in range(days)]
+
+
+def _planned_trips(schedules, days, zone):
+    """``TRIP_FIELDS`` rows of every run of ``schedules`` on ``days``"""
+    for schedule in schedules:
+        for day in days:
+            if schedule.runs_on(day):
+                # in UTC, as aware times in a DST change never compare
+                # equal to times in other zones and the duration is not
+                # wall clock time
+                departure_time = timezone.make_aware(
+                    datetime.combine(day, schedule.departure_time), zone
+                ).astimezone(dt_timezone.utc)
+                yield (
+                    schedule.route_id,
+                    schedule.train_id,
+                    departure_time,
+                    departure_time + schedule.duration,
+                    schedule.id,
+                )
+
+
+def materialize_schedules(start=None, days=None, schedules=None,
+                          batch_size=MATERIALIZE_BATCH_SIZE) -> int:
+    """
+    Create the trips of the ``schedules`` queryset (every schedule by
+    default) running on the ``days`` days from ``start`` (today, for
+    ``SCHEDULE_HORIZON`` by default) in the default time zone. Return the
+    number of trips created.
+    """
+    zone = timezone.get_default_timezone()
+    start = start or timezone.localdate(timezone=zone)
+    if days is None:
+        days = _horizon().days
+    days = _days(start, days)
+    if not days:
+        return 0
+    if schedules is None:
+        schedules = Schedule.objects.all()
+    schedules = schedules.filter(
+        Q(valid_until__isnull=True) | Q(valid_until__gte=days[0]),
+        valid_from__lte=days[-1],
+    )
+    crew = {}
+    for schedule_id, crew_id in Schedule.crew.through.objects.filter(
+        schedule__in=schedules
+    ).values_list("schedule_id", "crew_id"):
+        crew.setdefault(schedule_id, []).append(crew_id)
+
+    with transaction.atomic():
+        planned = list(_planned_trips(schedules.order_by("pk"), days, zone))
+        if not planned:
+            return 0
+        departure_times = [row[2] for row in planned]
+        existing = set(Trip.objects.filter(
+            route_id__in=schedules.values("route_id"),
+            departure_time__range=(
+                min(departure_times), max(departure_times)
+            ),
+        ).values_list(*TRIP_KEY_FIELDS))
+        trips = [row for row in planned if row[:3] not in existing]
+
+        created = 0
+        for batch in batches(trips, batch_size):
+            # trips inserted meanwhile, e.g. by a run from the API, are
+            # skipped instead of failing the whole horizon
+            inserted = insert_rows(
+                Trip, TRIP_FIELDS, batch,
+                unique_fields=TRIP_KEY_FIELDS,
+                ignore_conflicts=True,
+                returning=("id",) + TRIP_KEY_FIELDS,
+            )
+            schedule_ids = {row[:3]: row[4] for row in batch}
+            crew_rows = [
+                (trip_id, crew_id)
+                for trip_id, *key in inserted
+                for crew_id in crew.get(schedule_ids[tuple(key)], ())
+            ]
+            if crew_rows:
+                insert_rows(Trip.crew.through, ["trip_id", "crew_id"],
+                            crew_rows)
+            created += len(inserted)
+
+        if created:
+            transaction.on_commit(partial(bump_versions, "trip"))
+    return created
@@ -0,0 +1,228 @@
+"""
+Per-trip seat occupancy packed into a bitset and kept in the Django cache.
+
+Seat ``(cargo, seat)`` of a train with ``places_in_cargo`` seats per cargo
+is bit ``(cargo - 1) * places_in_cargo + (seat - 1)``; bits are stored
+most-significant first, so the first byte describes seats 1-8 of cargo 1.
+
+The map is cached under a per-trip generation: bookings move the trip to
+the next generation when they commit, so a map built from tickets read
+before a booking can never be stored over a newer one.
+"""
+import base64
+import random
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+from train_station.models import Ticket, Trip
+
+
+SEAT_MAP_CACHE_KEY = "seat_map:{trip_id}:{generation}"
+SEAT_MAP_GENERATION_KEY = "seat_map:{trip_id}:generation"
+SEAT_MAP_LOCK_KEY = "seat_map:{trip_id}:lock"
+SEAT_MAP_LOCK_ATTEMPTS = 20
+
+
+class SeatMap:
+    def __init__(self, trip_id, cargo_num, places_in_cargo, bits=None):
+        self.trip_id = trip_id
+        self.cargo_num = cargo_num
+        self.places_in_cargo = places_in_cargo
+        self.size = cargo_num * places_in_cargo
+        self.bits = (
+            bytearray(bits)
+            if bits is not None
+            else bytearray((self.size + 7) // 8)
+        )
+
+    @classmethod
+    def from_trip(cls, trip):
+        seat_map = cls(
+            trip.id, trip.train.cargo_num, trip.train.places_in_cargo
+        )
+        seat_map.take(
+            Ticket.objects.filter(trip=trip).values_list("cargo", "seat")
+        )
+        return seat_map
+
+    def _index(self, cargo, seat):
+        if not (
+            1 <= cargo <= self.cargo_num
+            and 1 <= seat <= self.places_in_cargo
+        ):
+            raise IndexError(f"No seat {seat} in cargo {cargo}")
+        return (cargo - 1) * self.places_in_cargo + seat - 1
+
+    def is_taken(self, cargo, seat) -> bool:
+        index = self._index(cargo, seat)
+        return bool(self.bits[index >> 3] & (0x80 >> (index & 7)))
+
+    def take(self, seats):
+        for cargo, seat in seats:
+            index = self._index(cargo, seat)
+            self.bits[index >> 3] |= 0x80 >> (index & 7)
+
+    def release(self, seats):
+        for cargo, seat in seats:
+            index = self._index(cargo, seat)
+            self.bits[index >> 3] &= ~(0x80 >> (index & 7)) & 0xFF
+
+    @property
+    def taken_count(self) -> int:
+        return int.from_bytes(self.bits, "big").bit_count()
+
+    def taken_seats(self, cargo) -> list[int]:
+        return [
+            seat
+            for seat in range(1, self.places_in_cargo + 1)
+            if self.is_taken(cargo, seat)
+        ]
+
+    def to_payload(self, expanded=False) -> dict:
+        payload = {
+            "trip": self.trip_id,
+            "cargo_num": self.cargo_num,
+            "places_in_cargo": self.places_in_cargo,
+            "taken": self.taken_count,
+            "encoding": "base64",
+            "seats": base64.b64encode(bytes(self.bits)).decode("ascii"),
+        }
+        if expanded:
+            payload["cargos"] = [
+                {"cargo": cargo, "taken_seats": self.taken_seats(cargo)}
+                for cargo in range(1, self.cargo_num + 1)
+            ]
+        return payload
+
+    def to_cache(self) -> tuple:
+        return self.cargo_num, self.places_in_cargo, bytes(self.bits)
+
+
+def _generation_key(trip_id) -> str:
+    return SEAT_MAP_GENERATION_KEY.format(trip_id=trip_id)
+
+
+def _seat_map_key(trip_id, generation) -> str:
+    return SEAT_MAP_CACHE_KEY.format(trip_id=trip_id, generation=generation)
+
+
+def _generation(trip_id) -> int:
+    """
+    Current generation of the trip seat map. A missing generation starts
+    at a random number, so maps cached before it was evicted are not read.
+    """
+    key = _generation_key(trip_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, random.getrandbits(48), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def get_cached_seat_map(trip_id):
+    cached = cache.get(_seat_map_key(trip_id, _generation(trip_id)))
+    if cached is None:
+        return None
+    return SeatMap(trip_id, *cached)
+
+
+def get_seat_map(trip) -> SeatMap:
+    """
+    Return the cached seat map of ``trip``, building it from its tickets
+    on a miss. The map is stored under the generation read before the
+    tickets, so a booking committed meanwhile, which moves the trip to a
+    new generation, is never hidden by it.
+    """
+    generation = _generation(trip.id)
+    key = _seat_map_key(trip.id, generation)
+    cached = cache.get(key)
+    if cached is not None:
+        return SeatMap(trip.id, *cached)
+    seat_map = SeatMap.from_trip(trip)
+    if cache.add(key, seat_map.to_cache(), timeout=None) and (
+        cache.get(_generation_key(trip.id)) != generation
+    ):
+        cache.delete(key)
+    return seat_map
+
+
+def invalidate_seat_map(*trip_ids):
+    """Move the trips to new generations, leaving no cached seat map"""
+    generations = cache.get_many(
+        [_generation_key(trip_id) for trip_id in trip_ids]
+    )
+    cache.delete_many(list(generations) + [
+        _seat_map_key(trip_id, generations[_generation_key(trip_id)])
+        for trip_id in trip_ids
+        if _generation_key(trip_id) in generations
+    ])
+
+
+def invalidate_train_seat_maps(train_id):
+    invalidate_seat_map(
+        *Trip.objects.filter(train_id=train_id).values_list("id", flat=True)
+    )
+
+
+@contextmanager
+def _seat_map_lock(trip_id):
+    lock_key = SEAT_MAP_LOCK_KEY.format(trip_id=trip_id)
+    for _ in range(SEAT_MAP_LOCK_ATTEMPTS):
+        if cache.add(lock_key, 1, timeout=5):
+            try:
+                yield True
+            finally:
+                cache.delete(lock_key)
+            return
+        time.sleep(0.005)
+    yield False
+
+
+def _update_seat_map(trip_id, seats, taken):
+    """
+    Move the trip to the next generation, carrying the cached seat map
+    over with ``seats`` applied. Updates are serialized by a lock; if the
+    generation was moved by an invalidation meanwhile, or the lock is not
+    taken, the map is dropped and built again on the next read.
+    """
+    with _seat_map_lock(trip_id) as locked:
+        if not locked:
+            invalidate_seat_map(trip_id)
+            return
+
+        generation = cache.get(_generation_key(trip_id))
+        if generation is None:
+            return
+        key = _seat_map_key(trip_id, generation)
+        cached = cache.get(key)
+        try:
+            next_generation = cache.incr(_generation_key(trip_id))
+        except ValueError:
+            return
+        cache.delete(key)
+        if cached is None or next_generation != generation + 1:
+            return
+        seat_map = SeatMap(trip_id, *cached)
+        try:
+            if taken:
+                seat_map.take(seats)
+            else:
+                seat_map.release(seats)
+        except IndexError:
+            return
+        cache.add(
+            _seat_map_key(trip_id, next_generation),
+            seat_map.to_cache(),
+            timeout=None,
+        )
+
+
+def mark_seats_taken(trip_id, seats):
+    """Apply freshly committed tickets to a cached seat map, if any."""
+    _update_seat_map(trip_id, seats, taken=True)
+
+
+def mark_seats_released(trip_id, seats):
+    _update_seat_map(trip_id, seats, taken=False)
@@ -1,26 +1,143 @@
-from django.db import transaction
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from rest_framework.exceptions import ValidationError
 
+from train_station.booking import (
+    allocate_order,
+    book_tickets,
+    hold_seats,
+    run_with_retry,
+    SeatsTaken,
+)
+from train_station.exceptions import SeatConflict
 from train_station.models import (
+    ArchivedTicket,
+    ArchivedTrip,
     TrainType,
     Train,
     Station,
     Route,
     Crew,
+    Schedule,
     Trip,
     Ticket,
-    Order
+    Order,
+    SeatHold,
+    HeldSeat,
+    OrderRequest,
 )
 
 
-class TrainTypeSerializer(serializers.ModelSerializer):
+def parse_field_spec(value):
+    """
+    Turn ``"id,tickets.trip.departure_time"`` into nested dicts:
+    ``{"id": {}, "tickets": {"trip": {"departure_time": {}}}}``
+    """
+    if value is None:
+        return None
+    spec = {}
+    for path in value.split(","):
+        node = spec
+        for name in path.strip().split("."):
+            if name:
+                node = node.setdefault(name, {})
+    return spec
+
+
+class DynamicFieldsMixin:
+    """
+    Render only the fields listed in ``?fields=`` and expand only the
+    nested serializers listed in ``?expand=``, the others are rendered as
+    primary keys. Dotted names reach into nested serializers. Without
+    ``?expand=`` nested serializers are expanded as before. Fields left
+    out are never instantiated.
+    """
+
+    # (fields, expand) specs handed down by the parent serializer
+    field_spec = None
+
+    def get_field_spec(self):
+        if self.field_spec is not None:
+            return self.field_spec
+        request = self.context.get("request")
+        if request is None or request.method not in ("GET", "HEAD"):
+            return {}, None
+        return (
+            parse_field_spec(request.query_params.get("fields")) or {},
+            parse_field_spec(request.query_params.get("expand")),
+        )
+
+    def get_field_names(self, declared_fields, info):
+        field_names = super().get_field_names(declared_fields, info)
+        fields_spec, _ = self.get_field_spec()
+        if fields_spec:
+            field_names = [name for name in field_names if name in fields_spec]
+        return field_names
+
+    def get_fields(self):
+        fields_spec, expand = self.get_field_spec()
+        if fields_spec:
+            self._declared_fields = {
+                name: field
+                for name, field in type(self)._declared_fields.items()
+                if name in fields_spec
+            }
+        try:
+            fields = super().get_fields()
+        finally:
+            self.__dict__.pop("_declared_fields", None)
+
+        for name, field in fields.items():
+            nested = getattr(field, "child", field)
+            if not isinstance(nested, serializers.BaseSerializer):
+                continue
+            if (
+                expand is not None
+                and name not in expand
+                and not fields_spec.get(name)
+            ):
+                fields[name] = serializers.PrimaryKeyRelatedField(
+                    read_only=True,
+                    many=nested is not field,
+                    **({"source": field.source} if field.source else {})
+                )
+            elif isinstance(nested, DynamicFieldsMixin):
+                nested.field_spec = (
+                    fields_spec.get(name, {}),
+                    None if expand is None else expand.get(name, {}),
+                )
+        return fields
+
+    def related_depth(self, lookup) -> int:
+        """
+        How many leading parts of an ORM lookup path (split on ``__``)
+        the rendered fields use, to trim ``select_related`` and
+        ``prefetch_related`` to match.
+        """
+        name, *rest = lookup
+        field = self.fields.get(name)
+        if field is None:
+            return 0
+        nested = getattr(field, "child", field)
+        if isinstance(nested, DynamicFieldsMixin):
+            return 1 + (nested.related_depth(rest) if rest else 0)
+        if isinstance(
+            getattr(field, "child_relation", None),
+            serializers.PrimaryKeyRelatedField
+        ):
+            return 1
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            return 0
+        return len(lookup)
+
+
+class TrainTypeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = TrainType
         fields = "__all__"
 
 
-class TrainSerializer(serializers.ModelSerializer):
+class TrainSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Train
         fields = "__all__"
@@ -37,13 +154,13 @@ class TrainDetailSerializer(TrainSerializer):
     train_type = TrainTypeSerializer(read_only=True)
 
 
-class StationSerializer(serializers.ModelSerializer):
+class StationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Station
         fields = "__all__"
 
 
-class RouteSerializer(serializers.ModelSerializer):
+class RouteSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     def validate(self, attrs):
         data = super(RouteSerializer, self).validate(attrs=attrs)
         Route.validate_route(
@@ -80,16 +197,62 @@ class RouteDetailSerializer(RouteSerializer):
     destination_station = StationSerializer(read_only=True)
 
 
-class CrewSerializer(serializers.ModelSerializer):
+class CrewSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Crew
         fields = ("id", "first_name", "last_name", "full_name")
 
 
-class TripSerializer(serializers.ModelSerializer):
+class ScheduleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    def validate(self, attrs):
+        data = super(ScheduleSerializer, self).validate(attrs=attrs)
+        schedule = self.instance or Schedule()
+        Schedule.validate_schedule(
+            *(
+                attrs.get(field, getattr(schedule, field))
+                for field in (
+                    "weekdays", "duration", "valid_from", "valid_until"
+                )
+            ),
+            ValidationError
+        )
+        return data
+
+    class Meta:
+        model = Schedule
+        fields = (
+            "id",
+            "route",
+            "train",
+            "crew",
+            "weekdays",
+            "departure_time",
+            "duration",
+            "valid_from",
+            "valid_until",
+        )
+
+
+class TripSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    tickets_available = serializers.SerializerMethodField()
+
     class Meta:
         model = Trip
         fields = "__all__"
+        read_only_fields = ("schedule",)
+
+    @staticmethod
+    def get_tickets_available(trip) -> int:
+        tickets_available = getattr(trip, "tickets_available", None)
+        if tickets_available is None:
+            # saved instances come back unannotated, count them the way
+            # list and detail responses do, active holds included
+            tickets_available = (
+                Trip.objects.with_tickets_available()
+                .values_list("tickets_available", flat=True)
+                .get(pk=trip.pk)
+            )
+        return tickets_available
 
 
 class TripListSerializer(TripSerializer):
@@ -114,7 +277,39 @@ class TripDetailSerializer(TripSerializer):
     crew = CrewSerializer(read_only=True, many=True)
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class TripPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolve trips from ``prefetched`` before falling back to a query"""
+
+    prefetched = None
+
+    def to_internal_value(self, data):
+        if self.prefetched and str(data).isdigit():
+            trip = self.prefetched.get(int(data))
+            if trip is not None:
+                return trip
+        return super().to_internal_value(data)
+
+
+class TicketBulkSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            trip_ids = {
+                int(ticket["trip"])
+                for ticket in data
+                if isinstance(ticket, dict)
+                and str(ticket.get("trip")).isdigit()
+            }
+            self.child.fields["trip"].prefetched = (
+                Trip.objects.select_related("train").in_bulk(trip_ids)
+            )
+        return super().to_internal_value(data)
+
+
+class TicketSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    trip = TripPrimaryKeyRelatedField(
+        queryset=Trip.objects.select_related("train")
+    )
+
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
         Ticket.validate_ticket(
@@ -128,27 +323,150 @@ class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
         fields = ("id", "cargo", "seat", "trip")
+        list_serializer_class = TicketBulkSerializer
+        # Taken seats are checked for the whole order at once by book_tickets
+        validators = []
 
 
 class TicketListSerializer(TicketSerializer):
     trip = TripListSerializer(read_only=True)
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     tickets = TicketSerializer(many=True, allow_empty=False)
 
     class Meta:
         model = Order
         fields = ("id", "tickets", "created_at")
 
+    @staticmethod
+    def _place_order(validated_data, tickets_data):
+        order = Order.objects.create(**validated_data)
+        book_tickets(order, tickets_data, ValidationError)
+        return order
+
     def create(self, validated_data):
-        with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
-            order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
-            return order
+        tickets_data = validated_data.pop("tickets")
+        try:
+            return run_with_retry(
+                self._place_order, validated_data, tickets_data
+            )
+        except SeatsTaken as error:
+            raise SeatConflict(error.seats)
+
+
+class ArchivedTripSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    train = serializers.SlugRelatedField(
+        read_only=True,
+        slug_field="name"
+    )
+    route = serializers.SlugRelatedField(
+        read_only=True,
+        slug_field="route_name"
+    )
+    crew = serializers.SlugRelatedField(
+        many=True,
+        read_only=True,
+        slug_field="full_name"
+    )
+
+    class Meta:
+        model = ArchivedTrip
+        fields = (
+            "id", "train", "route", "crew", "departure_time", "arrival_time"
+        )
+
+
+class ArchivedTicketSerializer(
+    DynamicFieldsMixin, serializers.ModelSerializer
+):
+    trip = ArchivedTripSerializer(read_only=True)
+
+    class Meta:
+        model = ArchivedTicket
+        fields = ("id", "cargo", "seat", "trip")
 
 
 class OrderListSerializer(OrderSerializer):
     tickets = TicketListSerializer(many=True, read_only=True)
+    archived_tickets = ArchivedTicketSerializer(many=True, read_only=True)
+
+    class Meta(OrderSerializer.Meta):
+        fields = ("id", "tickets", "archived_tickets", "created_at")
+
+
+class HeldSeatSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = HeldSeat
+        fields = ("cargo", "seat")
+
+
+class SeatHoldSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    trip = serializers.PrimaryKeyRelatedField(
+        queryset=Trip.objects.select_related("train")
+    )
+    seats = HeldSeatSerializer(many=True, allow_empty=False)
+
+    class Meta:
+        model = SeatHold
+        fields = ("id", "trip", "seats", "created_at", "expires_at")
+        read_only_fields = ("created_at", "expires_at")
+
+    def create(self, validated_data):
+        try:
+            return run_with_retry(
+                hold_seats,
+                validated_data["customer"],
+                validated_data["trip"],
+                validated_data["seats"],
+                ValidationError
+            )
+        except SeatsTaken as error:
+            raise SeatConflict(error.seats)
+
+
+class AllocatedOrderSerializer(serializers.Serializer):
+    trip = serializers.PrimaryKeyRelatedField(
+        queryset=Trip.objects.select_related("train")
+    )
+    seats_count = serializers.IntegerField(min_value=1)
+    together = serializers.BooleanField(default=True)
+
+    def create(self, validated_data):
+        try:
+            return allocate_order(
+                validated_data["customer"],
+                validated_data["trip"],
+                validated_data["seats_count"],
+                ValidationError,
+                together=validated_data["together"]
+            )
+        except SeatsTaken as error:
+            raise SeatConflict(
+                error.seats, "Could not allocate seats, please try again."
+            )
+
+
+class OrderRequestSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    status_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = OrderRequest
+        fields = (
+            "id",
+            "status",
+            "tickets",
+            "order",
+            "errors",
+            "created_at",
+            "processed_at",
+            "status_url",
+        )
+        read_only_fields = fields
+
+    def get_status_url(self, order_request) -> str:
+        return reverse(
+            "train_station:orderrequest-detail",
+            args=(order_request.id,),
+            request=self.context.get("request")
+        )
@@ -0,0 +1,217 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from train_station.autocomplete import station_names
+from train_station.booking import TRIP_AVAILABILITY
+from train_station.distance_matrix import DistanceMatrix, distance_matrix
+from train_station.journeys import timetable
+from train_station.models import (
+    Crew,
+    Route,
+    SeatHold,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+    Trip,
+)
+from train_station.spatial import station_grid
+from train_station.station_graph import station_graph
+from train_station.versions import (
+    bump_object_versions,
+    bump_versions,
+    get_versions,
+)
+from train_station.seat_map import (
+    invalidate_seat_map,
+    invalidate_train_seat_maps,
+    mark_seats_released,
+    mark_seats_taken,
+)
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(partial(
+            mark_seats_taken,
+            instance.trip_id,
+            [(instance.cargo, instance.seat)]
+        ))
+    else:
+        transaction.on_commit(partial(invalidate_seat_map, instance.trip_id))
+    transaction.on_commit(partial(bump_versions, "ticket"))
+    transaction.on_commit(partial(
+        bump_object_versions, TRIP_AVAILABILITY, instance.trip_id
+    ))
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, **kwargs):
+    transaction.on_commit(partial(
+        mark_seats_released,
+        instance.trip_id,
+        [(instance.cargo, instance.seat)]
+    ))
+    transaction.on_commit(partial(bump_versions, "ticket"))
+    transaction.on_commit(partial(
+        bump_object_versions, TRIP_AVAILABILITY, instance.trip_id
+    ))
+
+
+@receiver(post_save, sender=SeatHold)
+@receiver(post_delete, sender=SeatHold)
+def seat_hold_changed(sender, instance, created=False, **kwargs):
+    transaction.on_commit(partial(bump_versions, "seathold"))
+    # a new hold has no seats yet, hold_seats bumps once they are added
+    if not created:
+        transaction.on_commit(partial(
+            bump_object_versions, TRIP_AVAILABILITY, instance.trip_id
+        ))
+
+
+@receiver(post_save, sender=Trip)
+def trip_saved(sender, instance, created, **kwargs):
+    if not created:
+        transaction.on_commit(partial(invalidate_seat_map, instance.id))
+    trip = (
+        instance.id,
+        instance.route_id,
+        instance.departure_time,
+        instance.arrival_time,
+    )
+    transaction.on_commit(partial(
+        _indexes_changed, sender,
+        [(timetable, lambda timetable: timetable.set_trip(*trip))]
+    ))
+
+
+@receiver(post_delete, sender=Trip)
+def trip_deleted(sender, instance, **kwargs):
+    trip_id = instance.id
+    transaction.on_commit(partial(invalidate_seat_map, trip_id))
+    transaction.on_commit(partial(
+        _indexes_changed, sender,
+        [(timetable, lambda timetable: timetable.remove_trip(trip_id))]
+    ))
+
+
+@receiver(m2m_changed, sender=Trip.crew.through)
+def trip_crew_changed(sender, action, **kwargs):
+    if action.startswith("post_"):
+        # the timetable does not depend on the crew, so keep it current
+        transaction.on_commit(partial(
+            _indexes_changed, Trip, [(timetable, lambda timetable: None)]
+        ))
+
+
+@receiver(post_save, sender=Train)
+def train_saved(sender, instance, created, **kwargs):
+    if not created:
+        transaction.on_commit(
+            partial(invalidate_train_seat_maps, instance.id)
+        )
+    transaction.on_commit(partial(bump_versions, "train"))
+
+
+@receiver(post_delete, sender=Train)
+def train_deleted(sender, instance, **kwargs):
+    transaction.on_commit(partial(bump_versions, "train"))
+
+
+@receiver(post_save, sender=TrainType)
+@receiver(post_delete, sender=TrainType)
+def train_type_changed(sender, **kwargs):
+    transaction.on_commit(partial(bump_versions, "traintype"))
+
+
+@receiver(post_save, sender=Crew)
+@receiver(post_delete, sender=Crew)
+def crew_changed(sender, **kwargs):
+    transaction.on_commit(partial(bump_versions, "crew"))
+
+
+def _indexes_changed(sender, updates):
+    """
+    Bump the change stamp of ``sender`` and apply the change to in-memory
+    indexes built from it, given as ``(index, apply)`` pairs
+    """
+    previous_versions = get_versions(
+        *{model for index, _ in updates for model in index.models}
+    )
+    versions = bump_versions(sender._meta.model_name)
+    for index, apply in updates:
+        index.update(previous_versions, versions, apply)
+
+
+@receiver(post_save, sender=Station)
+def station_saved(sender, instance, **kwargs):
+    station = (
+        instance.id, instance.name, instance.latitude, instance.longitude
+    )
+    transaction.on_commit(partial(
+        _indexes_changed, sender,
+        [
+            (station_graph, lambda graph: graph.set_station(*station)),
+            (station_grid, lambda grid: grid.set_station(*station)),
+            (
+                station_names,
+                lambda names: names.set_station(*station[:2])
+            ),
+            (distance_matrix, DistanceMatrix.refresh),
+        ]
+    ))
+
+
+@receiver(post_delete, sender=Station)
+def station_deleted(sender, instance, **kwargs):
+    station_id = instance.id
+    transaction.on_commit(partial(
+        _indexes_changed, sender,
+        [
+            (station_graph, lambda graph: graph.remove_station(station_id)),
+            (station_grid, lambda grid: grid.remove_station(station_id)),
+            (
+                station_names,
+                lambda names: names.remove_station(station_id)
+            ),
+            (distance_matrix, DistanceMatrix.refresh),
+        ]
+    ))
+
+
+@receiver(post_save, sender=Route)
+def route_saved(sender, instance, **kwargs):
+    route_id = instance.id
+    stations = (instance.source_station_id, instance.destination_station_id)
+    distance = instance.distance
+    transaction.on_commit(partial(
+        _indexes_changed, sender,
+        [
+            (
+                station_graph,
+                lambda graph: graph.set_route(route_id, *stations, distance)
+            ),
+            (
+                timetable,
+                lambda timetable: timetable.set_route(route_id, *stations)
+            ),
+            (distance_matrix, DistanceMatrix.refresh),
+        ]
+    ))
+
+
+@receiver(post_delete, sender=Route)
+def route_deleted(sender, instance, **kwargs):
+    route_id = instance.id
+    transaction.on_commit(partial(
+        _indexes_changed, sender,
+        [
+            (station_graph, lambda graph: graph.remove_route(route_id)),
+            (timetable, lambda timetable: timetable.remove_route(route_id)),
+            (distance_matrix, DistanceMatrix.refresh),
+        ]
+    ))
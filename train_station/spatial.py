@@ -0,0 +1,223 @@
+"""
+In-process spatial index for nearest-station queries.
+
+Station coordinates are converted from ``Decimal`` once, when the index is
+built or a station changes, and kept as float radians in NumPy arrays.
+A grid of ``GRID_CELL_DEGREES`` cells narrows a radius query down to the
+stations around the point; candidates are ranked with a vectorized
+haversine. Works on any database, no PostGIS needed.
+"""
+import math
+
+import numpy as np
+
+from train_station.models import Station
+from train_station.station_graph import EARTH_RADIUS_KM
+from train_station.versions import ProcessIndex
+
+
+GRID_CELL_DEGREES = 0.5
+LONGITUDE_CELLS = round(360 / GRID_CELL_DEGREES)
+
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """Distances from one point to arrays of points, all in radians"""
+    hav = (
+        np.sin((latitudes - latitude) / 2) ** 2
+        + np.cos(latitude) * np.cos(latitudes)
+        * np.sin((longitudes - longitude) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(hav, 1.0)))
+
+
+def _cell(latitude, longitude) -> tuple[int, int]:
+    return (
+        math.floor(latitude / GRID_CELL_DEGREES),
+        math.floor(longitude / GRID_CELL_DEGREES),
+    )
+
+
+def _add(stations, cells, station_id, name, latitude, longitude):
+    cell = _cell(float(latitude), float(longitude))
+    stations[station_id] = (name, latitude, longitude, cell)
+    cells[cell] = cells.get(cell, frozenset()) | {station_id}
+
+
+def _without(state, station_id) -> tuple:
+    """
+    A copy of the grid ``state`` without the station, with mutable
+    dictionaries for the caller to add to
+    """
+    stations, cells, ids, latitudes, longitudes, rows = state
+    stations, cells, rows = dict(stations), dict(cells), dict(rows)
+    row = rows.pop(station_id, None)
+    if row is None:
+        return stations, cells, ids, latitudes, longitudes, rows
+    *_, cell = stations.pop(station_id)
+    cells[cell] = cells[cell] - {station_id}
+    if not cells[cell]:
+        del cells[cell]
+
+    # move the last row into the gap
+    last = len(ids) - 1
+    ids, latitudes, longitudes = (
+        ids.copy(), latitudes.copy(), longitudes.copy()
+    )
+    if row != last:
+        ids[row] = ids[last]
+        latitudes[row] = latitudes[last]
+        longitudes[row] = longitudes[last]
+        rows[int(ids[row])] = row
+    return (
+        stations, cells, ids[:last], latitudes[:last], longitudes[:last], rows
+    )
+
+
+class StationGrid:
+    """
+    The index is one immutable state tuple, replaced as a whole when a
+    station changes, so queries running meanwhile in other threads read
+    either the old or the new state and never a mix of both.
+    """
+
+    def __init__(self, state=None):
+        # station id -> (name, latitude, longitude, cell); cell -> station
+        # ids; row -> station id; coordinates of row in radians; station
+        # id -> row
+        self._state = state or (
+            {}, {}, np.empty(0, dtype=np.int64), np.empty(0), np.empty(0), {}
+        )
+
+    @property
+    def stations(self) -> dict:
+        return self._state[0]
+
+    @classmethod
+    def load(cls):
+        stations = list(
+            Station.objects.order_by().values_list(
+                "id", "name", "latitude", "longitude"
+            )
+        )
+        details, cells, rows = {}, {}, {}
+        for row, (station_id, name, latitude, longitude) in enumerate(
+            stations
+        ):
+            rows[station_id] = row
+            _add(details, cells, station_id, name, latitude, longitude)
+        return cls((
+            details,
+            {cell: frozenset(ids) for cell, ids in cells.items()},
+            np.array([station[0] for station in stations], dtype=np.int64),
+            np.radians(np.array([float(station[2]) for station in stations])),
+            np.radians(np.array([float(station[3]) for station in stations])),
+            rows,
+        ))
+
+    def snapshot(self) -> "StationGrid":
+        """The index as it is now, unaffected by later changes"""
+        return StationGrid(self._state)
+
+    def __len__(self):
+        return len(self._state[5])
+
+    def set_station(self, station_id, name, latitude, longitude):
+        stations, cells, ids, latitudes, longitudes, rows = _without(
+            self._state, station_id
+        )
+        rows[station_id] = len(ids)
+        _add(stations, cells, station_id, name, latitude, longitude)
+        self._state = (
+            stations,
+            cells,
+            np.append(ids, station_id),
+            np.append(latitudes, math.radians(float(latitude))),
+            np.append(longitudes, math.radians(float(longitude))),
+            rows,
+        )
+
+    def remove_station(self, station_id):
+        if station_id in self._state[5]:
+            self._state = _without(self._state, station_id)
+
+    @staticmethod
+    def _candidate_rows(state, latitude, longitude, radius):
+        """Rows of stations in grid cells overlapping the radius, or None"""
+        _, cells, _, _, _, station_rows = state
+        angle = radius / EARTH_RADIUS_KM
+        latitude_span = math.degrees(angle)
+        if (
+            abs(latitude) + latitude_span >= 90
+            or math.sin(angle) >= math.cos(math.radians(latitude))
+        ):
+            return None
+        longitude_span = math.degrees(
+            math.asin(math.sin(angle) / math.cos(math.radians(latitude)))
+        )
+
+        first_row, first_column = _cell(
+            latitude - latitude_span, longitude - longitude_span
+        )
+        last_row, last_column = _cell(
+            latitude + latitude_span, longitude + longitude_span
+        )
+        columns = last_column - first_column + 1
+        if (
+            columns >= LONGITUDE_CELLS
+            or (last_row - first_row + 1) * columns > len(cells)
+        ):
+            return None
+
+        rows = []
+        for cell_row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                column = (
+                    (column + LONGITUDE_CELLS // 2) % LONGITUDE_CELLS
+                    - LONGITUDE_CELLS // 2
+                )
+                rows.extend(
+                    station_rows[station_id]
+                    for station_id in cells.get((cell_row, column), ())
+                )
+        return np.array(rows, dtype=np.int64)
+
+    def nearby(self, latitude, longitude, radius=None, limit=10):
+        """
+        Return up to ``limit`` ``(station id, distance in km)`` pairs
+        closest to the point, nearest first, only within ``radius`` km
+        when it is given.
+        """
+        state = self._state
+        _, _, ids, latitudes, longitudes, _ = state
+        rows = None
+        if radius is not None:
+            rows = self._candidate_rows(state, latitude, longitude, radius)
+        if rows is None:
+            rows = np.arange(len(ids))
+        if not len(rows):
+            return []
+
+        distances = haversine_km(
+            math.radians(latitude),
+            math.radians(longitude),
+            latitudes[rows],
+            longitudes[rows],
+        )
+        if radius is not None:
+            within = distances <= radius
+            rows, distances = rows[within], distances[within]
+        if len(rows) > limit:
+            closest = np.argpartition(distances, limit - 1)[:limit]
+            rows, distances = rows[closest], distances[closest]
+        order = np.argsort(distances, kind="stable")
+        return [
+            (int(ids[row]), float(distance))
+            for row, distance in zip(rows[order], distances[order])
+        ]
+
+
+station_grid = ProcessIndex(StationGrid.load, ("station",))
+
+
+def get_station_grid() -> StationGrid:
+    return station_grid.get()
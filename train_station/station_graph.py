@@ -0,0 +1,194 @@
+"""
+In-memory directed graph of stations connected by routes.
+
+The graph is loaded from the database once per process and then kept up
+to date by model signals. Changes made by other processes are noticed
+through the ``station``/``route`` change stamps and trigger a reload.
+"""
+import heapq
+import math
+
+from train_station.models import Route, Station
+from train_station.versions import ProcessIndex
+
+
+EARTH_RADIUS_KM = 6371.0088
+GRAPH_MODELS = ("station", "route")
+
+
+def great_circle_km(first, second) -> float:
+    """Haversine distance between two (latitude, longitude) radian pairs"""
+    (lat1, lon1), (lat2, lon2) = first, second
+    hav = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(hav)))
+
+
+class StationGraph:
+    def __init__(self):
+        self.names = {}
+        self.coordinates = {}
+        # source -> {destination: (distance, route id)}
+        self.edges = {}
+        self.routes = {}
+        self._heuristic_scale = None
+
+    @classmethod
+    def load(cls):
+        graph = cls()
+        for station_id, name, latitude, longitude in (
+            Station.objects.order_by().values_list(
+                "id", "name", "latitude", "longitude"
+            )
+        ):
+            graph.set_station(station_id, name, latitude, longitude)
+        for route_id, source_id, destination_id, distance in (
+            Route.objects.order_by().values_list(
+                "id", "source_station_id", "destination_station_id",
+                "distance"
+            )
+        ):
+            graph.set_route(route_id, source_id, destination_id, distance)
+        return graph
+
+    def set_station(self, station_id, name, latitude, longitude):
+        self.names[station_id] = name
+        self.coordinates[station_id] = (
+            math.radians(float(latitude)), math.radians(float(longitude))
+        )
+        self._heuristic_scale = None
+
+    def remove_station(self, station_id):
+        self.names.pop(station_id, None)
+        self.coordinates.pop(station_id, None)
+        for route_id, (source_id, destination_id) in list(
+            self.routes.items()
+        ):
+            if station_id in (source_id, destination_id):
+                self.remove_route(route_id)
+
+    def set_route(self, route_id, source_id, destination_id, distance):
+        self.remove_route(route_id)
+        self.routes[route_id] = (source_id, destination_id)
+        self.edges.setdefault(source_id, {})[destination_id] = (
+            distance, route_id
+        )
+        if self._heuristic_scale is not None:
+            self._heuristic_scale = min(
+                self._heuristic_scale,
+                self._edge_scale(source_id, destination_id, distance)
+            )
+
+    def remove_route(self, route_id):
+        source_id, destination_id = self.routes.pop(route_id, (None, None))
+        edges = self.edges.get(source_id, {})
+        if edges.get(destination_id, (None, None))[1] == route_id:
+            del edges[destination_id]
+
+    def _edge_scale(self, source_id, destination_id, distance) -> float:
+        if not (
+            source_id in self.coordinates
+            and destination_id in self.coordinates
+        ):
+            return 0.0
+        straight = great_circle_km(
+            self.coordinates[source_id], self.coordinates[destination_id]
+        )
+        return 1.0 if straight == 0 else min(1.0, distance / straight)
+
+    @property
+    def heuristic_scale(self) -> float:
+        """
+        Largest factor keeping the straight-line heuristic admissible:
+        no route may be shorter than its scaled great-circle distance.
+        """
+        if self._heuristic_scale is None:
+            self._heuristic_scale = min(
+                (
+                    self._edge_scale(source_id, destination_id, distance)
+                    for source_id, edges in self.edges.items()
+                    for destination_id, (distance, _) in edges.items()
+                ),
+                default=1.0,
+            )
+        return self._heuristic_scale
+
+    def distances_from(self, source_id) -> dict:
+        """Network distance from ``source_id`` to every reachable station"""
+        distances = {source_id: 0}
+        queue = [(0, source_id)]
+        while queue:
+            distance, station_id = heapq.heappop(queue)
+            if distance > distances[station_id]:
+                continue
+            for destination_id, (length, _) in self.edges.get(
+                station_id, {}
+            ).items():
+                new_distance = distance + length
+                if new_distance < distances.get(destination_id, math.inf):
+                    distances[destination_id] = new_distance
+                    heapq.heappush(queue, (new_distance, destination_id))
+        return distances
+
+    def shortest_path(self, source_id, target_id, algorithm="astar"):
+        """
+        Return ``(distance, station ids, route ids)`` of the shortest path,
+        or None if ``target_id`` cannot be reached. ``astar`` guides the
+        search with the great-circle distance to the target; ``dijkstra``
+        explores by distance alone.
+        """
+        if source_id not in self.names or target_id not in self.names:
+            return None
+
+        if algorithm == "astar":
+            scale = self.heuristic_scale
+            target = self.coordinates[target_id]
+            coordinates = self.coordinates
+
+            def heuristic(station_id):
+                return scale * great_circle_km(
+                    coordinates[station_id], target
+                )
+        else:
+            def heuristic(station_id):
+                return 0
+
+        distances = {source_id: 0}
+        previous = {}
+        queue = [(heuristic(source_id), 0, source_id)]
+        while queue:
+            _, distance, station_id = heapq.heappop(queue)
+            if station_id == target_id:
+                break
+            if distance > distances[station_id]:
+                continue
+            for destination_id, (length, route_id) in self.edges.get(
+                station_id, {}
+            ).items():
+                new_distance = distance + length
+                if new_distance < distances.get(destination_id, math.inf):
+                    distances[destination_id] = new_distance
+                    previous[destination_id] = (station_id, route_id)
+                    heapq.heappush(queue, (
+                        new_distance + heuristic(destination_id),
+                        new_distance,
+                        destination_id,
+                    ))
+        else:
+            return None
+
+        stations, routes = [target_id], []
+        while stations[-1] != source_id:
+            station_id, route_id = previous[stations[-1]]
+            stations.append(station_id)
+            routes.append(route_id)
+        return distances[target_id], stations[::-1], routes[::-1]
+
+
+station_graph = ProcessIndex(StationGraph.load, GRAPH_MODELS)
+
+
+def get_station_graph() -> StationGraph:
+    return station_graph.get()
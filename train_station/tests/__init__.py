@@ -0,0 +1,5 @@
+# Tests asserting that a warm path runs no query use a cache in process
+# memory, as the shared cache of the settings may be a database table
+LOCAL_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
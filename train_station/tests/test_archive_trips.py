@@ -0,0 +1,258 @@
+import io
+from datetime import datetime, timedelta, timezone
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.archive import (
+    _is_partitioned,
+    archive_trips,
+    partition_archived_tickets,
+)
+from train_station.models import (
+    ArchivedTicket,
+    ArchivedTrip,
+    Crew,
+    Order,
+    OrderRequest,
+    Route,
+    SeatHold,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+    Trip,
+)
+from train_station.versions import get_versions
+
+
+ORDER_URL = reverse("train_station:order-list")
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class ArchiveTripsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="test_password"
+        )
+        kyiv = Station.objects.create(
+            name="Kyiv", latitude=50.45, longitude=30.52
+        )
+        lviv = Station.objects.create(
+            name="Lviv", latitude=49.84, longitude=24.03
+        )
+        self.route = Route.objects.create(
+            source_station=kyiv, destination_station=lviv, distance=540
+        )
+        self.train = Train.objects.create(
+            name="IC-743",
+            cargo_num=5,
+            places_in_cargo=40,
+            train_type=TrainType.objects.create(name="Intercity")
+        )
+        self.crew = Crew.objects.create(
+            first_name="Taras", last_name="Shevchenko"
+        )
+        self.order = Order.objects.create(customer=self.user)
+        self.past = [
+            self.create_trip(utc(2020, 1, day, 6), tickets=2)
+            for day in (1, 2, 3)
+        ]
+        self.future = self.create_trip(
+            datetime.now(timezone.utc) + timedelta(days=1), tickets=1
+        )
+
+    def create_trip(self, departure_time, tickets):
+        trip = Trip.objects.create(
+            route=self.route,
+            train=self.train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5)
+        )
+        trip.crew.add(self.crew)
+        for seat in range(1, tickets + 1):
+            Ticket.objects.create(
+                cargo=1, seat=seat, trip=trip, order=self.order
+            )
+        return trip
+
+    def archive(self, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return archive_trips(*args, **kwargs)
+
+    def test_archive_trips(self):
+        self.assertEqual(self.archive(utc(2020, 1, 3)), (2, 4))
+
+        self.assertEqual(
+            list(Trip.objects.order_by("departure_time")),
+            [self.past[2], self.future]
+        )
+        self.assertEqual(Ticket.objects.count(), 3)
+        trip = ArchivedTrip.objects.get(id=self.past[0].id)
+        self.assertEqual(
+            (trip.route, trip.train, trip.departure_time, trip.arrival_time),
+            (self.route, self.train, self.past[0].departure_time,
+             self.past[0].arrival_time)
+        )
+        self.assertEqual(list(trip.crew.all()), [self.crew])
+        self.assertEqual(
+            list(trip.tickets.values_list(
+                "cargo", "seat", "order", "departure_time"
+            )),
+            [(1, 1, self.order.id, trip.departure_time),
+             (1, 2, self.order.id, trip.departure_time)]
+        )
+
+    def test_completed_trips_only(self):
+        self.assertEqual(
+            self.archive(utc(2100, 1, 1), chunk_size=2), (3, 6)
+        )
+
+        self.assertEqual(list(Trip.objects.all()), [self.future])
+        self.assertEqual(self.archive(utc(2100, 1, 1)), (0, 0))
+
+    def test_chunks(self):
+        progress = []
+
+        self.archive(
+            utc(2020, 2, 1),
+            chunk_size=2,
+            progress=lambda *totals: progress.append(totals)
+        )
+
+        self.assertEqual(progress, [(2, 4), (3, 6)])
+
+    def test_holds_and_finished_requests_are_deleted(self):
+        trip = self.past[0]
+        SeatHold.objects.create(
+            customer=self.user, trip=trip, expires_at=utc(2020, 1, 1)
+        )
+        OrderRequest.objects.create(
+            customer=self.user, trip=trip, tickets=[],
+            status=OrderRequest.Status.DONE
+        )
+
+        self.archive(utc(2020, 2, 1))
+
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertFalse(OrderRequest.objects.exists())
+
+    def test_trips_with_open_requests_are_kept(self):
+        trip = self.past[0]
+        order_request = OrderRequest.objects.create(
+            customer=self.user, trip=trip, tickets=[]
+        )
+
+        self.assertEqual(self.archive(utc(2020, 2, 1)), (2, 4))
+        self.assertEqual(Trip.objects.filter(id=trip.id).count(), 1)
+        self.assertEqual(
+            OrderRequest.objects.get().status, OrderRequest.Status.PENDING
+        )
+
+        order_request.status = OrderRequest.Status.FAILED
+        order_request.save()
+
+        self.assertEqual(self.archive(utc(2020, 2, 1)), (1, 2))
+
+    def test_trips_of_today_are_kept(self):
+        # Jan 3 2020 starts at Jan 2 22:00 UTC in Kyiv
+        with patch(
+            "django.utils.timezone.now", return_value=utc(2020, 1, 3, 18)
+        ):
+            self.assertEqual(self.archive(utc(2100, 1, 1)), (2, 4))
+
+        self.assertIn(self.past[2], Trip.objects.all())
+
+    def test_versions(self):
+        versions = get_versions("trip", "ticket")
+
+        self.archive(utc(2020, 2, 1))
+
+        new_versions = get_versions("trip", "ticket")
+        self.assertNotEqual(new_versions["trip"], versions["trip"])
+        self.assertNotEqual(new_versions["ticket"], versions["ticket"])
+
+    @skipUnless(connection.vendor == "sqlite", "SQLite only")
+    def test_not_partitioned_on_sqlite(self):
+        self.assertFalse(partition_archived_tickets())
+        with self.assertRaises(CommandError):
+            call_command("partition_archived_tickets", stdout=io.StringIO())
+
+    @skipUnless(connection.vendor == "postgresql", "PostgreSQL only")
+    def test_partitioned_on_postgresql(self):
+        call_command("partition_archived_tickets", stdout=io.StringIO())
+
+        self.assertTrue(_is_partitioned(ArchivedTicket))
+        self.assertEqual(self.archive(utc(2020, 1, 3)), (2, 4))
+        self.assertEqual(
+            list(ArchivedTicket.objects.values_list("trip", flat=True)),
+            [self.past[0].id] * 2 + [self.past[1].id] * 2
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_inherits "
+                "WHERE inhparent = %s::regclass",
+                [ArchivedTicket._meta.db_table],
+            )
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_order_history(self):
+        self.archive(utc(2020, 1, 3))
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.get(ORDER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        order = res.data["results"][0]
+        self.assertEqual(len(order["tickets"]), 3)
+        self.assertEqual(len(order["archived_tickets"]), 4)
+        self.assertEqual(
+            order["archived_tickets"][0]["trip"],
+            {
+                "id": self.past[0].id,
+                "train": "IC-743",
+                "route": "Kyiv - Lviv",
+                "crew": ["Taras Shevchenko"],
+                "departure_time": "2020-01-01T08:00:00+02:00",
+                "arrival_time": "2020-01-01T13:00:00+02:00",
+            }
+        )
+
+        res = client.get(
+            ORDER_URL, {"fields": "id,archived_tickets.seat"}
+        )
+
+        self.assertEqual(
+            res.data["results"][0]["archived_tickets"][:2],
+            [{"seat": 1}, {"seat": 2}]
+        )
+
+    def test_command(self):
+        out = io.StringIO()
+
+        call_command(
+            "archive_trips", before="2020-01-03", verbosity=2, stdout=out
+        )
+
+        self.assertIn("2 trips, 4 tickets", out.getvalue())
+        self.assertIn("Archived 2 trips, 4 tickets", out.getvalue())
+        self.assertEqual(ArchivedTrip.objects.count(), 2)
+        self.assertEqual(ArchivedTicket.objects.count(), 4)
+
+    def test_command_invalid_date(self):
+        with self.assertRaises(CommandError):
+            call_command("archive_trips", before="2020-13-01")
@@ -0,0 +1,205 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.journeys import timetable
+from train_station.models import (
+    Crew,
+    Route,
+    Station,
+    Train,
+    TrainType,
+    Trip,
+)
+from train_station.versions import get_versions
+from train_station.tests import LOCAL_CACHES
+
+
+STATION_URL = reverse("train_station:station-list")
+TRAIN_URL = reverse("train_station:train-list")
+TRAIN_TYPE_URL = reverse("train_station:traintype-list")
+ROUTE_URL = reverse("train_station:route-list")
+
+
+def station_detail_url(station_id):
+    return reverse("train_station:station-detail", args=(station_id,))
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ConditionalGetApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kyiv = Station.objects.create(
+                name="Kyiv", latitude=50.45, longitude=30.52
+            )
+            self.lviv = Station.objects.create(
+                name="Lviv", latitude=49.84, longitude=24.03
+            )
+            self.route = Route.objects.create(
+                source_station=self.kyiv,
+                destination_station=self.lviv,
+                distance=540
+            )
+            self.train_type = TrainType.objects.create(name="Intercity")
+            self.train = Train.objects.create(
+                name="Hyundai",
+                cargo_num=5,
+                places_in_cargo=50,
+                train_type=self.train_type
+            )
+
+    def revalidate(self, url, **headers):
+        return self.client.get(url, headers=headers)
+
+    def assert_not_modified(self, url):
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            cached = self.revalidate(url, if_none_match=res["ETag"])
+
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(cached["ETag"], res["ETag"])
+        return res["ETag"]
+
+    def assert_modified(self, url, etag):
+        res = self.revalidate(url, if_none_match=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_not_modified(self):
+        for url in (
+            STATION_URL,
+            station_detail_url(self.kyiv.id),
+            TRAIN_URL,
+            ROUTE_URL,
+        ):
+            with self.subTest(url=url):
+                self.assert_not_modified(url)
+
+    def test_if_modified_since_is_not_evaluated(self):
+        res = self.client.get(STATION_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            Station.objects.create(
+                name="Odesa", latitude=46.48, longitude=30.72
+            )
+
+        res = self.revalidate(
+            STATION_URL, if_modified_since=res["Last-Modified"]
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 3)
+
+    def test_last_modified_is_not_before_change(self):
+        timestamp = get_versions("station")["station"][1]
+
+        res = self.client.get(STATION_URL)
+
+        self.assertGreaterEqual(
+            parse_http_date(res["Last-Modified"]), timestamp
+        )
+
+    def test_query_params_have_own_etag(self):
+        etag = self.client.get(STATION_URL)["ETag"]
+
+        self.assertNotEqual(
+            self.client.get(STATION_URL, {"limit": 1})["ETag"], etag
+        )
+
+    def test_create_update_delete_invalidate(self):
+        etag = self.assert_not_modified(STATION_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            odesa = Station.objects.create(
+                name="Odesa", latitude=46.48, longitude=30.72
+            )
+        self.assert_modified(STATION_URL, etag)
+
+        etag = self.assert_not_modified(STATION_URL)
+        odesa.name = "Odessa"
+        with self.captureOnCommitCallbacks(execute=True):
+            odesa.save()
+        self.assert_modified(STATION_URL, etag)
+
+        etag = self.assert_not_modified(STATION_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            odesa.delete()
+        self.assert_modified(STATION_URL, etag)
+
+    def test_related_changes_invalidate(self):
+        train_etag = self.assert_not_modified(TRAIN_URL)
+        route_etag = self.assert_not_modified(ROUTE_URL)
+
+        self.train_type.name = "Regional"
+        self.kyiv.name = "Kyiv-Pasazhyrskyi"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.train_type.save()
+            self.kyiv.save()
+
+        self.assert_modified(TRAIN_URL, train_etag)
+        self.assert_modified(ROUTE_URL, route_etag)
+
+    def test_train_type_list(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="admin@admin.com",
+                password="admin_password",
+                is_staff=True
+            )
+        )
+        etag = self.client.get(TRAIN_TYPE_URL)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            TrainType.objects.create(name="Regional")
+
+        self.assert_modified(TRAIN_TYPE_URL, etag)
+
+    @override_settings(CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "train_station_cache",
+        }
+    })
+    def test_not_modified_with_database_cache(self):
+        call_command("createcachetable")
+        cache.clear()
+        res = self.client.get(STATION_URL)
+
+        # the stamps are read from the cache table, the stations are not
+        with self.assertNumQueries(1):
+            cached = self.revalidate(STATION_URL, if_none_match=res["ETag"])
+
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_crew_change_bumps_trip_stamp(self):
+        departure_time = timezone.make_aware(datetime(2030, 1, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            trip = Trip.objects.create(
+                route=self.route,
+                train=self.train,
+                departure_time=departure_time,
+                arrival_time=departure_time + timedelta(hours=6)
+            )
+        crew = Crew.objects.create(first_name="Lesia", last_name="Ukrainka")
+        loaded = timetable.get()
+        version = get_versions("trip")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            trip.crew.add(crew)
+        self.assertNotEqual(get_versions("trip"), version)
+        version = get_versions("trip")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            crew.trips.remove(trip)
+        self.assertNotEqual(get_versions("trip"), version)
+        self.assertIs(timetable.get(), loaded)
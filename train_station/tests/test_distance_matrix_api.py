@@ -0,0 +1,133 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.distance_matrix import DistanceMatrix, get_distance_matrix
+from train_station.models import Route, Station
+from train_station.tests import LOCAL_CACHES
+
+
+DISTANCE_URL = reverse("train_station:route-distance")
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class DistanceMatrixApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "distances.npz")
+        settings_override = override_settings(DISTANCE_MATRIX_PATH=self.path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="test@test.com",
+                password="test_password"
+            )
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            (
+                self.kyiv, self.lviv, self.rivne, self.kharkiv, self.poltava
+            ) = [
+                Station.objects.create(
+                    name=name, latitude=latitude, longitude=longitude
+                )
+                for name, latitude, longitude in (
+                    ("Kyiv", 50.45, 30.52),
+                    ("Lviv", 49.84, 24.03),
+                    ("Rivne", 50.62, 26.25),
+                    ("Kharkiv", 49.99, 36.23),
+                    ("Poltava", 49.59, 34.55),
+                )
+            ]
+            self.route(self.kyiv, self.rivne, 330)
+            self.shortcut = self.route(self.rivne, self.lviv, 210)
+            self.route(self.kyiv, self.lviv, 600)
+            self.route(self.lviv, self.kyiv, 570)
+            self.route(self.kharkiv, self.poltava, 140)
+
+    def route(self, source, destination, distance):
+        return Route.objects.create(
+            source_station=source,
+            destination_station=destination,
+            distance=distance
+        )
+
+    def get_distance(self, source, destination):
+        return self.client.get(
+            DISTANCE_URL, {"from": source.id, "to": destination.id}
+        )
+
+    def test_distance(self):
+        res = self.get_distance(self.kyiv, self.lviv)
+        back = self.get_distance(self.lviv, self.rivne)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["distance"], 540)
+        self.assertEqual(back.data["distance"], 900)
+
+    def test_unreachable(self):
+        other_component = self.get_distance(self.kyiv, self.kharkiv)
+        wrong_direction = self.get_distance(self.poltava, self.kharkiv)
+        missing = self.client.get(DISTANCE_URL, {"from": self.kyiv.id})
+
+        self.assertEqual(
+            other_component.status_code, status.HTTP_404_NOT_FOUND
+        )
+        self.assertEqual(
+            wrong_direction.status_code, status.HTTP_404_NOT_FOUND
+        )
+        self.assertEqual(missing.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_route_change_drops_only_its_component(self):
+        self.get_distance(self.kyiv, self.lviv)
+        self.get_distance(self.kharkiv, self.poltava)
+        matrix = get_distance_matrix()
+        kharkiv_component = matrix.component_of[self.kharkiv.id]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shortcut.distance = 100
+            self.shortcut.save()
+
+        with self.assertNumQueries(0):
+            res = self.get_distance(self.kyiv, self.lviv)
+
+        self.assertEqual(res.data["distance"], 430)
+        self.assertIs(get_distance_matrix(), matrix)
+        self.assertIs(matrix.component_of[self.kharkiv.id], kharkiv_component)
+        self.assertEqual(len(kharkiv_component.rows), 1)
+
+    def test_components_merged(self):
+        self.get_distance(self.kyiv, self.lviv)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.route(self.lviv, self.kharkiv, 1000)
+
+        res = self.get_distance(self.kyiv, self.poltava)
+
+        self.assertEqual(res.data["distance"], 1680)
+
+    def test_rebuild_command_persists_matrix(self):
+        call_command("rebuild_distance_matrix", stdout=open(os.devnull, "w"))
+        cache.clear()
+
+        matrix = DistanceMatrix.load()
+
+        self.assertTrue(
+            all(component.complete for component in matrix.components)
+        )
+        with mock.patch(
+            "train_station.station_graph.StationGraph.distances_from"
+        ) as distances_from:
+            self.assertEqual(matrix.distance(self.rivne.id, self.kyiv.id), 780)
+        distances_from.assert_not_called()
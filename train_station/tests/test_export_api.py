@@ -0,0 +1,161 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.exports import export
+from train_station.models import (
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+    Trip,
+)
+
+
+DEPARTURE_TIME = datetime(2030, 1, 1, 8, 15, tzinfo=timezone.utc)
+
+
+def export_url(name):
+    return reverse("train_station:export-detail", args=(name,))
+
+
+class ExportApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            email="admin@admin.com",
+            password="admin_password",
+            is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+
+        route = Route.objects.create(
+            source_station=Station.objects.create(
+                name="Kyiv", latitude=50.45, longitude=30.52
+            ),
+            destination_station=Station.objects.create(
+                name="Lviv, Main", latitude=49.84, longitude=24.03
+            ),
+            distance=540
+        )
+        train_type = TrainType.objects.create(name="Intercity")
+        self.trips = [
+            Trip.objects.create(
+                route=route,
+                train=Train.objects.create(
+                    name=f"Train {number}",
+                    cargo_num=2,
+                    places_in_cargo=10,
+                    train_type=train_type
+                ),
+                departure_time=DEPARTURE_TIME + timedelta(days=number),
+                arrival_time=DEPARTURE_TIME + timedelta(days=number, hours=6)
+            )
+            for number in range(3)
+        ]
+        self.order = Order.objects.create(customer=self.admin)
+        for seat in range(1, 6):
+            Ticket.objects.create(
+                order=self.order, trip=self.trips[seat % 3], cargo=1,
+                seat=seat
+            )
+
+    def content(self, res):
+        return b"".join(res.streaming_content).decode()
+
+    def test_ndjson(self):
+        res = self.client.get(export_url("trips"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in self.content(res).splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0], {
+            "id": self.trips[0].id,
+            "route": self.trips[0].route_id,
+            "source_station": "Kyiv",
+            "destination_station": "Lviv, Main",
+            "train": "Train 0",
+            "departure_time": "2030-01-01T08:15:00Z",
+            "arrival_time": "2030-01-01T14:15:00Z",
+        })
+
+    def test_csv(self):
+        res = self.client.get(export_url("tickets"), {"output": "csv"})
+
+        self.assertEqual(res["Content-Type"], "text/csv")
+        self.assertIn("tickets.csv", res["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(self.content(res))))
+        self.assertEqual(
+            [(row["trip"], row["seat"]) for row in rows],
+            [
+                (str(self.trips[seat % 3].id), str(seat))
+                for seat in range(1, 6)
+            ]
+        )
+        self.assertEqual(rows[0]["customer"], "admin@admin.com")
+
+    def test_empty_csv_has_header(self):
+        Ticket.objects.all().delete()
+
+        res = self.client.get(export_url("tickets"), {"output": "csv"})
+
+        self.assertEqual(
+            self.content(res),
+            "id,order,customer,ordered_at,trip,departure_time,cargo,seat\r\n"
+        )
+
+    def test_chunks_do_not_change_output(self):
+        for output in ("ndjson", "csv"):
+            with self.subTest(output=output):
+                self.assertEqual(
+                    b"".join(export("tickets", output, chunk_size=2)),
+                    b"".join(export("tickets", output))
+                )
+
+    def test_invalid_output(self):
+        res = self.client.get(export_url("orders"), {"output": "xml"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="test@test.com",
+                password="test_password"
+            )
+        )
+
+        res = self.client.get(export_url("orders"))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command("export", "orders", stdout=out)
+
+        self.assertEqual(
+            [json.loads(line)["id"] for line in out.getvalue().splitlines()],
+            [self.order.id]
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tickets.csv")
+            call_command(
+                "export", "tickets", output="csv", path=path,
+                stderr=io.StringIO()
+            )
+            with open(path) as file:
+                self.assertEqual(len(file.read().splitlines()), 6)
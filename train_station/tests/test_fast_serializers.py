@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.fast_serializers import TripListFastSerializer
+from train_station.models import (
+    Crew,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+    Trip,
+)
+from train_station.serializers import TripListSerializer
+
+
+TRIP_URL = reverse("train_station:trip-list")
+FIRST_DAY = timezone.make_aware(datetime(2030, 3, 30, 23, 30, 15, 250))
+
+
+class TripListFastSerializerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="test_password"
+        )
+        self.client.force_authenticate(user)
+
+        stations = [
+            Station.objects.create(
+                name=name, latitude=latitude, longitude=longitude
+            )
+            for name, latitude, longitude in (
+                ("Kyiv", 50.45, 30.52),
+                ("Lviv", 49.84, 24.03),
+                ("Ivano-Frankivsk", 48.92, 24.71),
+            )
+        ]
+        routes = [
+            Route.objects.create(
+                source_station=source,
+                destination_station=destination,
+                distance=500
+            )
+            for source, destination in (
+                (stations[0], stations[1]),
+                (stations[1], stations[2]),
+                (stations[2], stations[0]),
+            )
+        ]
+        train_type = TrainType.objects.create(name="Intercity")
+        crew = [
+            Crew.objects.create(first_name=first_name, last_name=last_name)
+            for first_name, last_name in (
+                ("Taras", "Shevchenko"),
+                ("Lesia", "Ukrainka"),
+                ("Ivan", "Franko"),
+            )
+        ]
+        order = Order.objects.create(customer=user)
+        # departures cross the daylight saving change and midnight UTC
+        for number in range(9):
+            departure_time = FIRST_DAY + timedelta(hours=7 * number)
+            trip = Trip.objects.create(
+                route=routes[number % 3],
+                train=Train.objects.create(
+                    name=f"Train {number}",
+                    cargo_num=1 + number % 3,
+                    places_in_cargo=10,
+                    train_type=train_type
+                ),
+                departure_time=departure_time,
+                arrival_time=departure_time + timedelta(minutes=95)
+            )
+            trip.crew.set(crew[:number % 4])
+            for seat in range(1, number % 4 + 1):
+                Ticket.objects.create(
+                    order=order, trip=trip, cargo=1, seat=seat
+                )
+
+    def assert_same_data(self):
+        queryset = Trip.objects.with_tickets_available().order_by(
+            "departure_time"
+        )
+
+        self.assertEqual(
+            TripListFastSerializer(
+                TripListFastSerializer.values(queryset), many=True
+            ).data,
+            TripListSerializer(queryset, many=True).data
+        )
+
+    def test_same_data(self):
+        self.assert_same_data()
+
+    def test_same_data_in_utc(self):
+        with timezone.override("UTC"):
+            self.assert_same_data()
+
+    def test_same_data_empty(self):
+        queryset = Trip.objects.with_tickets_available().none()
+
+        self.assertEqual(
+            TripListFastSerializer(
+                TripListFastSerializer.values(queryset), many=True
+            ).data,
+            []
+        )
+
+    def test_same_api_responses(self):
+        for params in (
+            {},
+            {"ordering": "-tickets_available"},
+            {"min_tickets_available": 15, "limit": 2, "offset": 1},
+            {"source": Station.objects.get(name="Lviv").id},
+            {"pagination": "keyset", "limit": 4},
+        ):
+            with self.subTest(**params):
+                with override_settings(TRIP_LIST_FAST_PATH=False):
+                    expected = self.client.get(TRIP_URL, params)
+                res = self.client.get(TRIP_URL, params)
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(res.json(), expected.json())
+                if res.data.get("next"):
+                    self.assertEqual(
+                        self.client.get(res.data["next"]).json(),
+                        self.client.get(expected.data["next"]).json()
+                    )
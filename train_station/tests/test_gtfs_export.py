@@ -0,0 +1,182 @@
+import csv
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from train_station.gtfs_export import GTFS_MEMBERS, export_gtfs
+from train_station.models import Route, Station, Train, TrainType, Trip
+from train_station.timetable_import import import_timetable, read_gtfs
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class GTFSExportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "gtfs.zip")
+
+        kyiv, lviv, odesa = (
+            Station.objects.create(
+                name=name, latitude=latitude, longitude=longitude
+            )
+            for name, latitude, longitude in (
+                ("Kyiv", "50.4501", "30.5234"),
+                ("Lviv", "49.839683", "24.029717"),
+                ("Odesa", "46.482526", "30.7233095"),
+            )
+        )
+        routes = [
+            Route.objects.create(
+                source_station=source,
+                destination_station=destination,
+                distance=distance
+            )
+            for source, destination, distance in (
+                (kyiv, lviv, 540),
+                (lviv, odesa, 790),
+            )
+        ]
+        train_type = TrainType.objects.create(name="Intercity")
+        # Kyiv time is UTC+2 in winter
+        for number, (route, departure_time, arrival_time) in enumerate((
+            (routes[0], utc(2030, 1, 1, 6), utc(2030, 1, 1, 11, 15, 30)),
+            (routes[0], utc(2030, 1, 1, 21, 30), utc(2030, 1, 2, 4, 40)),
+            (routes[1], utc(2030, 1, 1, 22, 30), utc(2030, 1, 2, 8)),
+        )):
+            Trip.objects.create(
+                route=route,
+                train=Train.objects.create(
+                    name=f"{number + 1}K", cargo_num=5,
+                    train_type=train_type
+                ),
+                departure_time=departure_time,
+                arrival_time=arrival_time
+            )
+
+    def read(self, name):
+        with zipfile.ZipFile(self.path) as archive:
+            return list(csv.reader(
+                io.TextIOWrapper(archive.open(name), encoding="utf-8")
+            ))
+
+    def snapshot(self):
+        return (
+            set(Station.objects.values_list(
+                "name", "latitude", "longitude"
+            )),
+            set(Route.objects.values_list(
+                "source_station__name", "destination_station__name",
+                "distance"
+            )),
+            set(Trip.objects.values_list(
+                "route__source_station__name",
+                "route__destination_station__name",
+                "train__name",
+                "departure_time",
+                "arrival_time",
+            )),
+        )
+
+    def test_members(self):
+        self.assertEqual(export_gtfs(self.path), list(GTFS_MEMBERS))
+
+        night = Trip.objects.get(train__name="2K")
+        self.assertIn(
+            [str(night.id), "30:40:00", "30:40:00",
+             str(night.route.destination_station_id), "2", "540"],
+            self.read("stop_times.txt")
+        )
+        self.assertEqual(
+            [row[1:] for row in self.read("trips.txt")[1:]],
+            [
+                ["20300101", str(trip_id), name]
+                if name != "3K" else ["20300102", str(trip_id), name]
+                for trip_id, name in Trip.objects.order_by("pk")
+                .values_list("id", "train__name")
+            ]
+        )
+        self.assertEqual(
+            self.read("calendar_dates.txt")[1:],
+            [["20300101", "20300101", "1"], ["20300102", "20300102", "1"]]
+        )
+        self.assertEqual(self.read("agency.txt")[1][-1], "Europe/Kiev")
+
+    def test_round_trip(self):
+        expected = self.snapshot()
+        export_gtfs(self.path)
+        Station.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            import_timetable(read_gtfs(self.path))
+
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_incremental(self):
+        export_gtfs(self.path)
+        trips = self.read("trips.txt")
+
+        self.assertEqual(export_gtfs(self.path), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            station = Station.objects.get(name="Odesa")
+            station.name = "Odesa-Holovna"
+            station.save()
+
+        self.assertEqual(
+            export_gtfs(self.path), ["stops.txt", "routes.txt"]
+        )
+        self.assertIn("Lviv - Odesa-Holovna",
+                      [row[2] for row in self.read("routes.txt")])
+        self.assertEqual(self.read("trips.txt"), trips)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Trip.objects.first().delete()
+
+        self.assertEqual(
+            export_gtfs(self.path),
+            ["trips.txt", "stop_times.txt", "calendar_dates.txt"]
+        )
+        self.assertEqual(len(self.read("trips.txt")), 3)
+
+    def test_full_rebuild(self):
+        export_gtfs(self.path)
+
+        self.assertEqual(export_gtfs(self.path, full=True),
+                         list(GTFS_MEMBERS))
+
+    def test_cache_cleared_between_exports(self):
+        export_gtfs(self.path)
+
+        # as a new process with nothing cached would see it
+        cache.clear()
+
+        self.assertEqual(export_gtfs(self.path), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Trip.objects.first().delete()
+        cache.clear()
+
+        self.assertEqual(
+            export_gtfs(self.path),
+            ["trips.txt", "stop_times.txt", "calendar_dates.txt"]
+        )
+
+    def test_command(self):
+        out = io.StringIO()
+
+        call_command("export_gtfs", path=self.path, stdout=out)
+        call_command("export_gtfs", path=self.path, stdout=out)
+
+        self.assertIn("Rebuilt no files (6 unchanged)", out.getvalue())
+        self.assertEqual(len(self.read("stops.txt")), 4)
@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.idempotency import get_idempotency_store
+from train_station.models import IdempotencyKey, Order, Ticket
+from train_station.tests.test_trip_api import sample_trip
+from train_station.tests import LOCAL_CACHES
+
+
+ORDER_URL = reverse("train_station:order-list")
+
+
+class DatabaseIdempotencyApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="test_password"
+        )
+        self.client.force_authenticate(self.user)
+        self.trip = sample_trip()
+
+    def post_order(self, key, seat=1, client=None):
+        return (client or self.client).post(
+            ORDER_URL,
+            {"tickets": [{"cargo": 1, "seat": seat, "trip": self.trip.id}]},
+            format="json",
+            headers={"Idempotency-Key": key}
+        )
+
+    def test_replay_returns_first_response(self):
+        first = self.post_order("key-1")
+        replay = self.post_order("key-1")
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replay.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replay.data, first.data)
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_replay_does_not_touch_tickets(self):
+        self.post_order("key-1")
+
+        with self.assertNumQueries(1):
+            self.post_order("key-1")
+
+    def test_failed_response_is_replayed(self):
+        self.post_order("key-1")
+
+        conflict = self.post_order("key-2")
+        Ticket.objects.all().delete()
+        replay = self.post_order("key-2")
+
+        self.assertEqual(conflict.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(replay.status_code, status.HTTP_409_CONFLICT)
+
+    def test_same_key_with_other_body(self):
+        self.post_order("key-1")
+
+        res = self.post_order("key-1", seat=2)
+
+        self.assertEqual(
+            res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+    def test_keys_are_scoped_by_user(self):
+        other_client = APIClient()
+        other_client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="other@test.com",
+                password="test_password"
+            )
+        )
+        self.post_order("key-1")
+
+        res = self.post_order("key-1", seat=2, client=other_client)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_request_in_progress(self):
+        get_idempotency_store().reserve(self.user.id, "key-1", "")
+
+        res = self.post_order("key-1")
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Order.objects.exists())
+
+    def test_without_key(self):
+        self.client.post(
+            ORDER_URL,
+            {"tickets": [{"cargo": 1, "seat": 1, "trip": self.trip.id}]},
+            format="json"
+        )
+
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    @override_settings(IDEMPOTENCY_KEY_TTL=timedelta(0))
+    def test_expired_key_is_processed_again(self):
+        self.post_order("key-1")
+        Ticket.objects.all().delete()
+
+        res = self.post_order("key-1")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 2)
+
+
+@override_settings(
+    CACHES=LOCAL_CACHES,
+    IDEMPOTENCY_STORE="train_station.idempotency.CacheIdempotencyStore"
+)
+class CacheIdempotencyApiTest(DatabaseIdempotencyApiTest):
+    def test_replay_does_not_touch_tickets(self):
+        self.post_order("key-1")
+
+        with self.assertNumQueries(0):
+            self.post_order("key-1")
@@ -0,0 +1,385 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+from django.core.exceptions import ValidationError
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from train_station.models import (
+    Crew,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+    Trip,
+)
+from train_station.timetable_import import (
+    import_timetable,
+    read_csv,
+    read_gtfs,
+)
+from train_station.versions import get_versions
+
+
+STATIONS = """name,latitude,longitude
+Kyiv,50.45,30.52
+Lviv,49.84,24.03
+Odesa,46.48,30.72
+"""
+ROUTES = """source,destination,distance
+Kyiv,Lviv,540
+Kyiv,Odesa,475
+"""
+TRAINS = """name,cargo_num,places_in_cargo,train_type
+Intercity 1,5,40,Intercity
+Night 2,10,36,Sleeper
+"""
+TRIPS = """source,destination,train,departure_time,arrival_time,crew
+Kyiv,Lviv,Intercity 1,2030-01-01T08:00:00Z,2030-01-01T13:00:00Z,Taras Shevchenko; Lesia Ukrainka
+Kyiv,Odesa,Night 2,2030-01-01T22:00:00+02:00,2030-01-02T06:00:00+02:00,
+"""
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class ImportTestCase(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def write(self, **files):
+        for name, content in files.items():
+            with open(os.path.join(self.path, name), "w") as csv_file:
+                csv_file.write(content)
+
+    def import_csv(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return import_timetable(read_csv(self.path), **kwargs)
+
+    def write_timetable(self):
+        self.write(**{
+            "stations.csv": STATIONS,
+            "routes.csv": ROUTES,
+            "trains.csv": TRAINS,
+            "trips.csv": TRIPS,
+        })
+
+
+class TimetableImportTest(ImportTestCase):
+    def test_import_csv(self):
+        self.write_timetable()
+
+        counts = self.import_csv(batch_size=1)
+
+        self.assertEqual(counts, {
+            "station": (3, 3),
+            "route": (2, 2),
+            "train": (2, 2),
+            "trip": (2, 2),
+        })
+        self.assertEqual(TrainType.objects.count(), 2)
+        trip = Trip.objects.get(train__name="Intercity 1")
+        self.assertEqual(str(trip.route), "Kyiv - Lviv (540 km)")
+        self.assertEqual(trip.departure_time, utc(2030, 1, 1, 8))
+        self.assertEqual(
+            sorted(crew.full_name for crew in trip.crew.all()),
+            ["Lesia Ukrainka", "Taras Shevchenko"]
+        )
+        night = Trip.objects.get(train__name="Night 2")
+        self.assertEqual(night.arrival_time, utc(2030, 1, 2, 4))
+        self.assertEqual(night.crew.count(), 0)
+        self.assertEqual(night.capacity, 360)
+
+    def test_reimport_updates_in_place(self):
+        self.write_timetable()
+        self.import_csv()
+        existing = Crew.objects.get(last_name="Ukrainka")
+
+        self.write(**{
+            "routes.csv": ROUTES.replace("540", "541"),
+            "trips.csv": TRIPS.replace("13:00:00Z", "13:30:00Z")
+            .replace("Taras Shevchenko; ", "Ivan Franko;"),
+        })
+        counts = self.import_csv()
+
+        self.assertEqual(counts["route"], (2, 0))
+        self.assertEqual(counts["trip"], (2, 0))
+        self.assertEqual(Route.objects.get(distance=541).trips.count(), 1)
+        trip = Trip.objects.get(train__name="Intercity 1")
+        self.assertEqual(trip.arrival_time, utc(2030, 1, 1, 13, 30))
+        self.assertEqual(
+            sorted(crew.full_name for crew in trip.crew.all()),
+            ["Ivan Franko", "Lesia Ukrainka"]
+        )
+        self.assertIn(existing, trip.crew.all())
+        self.assertEqual(Crew.objects.count(), 3)
+
+    def test_trips_without_crew_column_keep_crew(self):
+        self.write_timetable()
+        self.import_csv()
+        self.write(**{"trips.csv": "\n".join(
+            line.rsplit(",", 1)[0] for line in TRIPS.splitlines()
+        )})
+
+        self.import_csv()
+
+        self.assertEqual(
+            Trip.objects.get(train__name="Intercity 1").crew.count(), 2
+        )
+
+    def test_repeated_rows(self):
+        self.write(**{"stations.csv": STATIONS + "Kyiv,50.46,30.52\n"})
+
+        timetable = read_csv(self.path)
+
+        self.assertEqual(timetable.duplicates, {"station": 1})
+        self.assertEqual(import_timetable(timetable)["station"], (3, 3))
+        self.assertEqual(
+            str(Station.objects.get(name="Kyiv").latitude), "50.46" + "0" * 16
+        )
+
+    def test_invalid_rows(self):
+        self.write(**{
+            "stations.csv": STATIONS + "Dnipro,48.45,abc\nRivne,50.45,30.52\n",
+            "routes.csv": ROUTES + "Lviv,Lviv,1\nLviv,Kharkiv,10\n",
+            "trains.csv": TRAINS + "Broken,0,10,Intercity\n",
+            "trips.csv": TRIPS
+            + "Kyiv,Lviv,Night 2,2030-01-01T10:00,2030-01-01T09:00,\n"
+            + "Odesa,Lviv,Night 2,2030-01-02T10:00,2030-01-02T19:00,\n"
+            + "Kyiv,Lviv,Night 3,2030-01-02T10:00,2030-01-02T19:00,\n",
+        })
+
+        with self.assertRaises(ValidationError) as context:
+            import_timetable(read_csv(self.path))
+
+        messages = "\n".join(context.exception.messages)
+        for message in (
+            "stations.csv:5: ",
+            "stations Kyiv, Rivne share coordinates",
+            "route Lviv - Lviv: Station cannot have the same destination",
+            "route Lviv - Kharkiv: unknown station Kharkiv",
+            "trains.csv:4: cargo_num must be positive",
+            "trips.csv:4: arrival_time must be after departure_time",
+            "1 trips: unknown route Odesa - Lviv",
+            "1 trips: unknown train Night 3",
+        ):
+            self.assertIn(message, messages)
+        self.assertFalse(Station.objects.exists())
+
+    def test_resize_below_sold_seats(self):
+        self.write_timetable()
+        self.import_csv()
+        order = Order.objects.create(
+            customer=get_user_model().objects.create_user(
+                email="test@test.com", password="test_password"
+            )
+        )
+        Ticket.objects.create(
+            order=order,
+            trip=Trip.objects.get(train__name="Intercity 1"),
+            cargo=4,
+            seat=30
+        )
+        self.write(**{
+            "trains.csv": "name,cargo_num,places_in_cargo,train_type\n"
+                          "Intercity 1,3,20,Intercity\n"
+        })
+
+        with self.assertRaises(ValidationError) as context:
+            import_timetable(read_csv(self.path))
+
+        self.assertEqual(context.exception.messages, [
+            "train Intercity 1: cargo_num 3 is below cargo 4 sold on "
+            "upcoming trips",
+            "train Intercity 1: places_in_cargo 20 is below seat 30 sold "
+            "on upcoming trips",
+        ])
+        self.assertEqual(
+            Train.objects.get(name="Intercity 1").cargo_num, 5
+        )
+
+        self.write(**{
+            "trains.csv": "name,cargo_num,places_in_cargo,train_type\n"
+                          "Intercity 1,4,30,Intercity\n"
+        })
+        self.import_csv()
+
+        self.assertEqual(
+            Train.objects.get(name="Intercity 1").places_in_cargo, 30
+        )
+
+    def test_references_stored_rows(self):
+        self.write_timetable()
+        self.import_csv()
+        os.remove(os.path.join(self.path, "stations.csv"))
+        os.remove(os.path.join(self.path, "trains.csv"))
+        self.write(**{"routes.csv": "source,destination,distance\n"
+                                    "Lviv,Odesa,790\n"})
+
+        self.import_csv()
+
+        self.assertTrue(
+            Route.objects.filter(source_station__name="Lviv").exists()
+        )
+
+    def test_dry_run(self):
+        self.write_timetable()
+
+        counts = self.import_csv(dry_run=True)
+
+        self.assertEqual(counts["trip"], (2, 2))
+        self.assertFalse(Station.objects.exists())
+        self.assertFalse(Trip.objects.exists())
+
+    def test_bumps_change_stamps(self):
+        self.write_timetable()
+        before = get_versions("station", "route", "trip")
+
+        self.import_csv()
+
+        after = get_versions("station", "route", "trip")
+        for label in before:
+            self.assertNotEqual(before[label], after[label])
+
+    def test_command(self):
+        self.write_timetable()
+        out = io.StringIO()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("import_timetable", self.path, stdout=out)
+
+        self.assertIn("trip: 2/2", out.getvalue())
+        self.assertIn("trip: 2 rows, 2 new", out.getvalue())
+        self.assertEqual(Trip.objects.count(), 2)
+
+        self.write(**{"routes.csv": ROUTES + "Kyiv,Kyiv,1\n"})
+        with self.assertRaisesMessage(CommandError, "route Kyiv - Kyiv"):
+            call_command("import_timetable", self.path, stdout=out)
+
+
+AGENCY = """agency_id,agency_name,agency_url,agency_timezone
+UZ,Ukrzaliznytsia,https://uz.gov.ua,Europe/Kyiv
+"""
+STOPS = """stop_id,stop_name,stop_lat,stop_lon,location_type,parent_station
+KYIV,Kyiv,50.45,30.52,1,
+KYIV-1,Kyiv platform 1,50.4501,30.5201,0,KYIV
+LVIV,Lviv,49.84,24.03,1,
+"""
+GTFS_ROUTES = """route_id,route_short_name,route_type
+IC,Intercity,2
+"""
+GTFS_TRIPS = """route_id,service_id,trip_id,trip_short_name
+IC,WEEKEND,IC-743,743
+IC,EXTRA,IC-745,
+"""
+STOP_TIMES = """trip_id,arrival_time,departure_time,stop_id,stop_sequence,shape_dist_traveled
+IC-743,07:00:00,07:00:00,KYIV-1,1,0
+IC-743,09:00:00,09:05:00,ZHYTOMYR,2,
+IC-743,12:30:00,12:30:00,LVIV,3,541.6
+IC-745,23:00:00,23:00:00,KYIV,1,
+IC-745,25:10:00,25:10:00,LVIV,2,
+"""
+CALENDAR = """service_id,monday,tuesday,wednesday,thursday,friday,saturday,sunday,start_date,end_date
+WEEKEND,0,0,0,0,0,1,1,20300101,20300113
+"""
+CALENDAR_DATES = """service_id,date,exception_type
+WEEKEND,20300105,2
+EXTRA,20300330,1
+"""
+
+
+class GTFSImportTest(ImportTestCase):
+    def write_gtfs(self, **files):
+        self.write(**{
+            "agency.txt": AGENCY,
+            "stops.txt": STOPS,
+            "routes.txt": GTFS_ROUTES,
+            "trips.txt": GTFS_TRIPS,
+            "stop_times.txt": STOP_TIMES,
+            "calendar.txt": CALENDAR,
+            "calendar_dates.txt": CALENDAR_DATES,
+            **files,
+        })
+
+    def test_import_gtfs(self):
+        self.write_gtfs()
+
+        timetable = read_gtfs(self.path, cargo_num=4)
+        with self.captureOnCommitCallbacks(execute=True):
+            import_timetable(timetable)
+
+        self.assertEqual(
+            sorted(Station.objects.values_list("name", flat=True)),
+            ["Kyiv", "Lviv"]
+        )
+        self.assertEqual(Route.objects.get().distance, 542)
+        self.assertEqual(
+            sorted(Train.objects.values_list("name", "cargo_num")),
+            [("743", 4), ("IC-745", 4)]
+        )
+        self.assertEqual(
+            list(Trip.objects.filter(train__name="IC-745").values_list(
+                "departure_time", "arrival_time"
+            )),
+            # 25:10:00 is 01:10 of the next day, Kyiv time
+            [(utc(2030, 3, 30, 21), utc(2030, 3, 30, 23, 10))]
+        )
+        # runs on Jan 6, 12 and 13 (Jan 5 is removed) are separate trips
+        self.assertEqual(timetable.duplicates["trip"], 0)
+        self.assertEqual(
+            list(Trip.objects.filter(train__name="743").order_by(
+                "departure_time"
+            ).values_list("departure_time", flat=True)),
+            [utc(2030, 1, 6, 5), utc(2030, 1, 12, 5), utc(2030, 1, 13, 5)]
+        )
+
+    def test_existing_routes_and_trains_are_kept(self):
+        self.write_timetable()
+        self.import_csv()
+        self.write_gtfs(**{"trips.txt": GTFS_TRIPS.replace(
+            ",743", ",Intercity 1"
+        )})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            import_timetable(read_gtfs(self.path))
+
+        self.assertEqual(
+            Route.objects.get(destination_station__name="Lviv").distance,
+            540
+        )
+        self.assertEqual(Train.objects.get(name="Intercity 1").cargo_num, 5)
+
+    def test_invalid_feed(self):
+        self.write_gtfs(**{
+            "agency.txt": AGENCY.replace("Europe/Kyiv", "Mars/Olympus"),
+            "trips.txt": GTFS_TRIPS + "S,WEEKEND,S-1,\nIC,WEEKEND,IC-1,\n",
+        })
+        os.remove(os.path.join(self.path, "routes.txt"))
+
+        with self.assertRaises(ValidationError) as context:
+            import_timetable(read_gtfs(self.path))
+
+        messages = "\n".join(context.exception.messages)
+        for message in (
+            "agency.txt:2: unknown time zone",
+            "routes.txt:0: file is missing",
+            "trips.txt:2: unknown route_id 'IC'",
+        ):
+            self.assertIn(message, messages)
+
+    def test_trips_need_two_stops(self):
+        self.write_gtfs(**{
+            "trips.txt": GTFS_TRIPS + "IC,WEEKEND,IC-1,\n",
+            "stop_times.txt": STOP_TIMES + "IC-1,10:00:00,10:00:00,LVIV,1,\n",
+        })
+
+        with self.assertRaisesMessage(ValidationError, "needs two stops"):
+            import_timetable(read_gtfs(self.path))
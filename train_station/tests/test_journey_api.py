@@ -0,0 +1,222 @@
+import random
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.journeys import FEWEST_TRANSFERS, Timetable
+from train_station.models import Route, Station, Train, TrainType, Trip
+from train_station.tests import LOCAL_CACHES
+from train_station.versions import bump_versions
+
+
+JOURNEYS_URL = reverse("train_station:trip-journeys")
+DAY = timezone.make_aware(datetime(2030, 5, 1))
+
+
+def at(hour, minute=0):
+    return DAY + timedelta(hours=hour, minutes=minute)
+
+
+def earliest_arrival(connections, source, target, departure, transfer, legs):
+    """Brute force over every chain of connections"""
+    best = None
+    for connection in connections:
+        if connection[2] != source or connection[0] < departure:
+            continue
+        if connection[3] == target:
+            arrival = connection[1]
+        elif legs > 1:
+            arrival = earliest_arrival(
+                connections, connection[3], target,
+                connection[1] + transfer, transfer, legs - 1
+            )
+        else:
+            arrival = None
+        if arrival is not None and (best is None or arrival < best):
+            best = arrival
+    return best
+
+
+class TimetableTest(TestCase):
+    def test_earliest_arrival_matches_brute_force(self):
+        rng = random.Random(1)
+        timetable = Timetable()
+        for route_id in range(30):
+            timetable.routes[route_id] = tuple(rng.sample(range(8), 2))
+        for trip_id in range(80):
+            departure = at(rng.randint(0, 20), rng.choice((0, 15, 30, 45)))
+            timetable.set_trip(
+                trip_id,
+                rng.randrange(30),
+                departure,
+                departure + timedelta(minutes=rng.randint(20, 300)),
+            )
+
+        for _ in range(40):
+            source, target = rng.sample(range(8), 2)
+            journey = timetable.plan(
+                source, target, at(0), timedelta(minutes=10), max_legs=3
+            )
+            expected = earliest_arrival(
+                timetable.connections, source, target,
+                at(0).timestamp(), 600, 3
+            )
+            self.assertEqual(journey and journey[-1][1], expected)
+            if journey:
+                self.assertEqual(journey[0][2], source)
+                for leg, next_leg in zip(journey, journey[1:]):
+                    self.assertEqual(leg[3], next_leg[2])
+                    self.assertLessEqual(leg[1] + 600, next_leg[0])
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class JourneyApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="test@test.com",
+                password="test_password"
+            )
+        )
+        self.train_type = TrainType.objects.create(name="Intercity")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kyiv, self.lviv, self.rivne = [
+                Station.objects.create(
+                    name=name, latitude=latitude, longitude=longitude
+                )
+                for name, latitude, longitude in (
+                    ("Kyiv", 50.45, 30.52),
+                    ("Lviv", 49.84, 24.03),
+                    ("Rivne", 50.62, 26.25),
+                )
+            ]
+            self.direct = self.trip(self.kyiv, self.lviv, at(10), at(20))
+            self.first = self.trip(self.kyiv, self.rivne, at(8), at(12))
+            self.second = self.trip(
+                self.rivne, self.lviv, at(12, 30), at(15)
+            )
+
+    def trip(self, source, destination, departure_time, arrival_time):
+        route, _ = Route.objects.get_or_create(
+            source_station=source,
+            destination_station=destination,
+            defaults={"distance": 300}
+        )
+        train = Train.objects.create(
+            name=f"Train {Train.objects.count()}",
+            cargo_num=5,
+            places_in_cargo=20,
+            train_type=self.train_type
+        )
+        return Trip.objects.create(
+            route=route,
+            train=train,
+            departure_time=departure_time,
+            arrival_time=arrival_time
+        )
+
+    def get_journey(self, source, destination, **params):
+        return self.client.get(
+            JOURNEYS_URL,
+            {
+                "from": source.id,
+                "to": destination.id,
+                "departure": at(0).isoformat(),
+                **params
+            }
+        )
+
+    def trip_ids(self, res):
+        return [leg["trip"] for leg in res.data["legs"]]
+
+    def test_earliest_arrival_with_transfer(self):
+        res = self.get_journey(self.kyiv, self.lviv)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.trip_ids(res), [self.first.id, self.second.id])
+        self.assertEqual(res.data["transfers"], 1)
+        self.assertEqual(res.data["arrival_time"], at(15))
+        self.assertEqual(
+            [leg["destination"]["name"] for leg in res.data["legs"]],
+            ["Rivne", "Lviv"]
+        )
+
+    def test_transfer_too_short(self):
+        res = self.get_journey(self.kyiv, self.lviv, min_transfer=45)
+
+        self.assertEqual(self.trip_ids(res), [self.direct.id])
+
+    def test_fewest_transfers(self):
+        fewest = self.get_journey(
+            self.kyiv, self.lviv, optimize=FEWEST_TRANSFERS
+        )
+        one_leg = self.get_journey(self.kyiv, self.lviv, max_legs=1)
+
+        self.assertEqual(self.trip_ids(fewest), [self.direct.id])
+        self.assertEqual(self.trip_ids(one_leg), [self.direct.id])
+
+    def test_departure_after_last_trip(self):
+        res = self.get_journey(
+            self.kyiv, self.lviv, departure=at(11).isoformat()
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_params(self):
+        for params in (
+            {"departure": "tomorrow"},
+            {"max_legs": 0},
+            {"min_transfer": "soon"},
+            {"min_transfer": -60},
+            {"min_transfer": 1441},
+            {"min_transfer": 10000000000000},
+            {"optimize": "cheapest"},
+        ):
+            with self.subTest(params=params):
+                res = self.get_journey(self.kyiv, self.lviv, **params)
+
+                self.assertEqual(
+                    res.status_code, status.HTTP_400_BAD_REQUEST
+                )
+
+        res = self.get_journey(self.kyiv, self.kyiv)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_timetable_updated_incrementally(self):
+        self.get_journey(self.kyiv, self.lviv)
+        with self.captureOnCommitCallbacks(execute=True):
+            express = self.trip(self.kyiv, self.lviv, at(9), at(13))
+
+        with self.assertNumQueries(0):
+            res = self.get_journey(self.kyiv, self.lviv)
+
+        self.assertEqual(self.trip_ids(res), [express.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            express.delete()
+            self.second.departure_time = at(13)
+            self.second.arrival_time = at(16)
+            self.second.save()
+
+        res = self.get_journey(self.kyiv, self.lviv)
+
+        self.assertEqual(self.trip_ids(res), [self.first.id, self.second.id])
+        self.assertEqual(res.data["arrival_time"], at(16))
+
+    def test_timetable_reloaded_after_change_elsewhere(self):
+        self.get_journey(self.kyiv, self.lviv)
+        Trip.objects.filter(id=self.second.id).delete()
+        bump_versions("trip")
+
+        res = self.get_journey(self.kyiv, self.lviv)
+
+        self.assertEqual(self.trip_ids(res), [self.direct.id])
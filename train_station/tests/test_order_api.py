@@ -1,9 +1,14 @@
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
+from train_station.booking import run_with_retry, seat_conflicts
 from train_station.models import Order, Ticket
 from train_station.serializers import OrderListSerializer
 from train_station.tests.test_trip_api import sample_trip
@@ -88,3 +93,159 @@ class AuthenticatedOrderApiTest(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data["results"], serializer.data)
+
+
+class BulkOrderApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="test_password"
+        )
+        self.client.force_authenticate(self.user)
+        self.trip = sample_trip()
+
+    def order_payload(self, *seats):
+        return {
+            "tickets": [
+                {"cargo": cargo, "seat": seat, "trip": self.trip.id}
+                for cargo, seat in seats
+            ]
+        }
+
+    def test_create_order_with_many_tickets(self):
+        seats = [(1, seat) for seat in range(1, 11)]
+
+        res = self.client.post(
+            ORDER_URL, self.order_payload(*seats), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(Ticket.objects.values_list("cargo", "seat")), seats
+        )
+
+    def test_query_count_does_not_depend_on_ticket_count(self):
+        with CaptureQueriesContext(connection) as single_ticket:
+            self.client.post(
+                ORDER_URL, self.order_payload((1, 1)), format="json"
+            )
+        with CaptureQueriesContext(connection) as many_tickets:
+            self.client.post(
+                ORDER_URL,
+                self.order_payload(*[(2, seat) for seat in range(1, 21)]),
+                format="json"
+            )
+
+        self.assertEqual(Ticket.objects.count(), 21)
+        self.assertEqual(len(single_ticket), len(many_tickets))
+
+    def test_create_order_with_taken_seat(self):
+        Ticket.objects.create(
+            cargo=1, seat=2, trip=self.trip, order=sample_order()
+        )
+
+        res = self.client.post(
+            ORDER_URL, self.order_payload((1, 1), (1, 2)), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["seats"], [{"trip": self.trip.id, "cargo": 1, "seat": 2}]
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_create_order_with_repeated_seat(self):
+        res = self.client.post(
+            ORDER_URL, self.order_payload((1, 1), (1, 1)), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_create_order_with_seat_out_of_range(self):
+        res = self.client.post(
+            ORDER_URL, self.order_payload((1, 51)), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["tickets"][0]["seat"][0],
+            "seat number must be in available range: "
+            "(1, places_in_cargo): (1, 50)"
+        )
+
+    def test_concurrent_booking_becomes_conflict(self):
+        Ticket.objects.create(
+            cargo=1, seat=2, trip=self.trip, order=sample_order()
+        )
+        missed_conflicts = [[]]
+
+        def racing_seat_conflicts(seats, exclude_hold=None):
+            if missed_conflicts:
+                return missed_conflicts.pop()
+            return seat_conflicts(seats, exclude_hold)
+
+        with patch(
+            "train_station.booking.seat_conflicts", racing_seat_conflicts
+        ):
+            res = self.client.post(
+                ORDER_URL, self.order_payload((1, 2)), format="json"
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["seats"], [{"trip": self.trip.id, "cargo": 1, "seat": 2}]
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+
+
+class RunWithRetryTest(TransactionTestCase):
+    def failing(self, *errors):
+        calls = []
+
+        def func():
+            calls.append(1)
+            if len(calls) <= len(errors):
+                raise errors[len(calls) - 1]
+            return len(calls)
+
+        return func, calls
+
+    def test_retries_lock_contention(self):
+        func, calls = self.failing(
+            OperationalError("database is locked"),
+            OperationalError("database is locked"),
+        )
+
+        self.assertEqual(run_with_retry(func), 3)
+
+    def test_gives_up_after_max_retries(self):
+        func, calls = self.failing(
+            *[OperationalError("database is locked")] * 3
+        )
+
+        with self.assertRaises(OperationalError):
+            run_with_retry(func)
+        self.assertEqual(len(calls), 3)
+
+    def test_does_not_retry_other_errors(self):
+        for error in (
+            IntegrityError("NOT NULL constraint failed"),
+            OperationalError("no such table: train_station_trip"),
+        ):
+            with self.subTest(error=error):
+                func, calls = self.failing(error)
+
+                with self.assertRaises(type(error)):
+                    run_with_retry(func)
+                self.assertEqual(len(calls), 1)
+
+    def test_runs_once_inside_transaction(self):
+        func, calls = self.failing(OperationalError("database is locked"))
+
+        with self.assertRaises(OperationalError):
+            with transaction.atomic():
+                run_with_retry(func)
+        self.assertEqual(len(calls), 1)
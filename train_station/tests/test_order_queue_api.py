@@ -0,0 +1,221 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.booking import book_tickets, lock_trips
+from train_station.models import Order, OrderRequest, Ticket
+from train_station.order_queue import (
+    claim_batch,
+    process_batch,
+    PROCESSING_FAILED,
+    requeue_stale,
+)
+from train_station.tests.test_trip_api import sample_trip
+
+
+ORDER_URL = reverse("train_station:order-list")
+
+
+def status_url(order_request_id):
+    return reverse(
+        "train_station:orderrequest-detail", args=(order_request_id,)
+    )
+
+
+class QueuedOrderTestMixin:
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="test_password"
+        )
+        self.client.force_authenticate(self.user)
+        self.trip = sample_trip()
+
+    def post_order(self, *seats, headers=None):
+        return self.client.post(
+            ORDER_URL,
+            {
+                "tickets": [
+                    {"cargo": cargo, "seat": seat, "trip": self.trip.id}
+                    for cargo, seat in seats
+                ]
+            },
+            format="json",
+            headers=headers or {"Prefer": "respond-async"}
+        )
+
+    def process_queue(self):
+        call_command("process_order_queue", once=True, stdout=StringIO())
+
+
+class QueuedOrderApiTest(QueuedOrderTestMixin, TestCase):
+    def test_queued_order_is_accepted(self):
+        res = self.post_order((1, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data["status"], OrderRequest.Status.PENDING)
+        self.assertTrue(res["Location"].endswith(status_url(res.data["id"])))
+        self.assertFalse(Ticket.objects.exists())
+
+    @override_settings(ORDER_INTAKE_QUEUED=True)
+    def test_queued_intake_enabled_in_settings(self):
+        res = self.post_order((1, 1), headers={})
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+
+    def test_invalid_queued_order_is_rejected(self):
+        res = self.post_order((11, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(OrderRequest.objects.exists())
+
+    def test_worker_books_queued_orders(self):
+        request_id = self.post_order((1, 1), (1, 2)).data["id"]
+
+        self.process_queue()
+        res = self.client.get(status_url(request_id))
+
+        self.assertEqual(res.data["status"], OrderRequest.Status.DONE)
+        self.assertEqual(
+            list(
+                Ticket.objects.filter(order=res.data["order"])
+                .values_list("cargo", "seat")
+            ),
+            [(1, 1), (1, 2)]
+        )
+
+    def test_worker_fails_conflicting_orders(self):
+        first_id = self.post_order((1, 1)).data["id"]
+        second_id = self.post_order((1, 1)).data["id"]
+
+        self.process_queue()
+        first = self.client.get(status_url(first_id)).data
+        second = self.client.get(status_url(second_id)).data
+
+        self.assertEqual(first["status"], OrderRequest.Status.DONE)
+        self.assertEqual(second["status"], OrderRequest.Status.FAILED)
+        self.assertEqual(
+            second["errors"]["seats"],
+            [{"trip": self.trip.id, "cargo": 1, "seat": 1}]
+        )
+        self.assertIsNone(second["order"])
+
+    def test_status_of_other_customer(self):
+        request_id = self.post_order((1, 1)).data["id"]
+        other_client = APIClient()
+        other_client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="other@test.com",
+                password="test_password"
+            )
+        )
+
+        res = other_client.get(status_url(request_id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_requeue_stale_requests(self):
+        self.post_order((1, 1))
+        OrderRequest.objects.update(
+            status=OrderRequest.Status.PROCESSING,
+            claimed_at=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual(
+            OrderRequest.objects.get().status, OrderRequest.Status.PENDING
+        )
+
+    def test_requeue_gives_up_after_max_attempts(self):
+        self.post_order((1, 1))
+        OrderRequest.objects.update(
+            status=OrderRequest.Status.PROCESSING,
+            claimed_at=timezone.now() - timedelta(hours=1),
+            attempts=3
+        )
+
+        self.assertEqual(requeue_stale(), 0)
+        order_request = OrderRequest.objects.get()
+        self.assertEqual(order_request.status, OrderRequest.Status.FAILED)
+        self.assertEqual(order_request.errors, {"detail": PROCESSING_FAILED})
+
+    def test_claim_counts_attempts(self):
+        self.post_order((1, 1))
+
+        claim_batch(10)
+
+        self.assertEqual(OrderRequest.objects.get().attempts, 1)
+
+    def test_error_fails_only_its_request(self):
+        first_id = self.post_order((1, 1)).data["id"]
+        second_id = self.post_order((1, 2)).data["id"]
+        calls = []
+
+        def failing_book_tickets(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise RuntimeError("Unexpected")
+            return book_tickets(*args)
+
+        with patch(
+            "train_station.order_queue.book_tickets", failing_book_tickets
+        ):
+            self.process_queue()
+
+        first = OrderRequest.objects.get(id=first_id)
+        second = OrderRequest.objects.get(id=second_id)
+        self.assertEqual(first.status, OrderRequest.Status.FAILED)
+        self.assertEqual(first.errors, {"detail": PROCESSING_FAILED})
+        self.assertIsNone(first.order)
+        self.assertEqual(second.status, OrderRequest.Status.DONE)
+        self.assertEqual(Order.objects.get(), second.order)
+        self.assertEqual(
+            list(Ticket.objects.values_list("cargo", "seat")), [(1, 2)]
+        )
+
+
+class QueuedOrderRetryTest(QueuedOrderTestMixin, TransactionTestCase):
+    def test_deadlocked_group_is_retried(self):
+        self.post_order((1, 1))
+        calls = []
+
+        def deadlocking_lock_trips(trip_ids):
+            calls.append(trip_ids)
+            if len(calls) == 1:
+                raise OperationalError("database is locked")
+            lock_trips(trip_ids)
+
+        with patch(
+            "train_station.order_queue.lock_trips", deadlocking_lock_trips
+        ):
+            counts = process_batch(claim_batch(10))
+
+        self.assertEqual(counts, {OrderRequest.Status.DONE: 1})
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_group_stays_claimed_when_retries_fail(self):
+        self.post_order((1, 1))
+
+        with patch(
+            "train_station.order_queue.lock_trips",
+            side_effect=OperationalError("database is locked")
+        ):
+            counts = process_batch(claim_batch(10))
+
+        self.assertEqual(counts, {OrderRequest.Status.PROCESSING: 1})
+        self.assertEqual(
+            OrderRequest.objects.get().status,
+            OrderRequest.Status.PROCESSING
+        )
+        self.assertFalse(Ticket.objects.exists())
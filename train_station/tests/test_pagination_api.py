@@ -0,0 +1,209 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.models import (
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+    Trip,
+)
+from train_station.pagination import KeysetPagination
+
+
+TRIP_URL = reverse("train_station:trip-list")
+ORDER_URL = reverse("train_station:order-list")
+FIRST_DAY = timezone.make_aware(datetime(2030, 1, 1))
+
+
+class KeysetPaginationApiTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="test_password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        route = Route.objects.create(
+            source_station=Station.objects.create(
+                name="Kyiv", latitude=50.45, longitude=30.52
+            ),
+            destination_station=Station.objects.create(
+                name="Lviv", latitude=49.84, longitude=24.03
+            ),
+            distance=540
+        )
+        train_type = TrainType.objects.create(name="Intercity")
+        self.trips = []
+        # pairs of trips leave at the same time to exercise tie-breaking
+        for number in range(7):
+            departure_time = FIRST_DAY + timedelta(hours=number // 2)
+            self.trips.append(Trip.objects.create(
+                route=route,
+                train=Train.objects.create(
+                    name=f"Train {number}",
+                    cargo_num=2,
+                    places_in_cargo=10,
+                    train_type=train_type
+                ),
+                departure_time=departure_time,
+                arrival_time=departure_time + timedelta(hours=6)
+            ))
+        self.trip_ids = [
+            trip.id for trip in sorted(
+                self.trips, key=lambda trip: (trip.departure_time, trip.id)
+            )
+        ]
+
+    def walk(self, url, params=None, direction="next"):
+        pages = []
+        res = self.client.get(url, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append([row["id"] for row in res.data["results"]])
+            if not res.data[direction]:
+                return pages, res
+            res = self.client.get(res.data[direction])
+
+    def test_pages_follow_ordering_with_ties(self):
+        pages, last = self.walk(
+            TRIP_URL, {"pagination": "keyset", "limit": 3}
+        )
+
+        self.assertEqual(
+            pages,
+            [self.trip_ids[:3], self.trip_ids[3:6], self.trip_ids[6:]]
+        )
+        self.assertNotIn("count", last.data)
+
+        backwards, _ = self.walk(last.data["previous"], direction="previous")
+
+        self.assertEqual(backwards, [self.trip_ids[3:6], self.trip_ids[:3]])
+
+    def test_first_page(self):
+        res = self.client.get(TRIP_URL, {"pagination": "keyset", "limit": 3})
+
+        self.assertIsNone(res.data["previous"])
+        self.assertIsNotNone(res.data["next"])
+
+    def test_limit_offset_is_still_the_default(self):
+        res = self.client.get(TRIP_URL, {"limit": 3, "offset": 3})
+
+        self.assertEqual(res.data["count"], 7)
+        self.assertEqual(
+            [trip["id"] for trip in res.data["results"]],
+            self.trip_ids[3:6]
+        )
+
+    def test_no_count_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(TRIP_URL, {"pagination": "keyset"})
+
+        self.assertFalse(any(
+            query["sql"].startswith("SELECT COUNT(*)")
+            for query in queries.captured_queries
+        ))
+
+    def test_ordering_by_annotation(self):
+        Ticket.objects.create(
+            order=Order.objects.create(customer=self.user),
+            trip=self.trips[5],
+            cargo=1,
+            seat=1
+        )
+
+        pages, _ = self.walk(
+            TRIP_URL,
+            {
+                "pagination": "keyset",
+                "limit": 2,
+                "ordering": "tickets_available",
+            },
+        )
+
+        self.assertEqual(
+            sum(pages, []),
+            [self.trips[5].id]
+            + [trip_id for trip_id in self.trip_ids
+               if trip_id != self.trips[5].id]
+        )
+
+    def test_orders(self):
+        orders = [Order.objects.create(customer=self.user) for _ in range(5)]
+        Order.objects.filter(id__in=[orders[1].id, orders[2].id]).update(
+            created_at=orders[0].created_at
+        )
+
+        pages, _ = self.walk(ORDER_URL, {"pagination": "keyset", "limit": 2})
+
+        self.assertEqual(
+            sum(pages, []), [order.id for order in orders]
+        )
+
+    def test_invalid_cursor(self):
+        res = self.client.get(TRIP_URL, {"cursor": "not a cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_cursor_position(self):
+        for position in (
+            ["not-a-date", 1],
+            [{"a": 1}, 1],
+            ["2030-01-01T00:00:00Z", "x"],
+            ["2030-01-01T00:00:00Z"],
+            [None, None],
+            [None, 1],
+        ):
+            with self.subTest(position=position):
+                cursor = base64.urlsafe_b64encode(
+                    json.dumps({"r": 0, "p": position}).encode()
+                ).decode()
+
+                res = self.client.get(TRIP_URL, {"cursor": cursor})
+
+                self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_null_cursor_position_on_orders(self):
+        self.client.force_authenticate(self.user)
+        cursor = base64.urlsafe_b64encode(
+            json.dumps({"r": 0, "p": [None, None]}).encode()
+        ).decode()
+
+        res = self.client.get(ORDER_URL, {"cursor": cursor})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tickets_by_cargo_and_seat(self):
+        order = Order.objects.create(customer=self.user)
+        for cargo, seat in ((2, 1), (1, 5), (1, 2), (2, 3), (1, 9)):
+            Ticket.objects.create(
+                order=order, trip=self.trips[0], cargo=cargo, seat=seat
+            )
+        paginator = KeysetPagination()
+        paginator.page_size = 2
+        request = Request(RequestFactory().get("/tickets/"))
+        seats = []
+        while request is not None:
+            page = paginator.paginate_queryset(
+                Ticket.objects.filter(trip=self.trips[0]), request
+            )
+            seats += [(ticket.cargo, ticket.seat) for ticket in page]
+            request = paginator.next and Request(
+                RequestFactory().get(paginator.next)
+            )
+
+        self.assertEqual(seats, [(1, 2), (1, 5), (1, 9), (2, 1), (2, 3)])
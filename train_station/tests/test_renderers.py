@@ -0,0 +1,156 @@
+import gzip
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO
+from zoneinfo import ZoneInfo
+
+import msgpack
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.models import Station
+from train_station.parsers import MessagePackParser, ORJSONParser
+from train_station.renderers import MessagePackRenderer, ORJSONRenderer
+
+
+STATION_URL = reverse("train_station:station-list")
+
+
+class RendererTest(SimpleTestCase):
+    data = {
+        "name": "Kyiv  ",
+        "latitude": Decimal("50.450100000000000000"),
+        "departures": [
+            datetime(2030, 1, 1, 10, 30, 5, 250, tzinfo=dt_timezone.utc),
+            datetime(2030, 7, 1, 10, 30, tzinfo=ZoneInfo("Europe/Kyiv")),
+        ],
+        "stops": ({"id": 1}, {"id": 2}),
+        1: None,
+    }
+
+    def test_orjson_matches_json_renderer(self):
+        data = {**self.data, "latitude": "50.450100000000000000"}
+
+        self.assertEqual(
+            ORJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_decimals_and_datetimes_are_lossless(self):
+        expected = {
+            "name": "Kyiv  ",
+            "latitude": "50.450100000000000000",
+            "departures": [
+                "2030-01-01T10:30:05.000250Z",
+                "2030-07-01T10:30:00+03:00",
+            ],
+            "stops": [{"id": 1}, {"id": 2}],
+        }
+
+        self.assertEqual(
+            ORJSONParser().parse(
+                BytesIO(ORJSONRenderer().render(self.data))
+            ),
+            {**expected, "1": None}
+        )
+        self.assertEqual(
+            msgpack.unpackb(
+                MessagePackRenderer().render(self.data),
+                strict_map_key=False
+            ),
+            {**expected, 1: None}
+        )
+
+    def test_indent(self):
+        for indent, expected in (
+            (2, b'{\n  "id": 1\n}'),
+            (4, b'{\n    "id": 1\n}'),
+        ):
+            with self.subTest(indent=indent):
+                rendered = ORJSONRenderer().render(
+                    {"id": 1}, f"application/json; indent={indent}"
+                )
+
+                self.assertEqual(rendered, expected)
+
+    def test_invalid_bodies(self):
+        for parser, body in (
+            (ORJSONParser(), b"{\"id\": "),
+            (MessagePackParser(), b"\xc1"),
+            (MessagePackParser(), b"\x91"),
+        ):
+            with self.subTest(parser=parser, body=body):
+                with self.assertRaises(ParseError):
+                    parser.parse(BytesIO(body))
+
+
+class NegotiationApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="admin@admin.com",
+                password="admin_password",
+                is_staff=True
+            )
+        )
+        for number in range(20):
+            Station.objects.create(
+                name=f"Station {number}",
+                latitude=Decimal(f"50.{number:02d}1234567890123456"),
+                longitude=Decimal(f"30.{number:02d}123456789012345")
+            )
+
+    def test_msgpack(self):
+        res = self.client.get(
+            STATION_URL, headers={"accept": "application/msgpack"}
+        )
+
+        self.assertEqual(res["Content-Type"], "application/msgpack")
+        self.assertEqual(
+            msgpack.unpackb(res.content),
+            self.client.get(STATION_URL).json()
+        )
+
+    def test_msgpack_request_body(self):
+        res = self.client.post(
+            STATION_URL,
+            {
+                "name": "Lviv",
+                "latitude": "49.839683000000000000",
+                "longitude": "24.02971600000000000",
+            },
+            format="msgpack"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            Station.objects.get(name="Lviv").latitude,
+            Decimal("49.839683")
+        )
+
+    def test_gzip(self):
+        res = self.client.get(
+            STATION_URL, headers={"accept-encoding": "gzip"}
+        )
+
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(
+            gzip.decompress(res.content),
+            self.client.get(STATION_URL).content
+        )
+
+    def test_small_responses_are_not_compressed(self):
+        station = Station.objects.first()
+        res = self.client.get(
+            reverse("train_station:station-detail", args=(station.id,)),
+            headers={"accept-encoding": "gzip"}
+        )
+
+        self.assertNotIn("Content-Encoding", res)
@@ -0,0 +1,242 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.models import (
+    Crew,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+    Trip,
+)
+from train_station.response_cache import (
+    RESPONSE_CACHE_KEY,
+    RESPONSE_CACHE_LOCK_KEY,
+    get_or_render,
+    response_cache_stats,
+)
+from train_station.tests import LOCAL_CACHES
+
+
+TRIP_URL = reverse("train_station:trip-list")
+ROUTE_URL = reverse("train_station:route-list")
+STATION_URL = reverse("train_station:station-list")
+ORDER_URL = reverse("train_station:order-list")
+HOLD_URL = reverse("train_station:seathold-list")
+
+
+def trip_detail_url(trip_id):
+    return reverse("train_station:trip-detail", args=(trip_id,))
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class ResponseCacheApiTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="test_password"
+        )
+        departure_time = timezone.make_aware(datetime(2030, 1, 1))
+        self.kyiv = Station.objects.create(
+            name="Kyiv", latitude=50.45, longitude=30.52
+        )
+        self.route = Route.objects.create(
+            source_station=self.kyiv,
+            destination_station=Station.objects.create(
+                name="Lviv", latitude=49.84, longitude=24.03
+            ),
+            distance=540
+        )
+        self.trip = Trip.objects.create(
+            route=self.route,
+            train=Train.objects.create(
+                name="Hyundai",
+                cargo_num=2,
+                places_in_cargo=10,
+                train_type=TrainType.objects.create(name="Intercity")
+            ),
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=6)
+        )
+
+    def get(self, url, params=None):
+        res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res
+
+    def assert_cached(self, url, params=None):
+        self.get(url, params)
+
+        with self.assertNumQueries(0):
+            res = self.get(url, params)
+
+        self.assertEqual(res["X-Cache"], "HIT")
+        return res
+
+    def test_hits(self):
+        for url in (
+            TRIP_URL,
+            trip_detail_url(self.trip.id),
+            ROUTE_URL,
+            STATION_URL,
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.get(url)["X-Cache"], "MISS")
+                self.assert_cached(url)
+
+        self.assertEqual(response_cache_stats(), {"hit": 8, "miss": 4})
+
+    def test_query_params_have_own_entries(self):
+        self.get(TRIP_URL)
+
+        self.assertEqual(self.get(TRIP_URL, {"limit": 1})["X-Cache"], "MISS")
+
+    def test_ticket_invalidates_availability(self):
+        self.assert_cached(TRIP_URL)
+        Ticket.objects.create(
+            order=Order.objects.create(customer=self.user),
+            trip=self.trip,
+            cargo=1,
+            seat=1
+        )
+
+        res = self.get(TRIP_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["results"][0]["tickets_available"], 19)
+
+    def test_bulk_booking_invalidates_availability(self):
+        self.assert_cached(trip_detail_url(self.trip.id))
+        self.client.force_authenticate(self.user)
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [
+                {"trip": self.trip.id, "cargo": 1, "seat": seat}
+                for seat in (1, 2)
+            ]},
+            format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.get(trip_detail_url(self.trip.id))
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["tickets_available"], 18)
+
+    def test_booking_keeps_other_trip_details(self):
+        other_trip = Trip.objects.create(
+            route=self.route,
+            train=self.trip.train,
+            departure_time=self.trip.departure_time + timedelta(days=1),
+            arrival_time=self.trip.arrival_time + timedelta(days=1)
+        )
+        self.assert_cached(trip_detail_url(other_trip.id))
+        self.client.force_authenticate(self.user)
+        self.client.post(
+            ORDER_URL,
+            {"tickets": [{"trip": self.trip.id, "cargo": 1, "seat": 1}]},
+            format="json"
+        )
+
+        with self.assertNumQueries(0):
+            res = self.get(trip_detail_url(other_trip.id))
+
+        self.assertEqual(res["X-Cache"], "HIT")
+        self.assertEqual(self.get(TRIP_URL)["X-Cache"], "MISS")
+
+    def test_hold_invalidates_availability(self):
+        self.assert_cached(trip_detail_url(self.trip.id))
+        self.client.force_authenticate(self.user)
+        res = self.client.post(
+            HOLD_URL,
+            {"trip": self.trip.id, "seats": [{"cargo": 1, "seat": 1}]},
+            format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.get(trip_detail_url(self.trip.id))
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["tickets_available"], 19)
+
+    def test_crew_change_invalidates_trip(self):
+        self.assert_cached(trip_detail_url(self.trip.id))
+        crew = Crew.objects.create(first_name="Lesia", last_name="Ukrainka")
+        self.assert_cached(trip_detail_url(self.trip.id))
+        self.trip.crew.add(crew)
+
+        res = self.get(trip_detail_url(self.trip.id))
+
+        self.assertEqual(res.data["crew"][0]["full_name"], "Lesia Ukrainka")
+
+    def test_station_invalidates_routes(self):
+        self.assert_cached(ROUTE_URL)
+        self.kyiv.name = "Kyiv-Pasazhyrskyi"
+        self.kyiv.save()
+
+        res = self.get(ROUTE_URL)
+
+        self.assertEqual(
+            res.data["results"][0]["source_station"], "Kyiv-Pasazhyrskyi"
+        )
+
+    def test_bypassed_inside_transaction(self):
+        self.get(TRIP_URL)
+        with transaction.atomic():
+            self.trip.delete()
+
+            res = self.get(TRIP_URL)
+
+        self.assertEqual(res.data["results"], [])
+        self.assertNotIn("X-Cache", res)
+
+    def test_not_found_is_not_cached(self):
+        url = trip_detail_url(self.trip.id + 1)
+        self.client.get(url)
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response_cache_stats()["hit"], 0)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class GetOrRenderTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_waits_for_render_in_progress(self):
+        cache.add(RESPONSE_CACHE_LOCK_KEY.format(digest="trips"), 1)
+        render = mock.Mock(return_value=["rendered here"])
+
+        with mock.patch(
+            "train_station.response_cache.time.sleep",
+            side_effect=lambda _: cache.set(
+                RESPONSE_CACHE_KEY.format(digest="trips"), ["rendered"]
+            ),
+        ):
+            data, hit = get_or_render("trips", render)
+
+        self.assertEqual((data, hit), (["rendered"], True))
+        render.assert_not_called()
+
+    def test_renders_when_lock_is_never_released(self):
+        cache.add(RESPONSE_CACHE_LOCK_KEY.format(digest="trips"), 1)
+
+        with mock.patch("train_station.response_cache.time.sleep"):
+            data, hit = get_or_render("trips", lambda: ["rendered here"])
+
+        self.assertEqual((data, hit), (["rendered here"], False))
@@ -0,0 +1,135 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.models import Route, Station
+from train_station.station_graph import StationGraph
+from train_station.tests import LOCAL_CACHES
+from train_station.versions import bump_versions
+
+
+PATH_URL = reverse("train_station:route-path")
+
+
+class StationGraphTest(TestCase):
+    def test_astar_matches_dijkstra(self):
+        rng = random.Random(1)
+        graph = StationGraph()
+        for station_id in range(200):
+            graph.set_station(
+                station_id, str(station_id),
+                rng.uniform(45, 52), rng.uniform(22, 40)
+            )
+        for route_id in range(1000):
+            source_id, destination_id = rng.sample(range(200), 2)
+            graph.set_route(
+                route_id, source_id, destination_id, rng.randint(50, 900)
+            )
+
+        for _ in range(50):
+            source_id, destination_id = rng.sample(range(200), 2)
+            astar = graph.shortest_path(source_id, destination_id, "astar")
+            dijkstra = graph.shortest_path(
+                source_id, destination_id, "dijkstra"
+            )
+            self.assertEqual(
+                astar and astar[0], dijkstra and dijkstra[0]
+            )
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class RoutePathApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="test@test.com",
+                password="test_password"
+            )
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kyiv, self.lviv, self.odesa, self.rivne = [
+                Station.objects.create(
+                    name=name, latitude=latitude, longitude=longitude
+                )
+                for name, latitude, longitude in (
+                    ("Kyiv", 50.45, 30.52),
+                    ("Lviv", 49.84, 24.03),
+                    ("Odesa", 46.48, 30.72),
+                    ("Rivne", 50.62, 26.25),
+                )
+            ]
+            self.route(self.kyiv, self.rivne, 330)
+            self.route(self.rivne, self.lviv, 210)
+            self.route(self.kyiv, self.lviv, 600)
+
+    def route(self, source, destination, distance):
+        return Route.objects.create(
+            source_station=source,
+            destination_station=destination,
+            distance=distance
+        )
+
+    def get_path(self, source, destination, **params):
+        return self.client.get(
+            PATH_URL, {"from": source.id, "to": destination.id, **params}
+        )
+
+    def test_shortest_path(self):
+        for algorithm in ("astar", "dijkstra"):
+            res = self.get_path(self.kyiv, self.lviv, algorithm=algorithm)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.data["distance"], 540)
+            self.assertEqual(
+                [station["name"] for station in res.data["stations"]],
+                ["Kyiv", "Rivne", "Lviv"]
+            )
+            self.assertEqual(len(res.data["routes"]), 2)
+
+    def test_no_path(self):
+        res = self.get_path(self.lviv, self.kyiv)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_params(self):
+        missing = self.client.get(PATH_URL, {"from": self.kyiv.id})
+        algorithm = self.get_path(self.kyiv, self.lviv, algorithm="bfs")
+
+        self.assertEqual(missing.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(algorithm.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_graph_updated_incrementally(self):
+        self.get_path(self.kyiv, self.odesa)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.route(self.kyiv, self.odesa, 475)
+            self.route(self.odesa, self.lviv, 20)
+
+        with self.assertNumQueries(0):
+            res = self.get_path(self.kyiv, self.lviv)
+
+        self.assertEqual(res.data["distance"], 495)
+
+    def test_graph_updated_on_delete(self):
+        self.get_path(self.kyiv, self.lviv)
+        with self.captureOnCommitCallbacks(execute=True):
+            Route.objects.get(distance=210).delete()
+
+        res = self.get_path(self.kyiv, self.lviv)
+
+        self.assertEqual(res.data["distance"], 600)
+
+    def test_graph_reloaded_after_change_elsewhere(self):
+        self.get_path(self.kyiv, self.lviv)
+        Route.objects.filter(distance=600).update(distance=100)
+        bump_versions("route")
+
+        res = self.get_path(self.kyiv, self.lviv)
+
+        self.assertEqual(res.data["distance"], 100)
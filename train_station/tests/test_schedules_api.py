@@ -0,0 +1,338 @@
+import io
+from datetime import date, datetime, time, timedelta, timezone
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.models import (
+    Crew,
+    Route,
+    Schedule,
+    Station,
+    Train,
+    TrainType,
+    Trip,
+)
+from train_station.bulk import insert_rows
+from train_station.schedules import materialize_schedules
+from train_station.versions import get_versions
+
+
+SCHEDULE_URL = reverse("train_station:schedule-list")
+
+
+def materialize_url(schedule_id):
+    return reverse("train_station:schedule-materialize", args=(schedule_id,))
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class ScheduleTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        kyiv = Station.objects.create(
+            name="Kyiv", latitude=50.45, longitude=30.52
+        )
+        lviv = Station.objects.create(
+            name="Lviv", latitude=49.84, longitude=24.03
+        )
+        self.route = Route.objects.create(
+            source_station=kyiv, destination_station=lviv, distance=540
+        )
+        self.train = Train.objects.create(
+            name="IC-743",
+            cargo_num=5,
+            places_in_cargo=40,
+            train_type=TrainType.objects.create(name="Intercity")
+        )
+
+    def create_schedule(self, **params):
+        defaults = {
+            "route": self.route,
+            "train": self.train,
+            "departure_time": time(7, 30),
+            "duration": timedelta(hours=5),
+            "valid_from": date(2030, 1, 1),
+        }
+        defaults.update(params)
+        return Schedule.objects.create(**defaults)
+
+    def materialize(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return materialize_schedules(**kwargs)
+
+
+class MaterializeSchedulesTest(ScheduleTestCase):
+    def test_weekdays(self):
+        # Jan 7 2030 is a Monday
+        schedule = self.create_schedule(weekdays="1000100")
+
+        created = self.materialize(start=date(2030, 1, 7), days=14)
+
+        self.assertEqual(created, 4)
+        self.assertEqual(
+            [
+                trip.departure_time.date()
+                for trip in Trip.objects.order_by("departure_time")
+            ],
+            [date(2030, 1, 7), date(2030, 1, 11),
+             date(2030, 1, 14), date(2030, 1, 18)]
+        )
+        self.assertEqual(
+            set(Trip.objects.values_list("schedule", flat=True)),
+            {schedule.id}
+        )
+
+    def test_validity_period(self):
+        self.create_schedule(
+            valid_from=date(2030, 1, 3), valid_until=date(2030, 1, 5)
+        )
+
+        self.assertEqual(self.materialize(start=date(2030, 1, 1), days=10), 3)
+
+    def test_local_time(self):
+        self.create_schedule()
+
+        # Kyiv time is UTC+2 in winter and UTC+3 in summer
+        self.materialize(start=date(2030, 1, 1), days=1)
+        self.materialize(start=date(2030, 7, 1), days=1)
+
+        self.assertEqual(
+            list(Trip.objects.order_by("departure_time").values_list(
+                "departure_time", "arrival_time"
+            )),
+            [
+                (utc(2030, 1, 1, 5, 30), utc(2030, 1, 1, 10, 30)),
+                (utc(2030, 7, 1, 4, 30), utc(2030, 7, 1, 9, 30)),
+            ]
+        )
+
+    def test_daylight_saving_time(self):
+        # Kyiv clocks go from 03:00 to 04:00 on Mar 31 2030
+        self.create_schedule(
+            departure_time=time(22), duration=timedelta(hours=8)
+        )
+        self.create_schedule(departure_time=time(3, 30))
+
+        self.assertEqual(self.materialize(start=date(2030, 3, 30), days=2), 4)
+        self.assertEqual(self.materialize(start=date(2030, 3, 30), days=2), 0)
+        self.assertEqual(
+            Trip.objects.get(departure_time=utc(2030, 3, 30, 20)).arrival_time,
+            utc(2030, 3, 31, 4)
+        )
+
+    def test_idempotent(self):
+        self.create_schedule()
+        self.materialize(start=date(2030, 1, 1), days=7)
+        version = get_versions("trip")
+
+        self.assertEqual(self.materialize(start=date(2030, 1, 1), days=7), 0)
+        self.assertEqual(get_versions("trip"), version)
+
+        self.assertEqual(self.materialize(start=date(2030, 1, 1), days=10), 3)
+        self.assertEqual(Trip.objects.count(), 10)
+        self.assertNotEqual(get_versions("trip"), version)
+
+    def test_existing_trips_are_kept(self):
+        self.create_schedule()
+        trip = Trip.objects.create(
+            route=self.route,
+            train=self.train,
+            departure_time=utc(2030, 1, 2, 5, 30),
+            arrival_time=utc(2030, 1, 2, 11)
+        )
+
+        self.assertEqual(self.materialize(start=date(2030, 1, 1), days=3), 2)
+        trip.refresh_from_db()
+        self.assertEqual(trip.arrival_time, utc(2030, 1, 2, 11))
+        self.assertIsNone(trip.schedule)
+
+    def test_crew(self):
+        schedule = self.create_schedule()
+        crew = [
+            Crew.objects.create(first_name="Taras", last_name="Shevchenko"),
+            Crew.objects.create(first_name="Lesia", last_name="Ukrainka"),
+        ]
+        schedule.crew.set(crew)
+
+        self.materialize(start=date(2030, 1, 1), days=2, batch_size=1)
+
+        for trip in Trip.objects.all():
+            self.assertEqual(set(trip.crew.all()), set(crew))
+
+    def test_trips_inserted_concurrently_are_skipped(self):
+        schedule = self.create_schedule()
+        crew = Crew.objects.create(first_name="Taras", last_name="Shevchenko")
+        schedule.crew.add(crew)
+        concurrent = []
+
+        def racing_insert_rows(model, fields, rows, **kwargs):
+            if model is Trip and not concurrent:
+                route_id, train_id, departure_time, arrival_time, _ = rows[1]
+                concurrent.append(Trip.objects.create(
+                    route_id=route_id,
+                    train_id=train_id,
+                    departure_time=departure_time,
+                    arrival_time=arrival_time
+                ))
+            return insert_rows(model, fields, rows, **kwargs)
+
+        with patch(
+            "train_station.schedules.insert_rows", racing_insert_rows
+        ):
+            created = self.materialize(start=date(2030, 1, 1), days=3)
+
+        self.assertEqual(created, 2)
+        self.assertEqual(Trip.objects.count(), 3)
+        self.assertFalse(concurrent[0].crew.exists())
+        for trip in Trip.objects.filter(schedule=schedule):
+            self.assertEqual(list(trip.crew.all()), [crew])
+
+    def test_schedules(self):
+        self.create_schedule()
+        other = self.create_schedule(departure_time=time(18))
+
+        self.assertEqual(
+            self.materialize(
+                start=date(2030, 1, 1),
+                days=2,
+                schedules=Schedule.objects.filter(pk=other.pk)
+            ),
+            2
+        )
+        self.assertEqual(
+            set(Trip.objects.values_list("schedule", flat=True)), {other.id}
+        )
+
+    @override_settings(SCHEDULE_HORIZON=timedelta(days=5))
+    def test_command(self):
+        self.create_schedule(valid_from=date(2000, 1, 1))
+        out = io.StringIO()
+
+        call_command("materialize_schedules", stdout=out)
+
+        self.assertIn("Created 5 trips", out.getvalue())
+        self.assertEqual(Trip.objects.count(), 5)
+
+    def test_validate_schedule(self):
+        for params in (
+            {"weekdays": "11111"},
+            {"weekdays": "1111112"},
+            {"weekdays": "0000000"},
+            {"duration": timedelta(0)},
+            {"valid_until": date(2029, 12, 31)},
+        ):
+            with self.subTest(params=params):
+                with self.assertRaises(ValidationError):
+                    Schedule(
+                        route=self.route,
+                        train=self.train,
+                        **{
+                            "departure_time": time(7, 30),
+                            "duration": timedelta(hours=5),
+                            "valid_from": date(2030, 1, 1),
+                            **params,
+                        }
+                    ).full_clean()
+
+
+class ScheduleApiTest(ScheduleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="admin@tests.com",
+            password="test_password",
+            is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+
+    def payload(self, **params):
+        return {
+            "route": self.route.id,
+            "train": self.train.id,
+            "weekdays": "1111100",
+            "departure_time": "07:30",
+            "duration": "05:00:00",
+            "valid_from": "2030-01-01",
+            **params,
+        }
+
+    def test_forbidden_for_users(self):
+        user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="test_password"
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.get(SCHEDULE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_create_schedule(self):
+        res = self.client.post(SCHEDULE_URL, self.payload())
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        schedule = Schedule.objects.get(id=res.data["id"])
+        self.assertEqual(schedule.weekdays, "1111100")
+        self.assertEqual(schedule.duration, timedelta(hours=5))
+
+    def test_create_invalid_schedule(self):
+        for params in (
+            {"weekdays": "11111xx"},
+            {"weekdays": "0000000"},
+            {"duration": "00:00:00"},
+            {"valid_until": "2029-12-31"},
+        ):
+            with self.subTest(params=params):
+                res = self.client.post(SCHEDULE_URL, self.payload(**params))
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(next(iter(params)), res.data)
+
+    def test_partial_update_is_validated(self):
+        schedule = self.create_schedule()
+
+        res = self.client.patch(
+            reverse("train_station:schedule-detail", args=(schedule.id,)),
+            {"valid_until": "2029-12-31"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_materialize(self):
+        schedule = self.create_schedule(valid_from=date(2000, 1, 1))
+
+        res = self.client.post(materialize_url(schedule.id) + "?days=3")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"created": 3})
+        self.assertEqual(Trip.objects.filter(schedule=schedule).count(), 3)
+
+        res = self.client.post(materialize_url(schedule.id) + "?days=0")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_trip_schedule_is_read_only(self):
+        schedule = self.create_schedule()
+        self.materialize(start=date(2030, 1, 1), days=1)
+        trip = Trip.objects.get()
+
+        res = self.client.patch(
+            reverse("train_station:trip-detail", args=(trip.id,)),
+            {"schedule": None},
+            format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        trip.refresh_from_db()
+        self.assertEqual(trip.schedule, schedule)
@@ -0,0 +1,103 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.allocation import SeatAllocator
+from train_station.models import Order, Ticket
+from train_station.seat_map import SeatMap
+from train_station.tests.test_trip_api import sample_trip
+
+
+ALLOCATE_URL = reverse("train_station:order-allocate")
+
+
+def sample_seat_map(taken) -> SeatMap:
+    seat_map = SeatMap(1, cargo_num=2, places_in_cargo=6)
+    seat_map.take(taken)
+    return seat_map
+
+
+class SeatAllocatorTest(TestCase):
+    def test_allocate_together_in_smallest_fitting_run(self):
+        allocator = SeatAllocator(sample_seat_map([(1, 4), (2, 3)]))
+
+        self.assertEqual(allocator.allocate(3), [(1, 1), (1, 2), (1, 3)])
+        self.assertEqual(allocator.allocate(2), [(1, 5), (1, 6)])
+        self.assertEqual(allocator.allocate(3), [(2, 4), (2, 5), (2, 6)])
+
+    def test_split_allocation_uses_longest_runs(self):
+        allocator = SeatAllocator(
+            sample_seat_map([(1, 3), (1, 6), (2, 2), (2, 5)])
+        )
+
+        self.assertEqual(
+            allocator.allocate(4), [(1, 4), (1, 5), (2, 3), (2, 4)]
+        )
+
+    def test_extra_taken_seats_are_skipped(self):
+        allocator = SeatAllocator(sample_seat_map([]), taken=[(1, 1)])
+
+        self.assertEqual(allocator.allocate(1), [(1, 2)])
+
+    def test_not_enough_seats(self):
+        allocator = SeatAllocator(
+            sample_seat_map([(1, seat) for seat in range(1, 7)])
+        )
+
+        self.assertIsNone(allocator.allocate(7))
+        self.assertEqual(allocator.free_count, 6)
+
+
+class AllocateOrderApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="test_password"
+        )
+        self.client.force_authenticate(self.user)
+        self.trip = sample_trip()
+
+    def test_allocate_order(self):
+        res = self.client.post(
+            ALLOCATE_URL, {"trip": self.trip.id, "seats_count": 3}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [(ticket["cargo"], ticket["seat"])
+             for ticket in res.data["tickets"]],
+            [(1, 1), (1, 2), (1, 3)]
+        )
+
+    def test_allocate_order_skips_stale_seat_map(self):
+        self.client.get(
+            reverse("train_station:trip-seats", args=(self.trip.id,))
+        )
+        Ticket.objects.bulk_create([
+            Ticket(
+                trip=self.trip,
+                order=Order.objects.create(customer=self.user),
+                cargo=1,
+                seat=1,
+            )
+        ])
+
+        res = self.client.post(
+            ALLOCATE_URL, {"trip": self.trip.id, "seats_count": 1}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(res.data["tickets"][0]["seat"], 1)
+
+    def test_allocate_too_many_seats(self):
+        res = self.client.post(
+            ALLOCATE_URL, {"trip": self.trip.id, "seats_count": 501}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
@@ -0,0 +1,168 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.booking import seat_conflicts
+from train_station.models import SeatHold, Ticket, Trip
+from train_station.serializers import TripSerializer
+from train_station.tests.test_trip_api import sample_trip
+
+
+HOLD_URL = reverse("train_station:seathold-list")
+ORDER_URL = reverse("train_station:order-list")
+
+
+def confirm_url(hold_id):
+    return reverse("train_station:seathold-confirm", args=(hold_id,))
+
+
+class UnauthenticatedSeatHoldApiTest(TestCase):
+    def test_hold_unauthorized(self):
+        res = APIClient().post(HOLD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedSeatHoldApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="test_password"
+        )
+        self.client.force_authenticate(self.user)
+        self.other_client = APIClient()
+        self.other_client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="other@test.com",
+                password="test_password"
+            )
+        )
+        self.trip = sample_trip()
+
+    def hold(self, client, *seats):
+        return client.post(
+            HOLD_URL,
+            {
+                "trip": self.trip.id,
+                "seats": [
+                    {"cargo": cargo, "seat": seat} for cargo, seat in seats
+                ]
+            },
+            format="json"
+        )
+
+    def expire_holds(self):
+        SeatHold.objects.update(expires_at=timezone.now() - timedelta(1))
+
+    def test_hold_seats(self):
+        res = self.hold(self.client, (1, 1), (1, 2))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["seats"]), 2)
+        self.assertGreater(
+            SeatHold.objects.get().expires_at,
+            timezone.now() + timedelta(minutes=9)
+        )
+
+    def test_hold_seat_out_of_range(self):
+        res = self.hold(self.client, (11, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_held_seats_reduce_tickets_available(self):
+        self.hold(self.client, (1, 1), (1, 2))
+
+        trip = Trip.objects.with_tickets_available().get()
+
+        self.assertEqual(trip.tickets_available, 498)
+
+    def test_held_seats_reduce_tickets_available_of_unannotated_trip(self):
+        self.hold(self.client, (1, 1), (1, 2))
+
+        data = TripSerializer(Trip.objects.get()).data
+
+        self.assertEqual(data["tickets_available"], 498)
+
+    def test_held_seat_cannot_be_held_or_ordered_by_others(self):
+        self.hold(self.client, (1, 1))
+
+        hold_res = self.hold(self.other_client, (1, 1))
+        order_res = self.other_client.post(
+            ORDER_URL,
+            {"tickets": [{"cargo": 1, "seat": 1, "trip": self.trip.id}]},
+            format="json"
+        )
+
+        self.assertEqual(hold_res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(order_res.status_code, status.HTTP_409_CONFLICT)
+
+    def test_concurrent_hold_becomes_conflict(self):
+        self.hold(self.other_client, (1, 1))
+        missed_conflicts = [[]]
+
+        def racing_seat_conflicts(seats, exclude_hold=None):
+            if missed_conflicts:
+                return missed_conflicts.pop()
+            return seat_conflicts(seats, exclude_hold)
+
+        with patch(
+            "train_station.booking.seat_conflicts", racing_seat_conflicts
+        ):
+            res = self.hold(self.client, (1, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["seats"], [{"trip": self.trip.id, "cargo": 1, "seat": 1}]
+        )
+        self.assertEqual(SeatHold.objects.count(), 1)
+
+    def test_confirm_hold(self):
+        hold_id = self.hold(self.client, (1, 1), (2, 3)).data["id"]
+
+        res = self.client.post(confirm_url(hold_id))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(Ticket.objects.values_list("cargo", "seat")),
+            [(1, 1), (2, 3)]
+        )
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_confirm_hold_of_other_customer(self):
+        hold_id = self.hold(self.other_client, (1, 1)).data["id"]
+
+        res = self.client.post(confirm_url(hold_id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_expired_hold(self):
+        hold_id = self.hold(self.client, (1, 1)).data["id"]
+        self.expire_holds()
+
+        confirm_res = self.client.post(confirm_url(hold_id))
+        hold_res = self.hold(self.other_client, (1, 1))
+
+        self.assertEqual(
+            confirm_res.status_code, status.HTTP_404_NOT_FOUND
+        )
+        self.assertEqual(hold_res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.count(), 1)
+
+    def test_release_expired_holds_command(self):
+        self.hold(self.client, (1, 1))
+        self.hold(self.client, (1, 2))
+        self.expire_holds()
+        self.hold(self.client, (1, 3))
+
+        call_command("release_expired_holds", stdout=StringIO())
+
+        self.assertEqual(SeatHold.objects.count(), 1)
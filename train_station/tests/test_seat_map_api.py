@@ -0,0 +1,145 @@
+import base64
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.models import Order, Ticket
+from train_station.seat_map import get_seat_map, SeatMap
+from train_station.tests.test_trip_api import sample_trip
+from train_station.tests import LOCAL_CACHES
+
+
+ORDER_URL = reverse("train_station:order-list")
+
+
+def seats_url(trip_id):
+    return reverse("train_station:trip-seats", args=(trip_id,))
+
+
+class SeatMapTest(TestCase):
+    def test_bits_are_packed_per_seat(self):
+        seat_map = SeatMap(1, cargo_num=2, places_in_cargo=5)
+        seat_map.take([(1, 1), (2, 5)])
+
+        self.assertEqual(bytes(seat_map.bits), bytes([0b10000000, 0b01000000]))
+        self.assertEqual(seat_map.taken_count, 2)
+        self.assertEqual(seat_map.taken_seats(2), [5])
+
+        seat_map.release([(2, 5)])
+
+        self.assertFalse(seat_map.is_taken(2, 5))
+
+    def test_seat_out_of_range(self):
+        seat_map = SeatMap(1, cargo_num=2, places_in_cargo=5)
+
+        with self.assertRaises(IndexError):
+            seat_map.take([(3, 1)])
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class SeatMapApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="test_password"
+        )
+        self.client.force_authenticate(self.user)
+        self.trip = sample_trip()
+        self.order = Order.objects.create(customer=self.user)
+        Ticket.objects.create(
+            trip=self.trip, order=self.order, cargo=1, seat=2
+        )
+
+    def test_packed_seat_map(self):
+        res = self.client.get(seats_url(self.trip.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["cargo_num"], 10)
+        self.assertEqual(res.data["places_in_cargo"], 50)
+        self.assertEqual(res.data["taken"], 1)
+        bits = base64.b64decode(res.data["seats"])
+        self.assertEqual(len(bits), 63)
+        self.assertEqual(bits[0], 0b01000000)
+        self.assertNotIn("cargos", res.data)
+
+    def test_expanded_seat_map(self):
+        res = self.client.get(seats_url(self.trip.id), {"expanded": "true"})
+
+        self.assertEqual(len(res.data["cargos"]), 10)
+        self.assertEqual(
+            res.data["cargos"][0], {"cargo": 1, "taken_seats": [2]}
+        )
+
+    def test_unknown_trip(self):
+        res = self.client.get(seats_url(1000))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_warm_seat_map_does_not_query_database(self):
+        self.client.get(seats_url(self.trip.id))
+
+        with self.assertNumQueries(0):
+            res = self.client.get(seats_url(self.trip.id))
+
+        self.assertEqual(res.data["taken"], 1)
+
+    def test_seat_map_updated_by_new_order(self):
+        self.client.get(seats_url(self.trip.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                ORDER_URL,
+                {"tickets": [{"cargo": 3, "seat": 30, "trip": self.trip.id}]},
+                format="json",
+            )
+        with self.assertNumQueries(0):
+            res = self.client.get(
+                seats_url(self.trip.id), {"expanded": "true"}
+            )
+
+        self.assertEqual(res.data["taken"], 2)
+        self.assertEqual(res.data["cargos"][2]["taken_seats"], [30])
+
+    def test_seat_map_updated_when_ticket_deleted(self):
+        self.client.get(seats_url(self.trip.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.all().delete()
+        res = self.client.get(seats_url(self.trip.id))
+
+        self.assertEqual(res.data["taken"], 0)
+
+    def test_booking_while_seat_map_is_built(self):
+        from_trip = SeatMap.from_trip
+
+        def booking_from_trip(trip):
+            seat_map = from_trip(trip)
+            with self.captureOnCommitCallbacks(execute=True):
+                Ticket.objects.create(
+                    trip=self.trip, order=self.order, cargo=3, seat=30
+                )
+            return seat_map
+
+        with patch.object(SeatMap, "from_trip", booking_from_trip):
+            self.assertEqual(get_seat_map(self.trip).taken_count, 1)
+
+        res = self.client.get(seats_url(self.trip.id))
+
+        self.assertEqual(res.data["taken"], 2)
+
+    def test_seat_map_invalidated_when_trip_changes(self):
+        self.client.get(seats_url(self.trip.id))
+        Ticket.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.trip.save()
+        res = self.client.get(seats_url(self.trip.id))
+
+        self.assertEqual(res.data["taken"], 0)
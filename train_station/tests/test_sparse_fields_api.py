@@ -0,0 +1,162 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.models import (
+    Crew,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+    Trip,
+)
+from train_station.serializers import parse_field_spec
+
+
+TRIP_URL = reverse("train_station:trip-list")
+ORDER_URL = reverse("train_station:order-list")
+FIRST_DAY = timezone.make_aware(datetime(2030, 1, 1))
+
+
+def trip_detail_url(trip_id):
+    return reverse("train_station:trip-detail", args=[trip_id])
+
+
+class ParseFieldSpecTest(TestCase):
+    def test_parse(self):
+        self.assertIsNone(parse_field_spec(None))
+        self.assertEqual(parse_field_spec(""), {})
+        self.assertEqual(
+            parse_field_spec("id, tickets.trip.route,tickets.seat,,"),
+            {"id": {}, "tickets": {"trip": {"route": {}}, "seat": {}}}
+        )
+
+
+class SparseFieldsApiTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="test_password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.route = Route.objects.create(
+            source_station=Station.objects.create(
+                name="Kyiv", latitude=50.45, longitude=30.52
+            ),
+            destination_station=Station.objects.create(
+                name="Lviv", latitude=49.84, longitude=24.03
+            ),
+            distance=540
+        )
+        train_type = TrainType.objects.create(name="Intercity")
+        crew = Crew.objects.create(first_name="Taras", last_name="Shevchenko")
+        self.trips = []
+        for number in range(3):
+            departure_time = FIRST_DAY + timedelta(hours=number)
+            trip = Trip.objects.create(
+                route=self.route,
+                train=Train.objects.create(
+                    name=f"Train {number}",
+                    cargo_num=2,
+                    places_in_cargo=10,
+                    train_type=train_type
+                ),
+                departure_time=departure_time,
+                arrival_time=departure_time + timedelta(hours=6)
+            )
+            trip.crew.add(crew)
+            self.trips.append(trip)
+        for seat in range(1, 4):
+            order = Order.objects.create(customer=self.user)
+            for trip in self.trips:
+                Ticket.objects.create(
+                    order=order, trip=trip, cargo=1, seat=seat
+                )
+
+    def count_queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, len(queries)
+
+    def test_fields(self):
+        res = self.client.get(TRIP_URL, {"fields": "id,departure_time"})
+
+        self.assertEqual(
+            set(res.data["results"][0]), {"id", "departure_time"}
+        )
+
+    def test_nested_fields(self):
+        res = self.client.get(
+            ORDER_URL, {"fields": "id,tickets.seat,tickets.trip.train"}
+        )
+
+        order = res.data["results"][0]
+        self.assertEqual(set(order), {"id", "tickets"})
+        self.assertEqual(
+            [ticket["trip"] for ticket in order["tickets"]],
+            [{"train": trip.train.name} for trip in self.trips]
+        )
+        self.assertEqual(set(order["tickets"][0]), {"seat", "trip"})
+
+    def test_expand(self):
+        res = self.client.get(ORDER_URL, {"expand": "tickets"})
+
+        ticket = res.data["results"][0]["tickets"][0]
+        self.assertEqual(ticket["trip"], self.trips[0].id)
+        self.assertEqual(set(ticket), {"id", "cargo", "seat", "trip"})
+
+    def test_empty_expand_renders_primary_keys(self):
+        res = self.client.get(trip_detail_url(self.trips[0].id), {
+            "expand": ""
+        })
+
+        self.assertEqual(res.data["route"], self.route.id)
+        self.assertEqual(res.data["crew"], [self.trips[0].crew.get().id])
+
+    def test_defaults_unchanged(self):
+        res = self.client.get(trip_detail_url(self.trips[0].id))
+
+        self.assertEqual(res.data["route"]["source_station"], "Kyiv")
+        self.assertEqual(res.data["crew"][0]["full_name"], "Taras Shevchenko")
+
+    def test_order_list_queries_trimmed(self):
+        _, default = self.count_queries(ORDER_URL)
+        _, expanded_tickets = self.count_queries(
+            ORDER_URL, {"expand": "tickets"}
+        )
+        _, no_tickets = self.count_queries(
+            ORDER_URL, {"fields": "id,created_at"}
+        )
+
+        self.assertLess(expanded_tickets, default)
+        self.assertLess(no_tickets, expanded_tickets)
+
+    def test_unrelated_trip_fields_skip_joins(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(TRIP_URL, {"fields": "id,departure_time"})
+
+        sql = " ".join(query["sql"] for query in queries.captured_queries)
+        self.assertNotIn("train_station_station", sql)
+        self.assertNotIn("train_station_crew", sql)
+
+    def test_writes_ignore_fields(self):
+        res = self.client.post(
+            f"{ORDER_URL}?fields=id",
+            {"tickets": [{"trip": self.trips[0].id, "cargo": 2, "seat": 1}]},
+            format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIn("tickets", res.data)
@@ -0,0 +1,120 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.autocomplete import fold, StationNameIndex
+from train_station.models import Station
+from train_station.tests import LOCAL_CACHES
+
+
+AUTOCOMPLETE_URL = reverse("train_station:station-autocomplete")
+
+
+class StationNameIndexTest(TestCase):
+    def setUp(self):
+        self.index = StationNameIndex()
+        for station_id, name in enumerate((
+            "Kyiv-Pasazhyrskyi",
+            "Kyiv-Darnytsia",
+            "Lviv",
+            "Zürich HB",
+            "Ivano-Frankivsk",
+            "Kyivska Rus",
+        )):
+            self.index.set_station(station_id, name)
+
+    def search(self, query, **kwargs):
+        return [
+            self.index.names[station_id]
+            for station_id in self.index.search(query, **kwargs)
+        ]
+
+    def test_fold(self):
+        self.assertEqual(fold("  ZÜRICH-hb "), "zurich hb")
+
+    def test_whole_name_prefix_first(self):
+        self.assertEqual(
+            self.search("kyiv"),
+            ["Kyiv-Darnytsia", "Kyiv-Pasazhyrskyi", "Kyivska Rus"]
+        )
+        self.assertEqual(self.search("Kyiv d"), ["Kyiv-Darnytsia"])
+
+    def test_later_word_and_diacritics(self):
+        self.assertEqual(self.search("frank"), ["Ivano-Frankivsk"])
+        self.assertEqual(self.search("zurich"), ["Zürich HB"])
+        self.assertEqual(self.search("hb"), ["Zürich HB"])
+
+    def test_limit(self):
+        self.assertEqual(len(self.search("k", limit=2)), 2)
+
+    def test_fuzzy(self):
+        self.assertEqual(self.search("lvov"), [])
+        self.assertEqual(self.search("Lvov", fuzzy=True), [])
+        self.assertEqual(
+            self.search("Ivano-Frankovsk", fuzzy=True), ["Ivano-Frankivsk"]
+        )
+
+    def test_rename_and_remove(self):
+        self.index.set_station(2, "Lwów")
+        self.index.remove_station(1)
+
+        self.assertEqual(self.search("lwow"), ["Lwów"])
+        self.assertEqual(self.search("lviv"), [])
+        self.assertEqual(
+            self.search("kyiv"), ["Kyiv-Pasazhyrskyi", "Kyivska Rus"]
+        )
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class StationAutocompleteApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="test@test.com",
+                password="test_password"
+            )
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kyiv = Station.objects.create(
+                name="Kyiv", latitude=50.45, longitude=30.52
+            )
+            Station.objects.create(
+                name="Kyiv-Darnytsia", latitude=50.44, longitude=30.62
+            )
+
+    def names(self, res):
+        return [station["name"] for station in res.data]
+
+    def test_autocomplete(self):
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "KYI"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0], {"id": self.kyiv.id, "name": "Kyiv"})
+        self.assertEqual(self.names(res), ["Kyiv", "Kyiv-Darnytsia"])
+
+    def test_index_kept_in_sync(self):
+        self.client.get(AUTOCOMPLETE_URL, {"q": "k"})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kyiv.name = "Kyjiw"
+            self.kyiv.save()
+            Station.objects.create(
+                name="Kharkiv", latitude=49.99, longitude=36.23
+            )
+
+        with self.assertNumQueries(0):
+            res = self.client.get(AUTOCOMPLETE_URL, {"q": "k"})
+
+        self.assertEqual(
+            self.names(res), ["Kharkiv", "Kyiv-Darnytsia", "Kyjiw"]
+        )
+
+    def test_invalid_params(self):
+        for params in ({}, {"q": " "}, {"q": "k", "limit": 100}):
+            res = self.client.get(AUTOCOMPLETE_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
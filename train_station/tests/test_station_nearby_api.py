@@ -0,0 +1,191 @@
+import math
+import random
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.models import Station
+from train_station.spatial import StationGrid
+from train_station.station_graph import great_circle_km
+from train_station.tests import LOCAL_CACHES
+
+
+NEARBY_URL = reverse("train_station:station-nearby")
+
+
+class StationGridTest(TestCase):
+    def test_matches_full_scan(self):
+        rng = random.Random(1)
+        grid = StationGrid()
+        points = {}
+        for station_id in range(2000):
+            points[station_id] = (
+                rng.uniform(44, 53), rng.uniform(170, 190) % 360 - 180
+            )
+            grid.set_station(station_id, str(station_id), *points[station_id])
+        for station_id in range(0, 2000, 3):
+            grid.remove_station(station_id)
+            del points[station_id]
+
+        for _ in range(30):
+            latitude = rng.uniform(44, 53)
+            longitude = rng.uniform(170, 190) % 360 - 180
+            radius = rng.uniform(10, 300)
+            expected = sorted(
+                (distance, station_id)
+                for station_id, distance in (
+                    (
+                        station_id,
+                        great_circle_km(
+                            (math.radians(latitude), math.radians(longitude)),
+                            tuple(map(math.radians, point)),
+                        ),
+                    )
+                    for station_id, point in points.items()
+                )
+                if distance <= radius
+            )[:20]
+
+            nearby = grid.nearby(latitude, longitude, radius, limit=20)
+
+            self.assertEqual(
+                [station_id for station_id, _ in nearby],
+                [station_id for _, station_id in expected]
+            )
+
+
+    def test_snapshot_is_unaffected_by_changes(self):
+        grid = StationGrid()
+        grid.set_station(1, "Kyiv", 50.45, 30.52)
+        snapshot = grid.snapshot()
+
+        grid.set_station(2, "Brovary", 50.51, 30.8)
+        grid.remove_station(1)
+
+        self.assertEqual(
+            [station_id for station_id, _ in snapshot.nearby(50.45, 30.52)],
+            [1]
+        )
+        self.assertEqual(list(snapshot.stations), [1])
+        self.assertEqual(
+            [station_id for station_id, _ in grid.nearby(50.45, 30.52)],
+            [2]
+        )
+
+    def test_queries_during_changes(self):
+        rng = random.Random(1)
+        grid = StationGrid()
+        for station_id in range(200):
+            grid.set_station(
+                station_id, str(station_id),
+                rng.uniform(49, 51), rng.uniform(29, 31)
+            )
+        errors = []
+        done = threading.Event()
+
+        def query():
+            while not done.is_set():
+                snapshot = grid.snapshot()
+                try:
+                    for station_id, _ in snapshot.nearby(50, 30, 50, limit=5):
+                        snapshot.stations[station_id]
+                except Exception as error:
+                    errors.append(error)
+                    return
+
+        readers = [threading.Thread(target=query) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for _ in range(2000):
+            station_id = rng.randrange(200)
+            grid.remove_station(station_id)
+            grid.set_station(
+                station_id, str(station_id),
+                rng.uniform(49, 51), rng.uniform(29, 31)
+            )
+        done.set()
+        for reader in readers:
+            reader.join()
+
+        self.assertEqual(errors, [])
+
+@override_settings(CACHES=LOCAL_CACHES)
+class StationNearbyApiTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="test@test.com",
+                password="test_password"
+            )
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for name, latitude, longitude in (
+                ("Kyiv", 50.45, 30.52),
+                ("Kyiv-Darnytsia", 50.44, 30.62),
+                ("Boryspil", 50.35, 30.95),
+                ("Lviv", 49.84, 24.03),
+            ):
+                Station.objects.create(
+                    name=name, latitude=latitude, longitude=longitude
+                )
+
+    def get_nearby(self, **params):
+        return self.client.get(NEARBY_URL, {"lat": 50.45, "lon": 30.5, **params})
+
+    def names(self, res):
+        return [station["name"] for station in res.data]
+
+    def test_nearest_first(self):
+        res = self.get_nearby(limit=3)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.names(res), ["Kyiv", "Kyiv-Darnytsia", "Boryspil"]
+        )
+        self.assertLess(res.data[0]["distance"], 2)
+        self.assertEqual(
+            set(res.data[0]), {"id", "name", "latitude", "longitude",
+                               "distance"}
+        )
+
+    def test_radius(self):
+        res = self.get_nearby(radius=20)
+
+        self.assertEqual(self.names(res), ["Kyiv", "Kyiv-Darnytsia"])
+
+    def test_index_updated_on_save_and_delete(self):
+        self.get_nearby()
+        with self.captureOnCommitCallbacks(execute=True):
+            Station.objects.create(
+                name="Kyiv-Pasazhyrskyi", latitude=50.4402, longitude=30.49
+            )
+            Station.objects.get(name="Kyiv").delete()
+            lviv = Station.objects.get(name="Lviv")
+            lviv.latitude, lviv.longitude = 50.45, 30.56
+            lviv.save()
+
+        with self.assertNumQueries(0):
+            res = self.get_nearby(radius=20)
+
+        self.assertEqual(
+            self.names(res), ["Kyiv-Pasazhyrskyi", "Lviv", "Kyiv-Darnytsia"]
+        )
+
+    def test_invalid_params(self):
+        for params in (
+            {"lat": 91},
+            {"lon": "east"},
+            {"radius": -1},
+            {"limit": 0},
+            {"limit": 1000},
+        ):
+            res = self.get_nearby(**params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -6,6 +6,9 @@ from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from train_station.models import (
     Train,
     TrainType,
@@ -13,6 +16,8 @@ from train_station.models import (
     Route,
     Trip,
     Crew,
+    Order,
+    Ticket,
 )
 from train_station.serializers import TripListSerializer, TripDetailSerializer
 
@@ -233,3 +238,117 @@ class AdminTripTest(TestCase):
         res = self.client.delete(detail_url(trip.id))
 
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+
+def sample_trips(
+    count: int, places_in_cargo: int = 10, start: int = 0
+) -> list[Trip]:
+    train_type, _ = TrainType.objects.get_or_create(name="Bulk Type")
+    trips = []
+    for index in range(start, start + count):
+        route = Route.objects.create(
+            source_station=Station.objects.create(
+                name=f"Source {index}",
+                latitude=10 + index,
+                longitude=10
+            ),
+            destination_station=Station.objects.create(
+                name=f"Destination {index}",
+                latitude=10 + index,
+                longitude=20
+            ),
+            distance=100 + index
+        )
+        train = Train.objects.create(
+            name=f"Train {index}",
+            cargo_num=2,
+            places_in_cargo=places_in_cargo,
+            train_type=train_type
+        )
+        trip = Trip.objects.create(
+            route=route,
+            train=train,
+            departure_time=DEPARTURE_TIME,
+            arrival_time=ARRIVAL_TIME
+        )
+        trip.crew.add(
+            Crew.objects.create(first_name="Crew", last_name=str(index))
+        )
+        trips.append(trip)
+    return trips
+
+
+class TripAvailabilityApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com",
+            password="test_password"
+        )
+        self.client.force_authenticate(self.user)
+
+    def book(self, trip, *seats):
+        order = Order.objects.create(customer=self.user)
+        for cargo, seat in seats:
+            Ticket.objects.create(
+                trip=trip, order=order, cargo=cargo, seat=seat
+            )
+
+    def test_tickets_available_in_list_and_detail(self):
+        trip = sample_trip()
+        self.book(trip, (1, 1), (2, 5))
+
+        res_list = self.client.get(TRIP_URL)
+        res_detail = self.client.get(detail_url(trip.id))
+
+        self.assertEqual(
+            res_list.data["results"][0]["tickets_available"], 498
+        )
+        self.assertEqual(res_detail.data["tickets_available"], 498)
+
+    def test_filter_by_min_tickets_available(self):
+        full_trip, free_trip = sample_trips(2, places_in_cargo=1)
+        self.book(full_trip, (1, 1), (2, 1))
+
+        res = self.client.get(TRIP_URL, {"min_tickets_available": 1})
+
+        self.assertEqual(
+            [trip["id"] for trip in res.data["results"]], [free_trip.id]
+        )
+
+    def test_filter_by_invalid_min_tickets_available(self):
+        for value in ("many", "-1", "99999999999999999999999"):
+            with self.subTest(value=value):
+                res = self.client.get(
+                    TRIP_URL, {"min_tickets_available": value}
+                )
+
+                self.assertEqual(
+                    res.status_code, status.HTTP_400_BAD_REQUEST
+                )
+
+    def test_order_by_tickets_available(self):
+        first_trip, second_trip, third_trip = sample_trips(3)
+        self.book(first_trip, (1, 1), (1, 2))
+        self.book(third_trip, (1, 1))
+
+        res = self.client.get(TRIP_URL, {"ordering": "-tickets_available"})
+
+        self.assertEqual(
+            [trip["id"] for trip in res.data["results"]],
+            [second_trip.id, third_trip.id, first_trip.id]
+        )
+
+    def test_list_query_count_does_not_depend_on_page_size(self):
+        trips = sample_trips(1)
+        with CaptureQueriesContext(connection) as single_page:
+            self.client.get(TRIP_URL)
+
+        for trip in trips + sample_trips(20, start=1):
+            self.book(trip, (1, 1))
+        with CaptureQueriesContext(connection) as large_page:
+            res = self.client.get(TRIP_URL)
+
+        self.assertEqual(len(res.data["results"]), 21)
+        self.assertEqual(len(single_page), len(large_page))
+
@@ -0,0 +1,194 @@
+import random
+import re
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from train_station.models import Route, Station, Train, TrainType, Trip
+from train_station.views import TripViewSet
+
+
+TRIP_URL = reverse("train_station:trip-list")
+FIRST_DAY = timezone.make_aware(datetime(2030, 1, 1))
+
+
+def seed_network(stations, routes, trains, trips_per_route):
+    rng = random.Random(0)
+    train_types = TrainType.objects.bulk_create(
+        [TrainType(name=f"Type {number}") for number in range(5)]
+    )
+    stations = Station.objects.bulk_create([
+        Station(name=f"Station {number}", latitude=number, longitude=number)
+        for number in range(stations)
+    ])
+    pairs = [
+        (source, destination)
+        for source in stations
+        for destination in stations
+        if source != destination
+    ]
+    routes = Route.objects.bulk_create([
+        Route(source_station=source, destination_station=destination,
+              distance=100)
+        for source, destination in rng.sample(pairs, routes)
+    ])
+    trains = Train.objects.bulk_create([
+        Train(name=f"Train {number}", cargo_num=5,
+              train_type=train_types[number % len(train_types)])
+        for number in range(trains)
+    ])
+    trips = []
+    for route in routes:
+        for train in rng.sample(trains, trips_per_route):
+            departure_time = FIRST_DAY + timedelta(
+                hours=rng.randrange(365 * 24)
+            )
+            trips.append(Trip(
+                route=route,
+                train=train,
+                departure_time=departure_time,
+                arrival_time=departure_time + timedelta(hours=5),
+            ))
+    Trip.objects.bulk_create(trips)
+    return stations, train_types
+
+
+class TripSearchApiTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="test@test.com",
+                password="test_password"
+            )
+        )
+        self.kyiv, self.lviv, self.odesa = [
+            Station.objects.create(
+                name=name, latitude=latitude, longitude=longitude
+            )
+            for name, latitude, longitude in (
+                ("Kyiv", 50.45, 30.52),
+                ("Lviv", 49.84, 24.03),
+                ("Odesa", 46.48, 30.72),
+            )
+        ]
+        self.intercity = TrainType.objects.create(name="Intercity")
+        regional = TrainType.objects.create(name="Regional")
+        self.to_lviv = self.trip(self.kyiv, self.lviv, 0, self.intercity)
+        self.to_lviv_later = self.trip(self.kyiv, self.lviv, 3, regional)
+        self.to_odesa = self.trip(self.kyiv, self.odesa, 1, self.intercity)
+        self.from_lviv = self.trip(self.lviv, self.kyiv, 1, regional)
+
+    def trip(self, source, destination, day, train_type):
+        route, _ = Route.objects.get_or_create(
+            source_station=source,
+            destination_station=destination,
+            defaults={"distance": 500}
+        )
+        train = Train.objects.create(
+            name=f"Train {Train.objects.count()}",
+            cargo_num=5,
+            train_type=train_type
+        )
+        departure_time = FIRST_DAY + timedelta(days=day, hours=23)
+        return Trip.objects.create(
+            route=route,
+            train=train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=6)
+        )
+
+    def search(self, **params):
+        res = self.client.get(TRIP_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [trip["id"] for trip in res.data["results"]]
+
+    def test_filter_by_stations(self):
+        self.assertEqual(
+            self.search(source=self.kyiv.id, destination=self.lviv.id),
+            [self.to_lviv.id, self.to_lviv_later.id]
+        )
+        self.assertEqual(
+            self.search(destination=self.kyiv.id), [self.from_lviv.id]
+        )
+
+    def test_filter_by_departure_days(self):
+        self.assertEqual(
+            self.search(departure_from="2030-01-02",
+                        departure_to="2030-01-02"),
+            [self.to_odesa.id, self.from_lviv.id]
+        )
+        self.assertEqual(
+            self.search(departure_from="2030-01-03"),
+            [self.to_lviv_later.id]
+        )
+
+    def test_filter_by_train_type(self):
+        self.assertEqual(
+            self.search(source=self.kyiv.id, train_type=self.intercity.id),
+            [self.to_lviv.id, self.to_odesa.id]
+        )
+
+    def test_invalid_params(self):
+        for params in (
+            {"source": "Kyiv"},
+            {"departure_from": "2030-02-30"},
+            {"departure_to": "tomorrow"},
+            {"train_type": "fast"},
+            {"source": "99999999999999999999999"},
+            {"destination": "0"},
+            {"train_type": "99999999999999999999999"},
+        ):
+            res = self.client.get(TRIP_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TripSearchPlanTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.stations, cls.train_types = seed_network(
+            stations=60, routes=800, trains=50, trips_per_route=25
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def plan(self, **params):
+        view = TripViewSet()
+        view.action = "list"
+        view.request = Request(RequestFactory().get(TRIP_URL, params))
+        return view.get_queryset().explain()
+
+    def assert_no_full_scan(self, plan):
+        if connection.vendor == "postgresql":
+            self.assertNotIn("Seq Scan", plan)
+        else:
+            self.assertIsNone(re.search(r"\bSCAN\b", plan), plan)
+
+    def test_search_uses_indexes(self):
+        source, destination = self.stations[:2]
+        for params in (
+            {"source": source.id},
+            {"destination": destination.id},
+            {"source": source.id, "destination": destination.id},
+            {"departure_from": "2030-03-01", "departure_to": "2030-03-02"},
+            {
+                "source": source.id,
+                "departure_from": "2030-03-01",
+                "departure_to": "2030-03-31",
+            },
+            {
+                "train_type": self.train_types[0].id,
+                "departure_from": "2030-03-01",
+                "departure_to": "2030-03-01",
+            },
+        ):
+            with self.subTest(**params):
+                self.assert_no_full_scan(self.plan(**params))
@@ -0,0 +1,53 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+
+from train_station.versions import (
+    VERSION_KEY,
+    ProcessIndex,
+    bump_versions,
+    get_versions,
+)
+
+
+class VersionsTest(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        # a client of its own, as another worker or command process has
+        self.other_process = caches.create_connection("default")
+
+    def test_cache_is_shared(self):
+        self.assertNotIsInstance(caches["default"], LocMemCache)
+
+    def test_bump_seen_by_other_processes(self):
+        versions = get_versions("station")
+
+        new_versions = bump_versions("station")
+
+        self.assertNotEqual(versions, new_versions)
+        self.assertEqual(
+            self.other_process.get(VERSION_KEY.format(label="station")),
+            new_versions["station"]
+        )
+
+    def test_index_rebuilt_after_bump_by_other_process(self):
+        loads = []
+        index = ProcessIndex(lambda: loads.append(1) or len(loads),
+                             ["station"])
+        self.assertEqual(index.get(), 1)
+        self.assertEqual(index.get(), 1)
+
+        self.other_process.set(
+            VERSION_KEY.format(label="station"), ("other", 0.0), None
+        )
+
+        self.assertEqual(index.get(), 2)
+
+    def test_versions_kept_when_cache_is_cleared(self):
+        versions = get_versions("station", "route")
+        bump_versions("route")
+        versions = get_versions("station", "route")
+
+        caches["default"].clear()
+
+        self.assertEqual(get_versions("station", "route"), versions)
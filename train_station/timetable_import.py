@@ -0,0 +1,745 @@
+"""
+Bulk import of stations, routes, trains, trips and crew assignments from
+CSV files or a GTFS feed.
+
+Input rows are keyed by natural key (station name, station pair, train
+name, the ``unique trip`` fields), so a repeated row replaces the earlier
+one. The rows are validated as sets, against each other and against what
+is already stored, and written with batched ``bulk_create`` upserts. No
+``save()``/``full_clean()`` runs per row and no signals are sent, so the
+change stamps are bumped once, on commit.
+"""
+import csv
+import io
+import math
+import os
+import zipfile
+from collections import Counter
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+from functools import partial
+from operator import itemgetter
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from train_station.bulk import batches, delete_rows, insert_rows
+from train_station.models import (
+    Crew,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+    Trip,
+)
+from train_station.seat_map import invalidate_train_seat_maps
+from train_station.station_graph import great_circle_km
+from train_station.versions import bump_versions
+
+
+IMPORT_BATCH_SIZE = 5000
+MAX_ERRORS = 100
+
+STATIONS_FILE = "stations.csv"
+ROUTES_FILE = "routes.csv"
+TRAINS_FILE = "trains.csv"
+TRIPS_FILE = "trips.csv"
+
+GTFS_TRAIN_TYPE = "GTFS"
+GTFS_CARGO_NUM = 10
+WEEKDAYS = (
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday",
+    "sunday",
+)
+
+TRIP_FIELDS = ("route", "train", "departure_time", "arrival_time")
+TRIP_KEY = next(
+    tuple(constraint.fields)
+    for constraint in Trip._meta.constraints
+    if constraint.name == "unique trip"
+)
+_trip_key = itemgetter(*(TRIP_FIELDS.index(field) for field in TRIP_KEY))
+
+
+class Timetable:
+    """
+    Rows to import. ``trips`` values are ``(route, train, departure_time,
+    arrival_time, crew)`` where ``route`` is a pair of station names and
+    ``crew`` a tuple of ``(first_name, last_name)``, or ``None`` to keep
+    the crew of an existing trip. Rows of models in ``insert_only`` are
+    only created when missing, existing ones are left as they are.
+    """
+
+    def __init__(self):
+        self.stations = {}
+        self.routes = {}
+        self.trains = {}
+        self.trips = {}
+        self.insert_only = set()
+        self.duplicates = Counter()
+        self.errors = []
+
+    def add(self, label, rows, key, value):
+        if key in rows:
+            self.duplicates[label] += 1
+        rows[key] = value
+
+    def add_trip(self, route, train, departure_time, arrival_time, crew):
+        trip = (route, train, departure_time, arrival_time, crew)
+        self.add("trip", self.trips, _trip_key(trip), trip)
+
+    def error(self, source, line, message):
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"{source}:{line}: {message}")
+
+
+def _open(path, name):
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            if name not in archive.namelist():
+                return None
+            return io.TextIOWrapper(
+                archive.open(name), encoding="utf-8-sig", newline=""
+            )
+    file_path = os.path.join(path, name)
+    if not os.path.exists(file_path):
+        return None
+    return open(file_path, encoding="utf-8-sig", newline="")
+
+
+def _name(value) -> str:
+    value = value.strip()
+    if not value:
+        raise ValueError("name must not be empty")
+    if len(value) > 255:
+        raise ValueError("name is longer than 255 characters")
+    return value
+
+
+def _positive(value, field) -> int:
+    value = int(value)
+    if value < 1:
+        raise ValueError(f"{field} must be positive")
+    return value
+
+
+def _coordinates(latitude, longitude) -> tuple[Decimal, Decimal]:
+    latitude = Station._meta.get_field("latitude").clean(
+        latitude.strip(), None
+    )
+    longitude = Station._meta.get_field("longitude").clean(
+        longitude.strip(), None
+    )
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("coordinates out of range")
+    return latitude, longitude
+
+
+def _datetime(value) -> datetime:
+    value = datetime.fromisoformat(value.strip())
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def _crew(value) -> tuple:
+    crew = []
+    for name in value.split(";"):
+        name = name.strip()
+        if name:
+            first_name, _, last_name = name.rpartition(" ")
+            crew.append((_name(first_name), _name(last_name)))
+    return tuple(crew)
+
+
+def _parse_rows(timetable, source, csv_file, parse_row):
+    reader = csv.DictReader(csv_file)
+    for row in reader:
+        try:
+            parse_row(row)
+        except (KeyError, ValueError, InvalidOperation,
+                ValidationError) as error:
+            if isinstance(error, KeyError):
+                message = f"missing column {error}"
+            elif isinstance(error, ValidationError):
+                message = "; ".join(error.messages)
+            else:
+                message = str(error)
+            timetable.error(source, reader.line_num, message)
+
+
+def _read_file(timetable, path, name, parse_row, required=False):
+    csv_file = _open(path, name)
+    if csv_file is None:
+        if required:
+            timetable.error(name, 0, "file is missing")
+        return
+    with csv_file:
+        _parse_rows(timetable, name, csv_file, parse_row)
+
+
+def read_csv(path) -> Timetable:
+    """
+    Read ``stations.csv`` (name, latitude, longitude), ``routes.csv``
+    (source, destination, distance), ``trains.csv`` (name, cargo_num,
+    places_in_cargo, train_type) and ``trips.csv`` (source, destination,
+    train, departure_time, arrival_time and optionally crew, as
+    ``;``-separated "first last" names) from a directory or a zip file.
+    Every file is optional; naive datetimes are in the current time zone.
+    """
+    timetable = Timetable()
+
+    def station(row):
+        timetable.add(
+            "station", timetable.stations, _name(row["name"]),
+            _coordinates(row["latitude"], row["longitude"])
+        )
+
+    def route(row):
+        timetable.add(
+            "route", timetable.routes,
+            (_name(row["source"]), _name(row["destination"])),
+            _positive(row["distance"], "distance")
+        )
+
+    def train(row):
+        timetable.add(
+            "train", timetable.trains, _name(row["name"]),
+            (
+                _positive(row["cargo_num"], "cargo_num"),
+                _positive(row["places_in_cargo"], "places_in_cargo"),
+                _name(row["train_type"]),
+            )
+        )
+
+    def trip(row):
+        departure_time = _datetime(row["departure_time"])
+        arrival_time = _datetime(row["arrival_time"])
+        if arrival_time <= departure_time:
+            raise ValueError("arrival_time must be after departure_time")
+        crew = row.get("crew")
+        timetable.add_trip(
+            (_name(row["source"]), _name(row["destination"])),
+            _name(row["train"]),
+            departure_time,
+            arrival_time,
+            None if crew is None else _crew(crew),
+        )
+
+    _read_file(timetable, path, STATIONS_FILE, station)
+    _read_file(timetable, path, ROUTES_FILE, route)
+    _read_file(timetable, path, TRAINS_FILE, train)
+    _read_file(timetable, path, TRIPS_FILE, trip)
+    return timetable
+
+
+def _gtfs_date(value) -> date:
+    return datetime.strptime(value.strip(), "%Y%m%d").date()
+
+
+def _gtfs_seconds(value) -> int:
+    hours, minutes, seconds = value.strip().split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def service_day_start(day, zone) -> datetime:
+    """GTFS times count from noon minus 12 hours of the service day"""
+    noon = datetime.combine(day, time(12), tzinfo=zone)
+    return noon.astimezone(dt_timezone.utc) - timedelta(hours=12)
+
+
+class _GTFSFeed:
+    """Parsers of the GTFS files a timetable is built from"""
+
+    def __init__(self, timetable):
+        self.timetable = timetable
+        self.zone = timezone.get_current_timezone()
+        self.stops = {}
+        self.parents = {}
+        self.routes = set()
+        self.trips = {}
+        self.services = {}
+        self.ends = {}
+
+    def agency(self, row):
+        try:
+            self.zone = ZoneInfo(row["agency_timezone"].strip())
+        except (ValueError, ZoneInfoNotFoundError):
+            raise ValueError(
+                f"unknown time zone {row['agency_timezone']!r}"
+            )
+
+    def stop(self, row):
+        parent = row.get("parent_station", "").strip()
+        if parent:
+            self.parents[row["stop_id"]] = parent
+            return
+        name = _name(row["stop_name"])
+        coordinates = _coordinates(row["stop_lat"], row["stop_lon"])
+        self.stops[row["stop_id"]] = name
+        self.timetable.add(
+            "station", self.timetable.stations, name, coordinates
+        )
+
+    def route(self, row):
+        self.routes.add(row["route_id"])
+
+    def trip(self, row):
+        if row["route_id"] not in self.routes:
+            raise ValueError(f"unknown route_id {row['route_id']!r}")
+        self.trips[row["trip_id"]] = (
+            row["service_id"],
+            _name(row.get("trip_short_name") or row["trip_id"]),
+        )
+
+    def calendar(self, row):
+        day = _gtfs_date(row["start_date"])
+        end_date = _gtfs_date(row["end_date"])
+        weekdays = [row[weekday].strip() == "1" for weekday in WEEKDAYS]
+        dates = self.services.setdefault(row["service_id"], set())
+        while day <= end_date:
+            if weekdays[day.weekday()]:
+                dates.add(day)
+            day += timedelta(days=1)
+
+    def calendar_date(self, row):
+        dates = self.services.setdefault(row["service_id"], set())
+        day = _gtfs_date(row["date"])
+        exception_type = row["exception_type"].strip()
+        if exception_type == "1":
+            dates.add(day)
+        elif exception_type == "2":
+            dates.discard(day)
+        else:
+            raise ValueError("exception_type must be 1 or 2")
+
+    def stop_time(self, row):
+        """Keep only the first and the last stop of every trip"""
+        sequence = int(row["stop_sequence"])
+        first, last = self.ends.get(row["trip_id"], (None, None))
+        if first is None or sequence < first[0]:
+            first = (sequence, row["departure_time"], row["stop_id"])
+        if last is None or sequence > last[0]:
+            distance = (row.get("shape_dist_traveled") or "").strip()
+            last = (
+                sequence, row["arrival_time"], row["stop_id"],
+                float(distance) if distance else None,
+            )
+        self.ends[row["trip_id"]] = first, last
+
+    def station(self, stop_id):
+        return self.stops.get(self.parents.get(stop_id, stop_id))
+
+    def distance(self, source, destination, distance) -> int:
+        if distance is None:
+            distance = great_circle_km(*(
+                tuple(map(math.radians, map(float, coordinates)))
+                for coordinates in (
+                    self.timetable.stations[source],
+                    self.timetable.stations[destination],
+                )
+            ))
+        return max(1, round(distance))
+
+    def add_trips(self, trip_id, service_id, train, train_defaults):
+        first, last = self.ends.get(trip_id, (None, None))
+        if first is None or first[0] == last[0]:
+            raise ValueError("needs two stops")
+        source = self.station(first[2])
+        destination = self.station(last[2])
+        if source is None or destination is None:
+            raise ValueError("has an unknown stop_id")
+        departure = _gtfs_seconds(first[1])
+        arrival = _gtfs_seconds(last[1])
+        if arrival <= departure:
+            raise ValueError("must arrive after it departs")
+
+        route = (source, destination)
+        if route not in self.timetable.routes:
+            self.timetable.routes[route] = self.distance(*route, last[3])
+        self.timetable.trains.setdefault(train, train_defaults)
+        for day in sorted(self.services.get(service_id, ())):
+            start = service_day_start(day, self.zone)
+            self.timetable.add_trip(
+                route,
+                train,
+                start + timedelta(seconds=departure),
+                start + timedelta(seconds=arrival),
+                None,
+            )
+
+
+def read_gtfs(path, train_type=GTFS_TRAIN_TYPE,
+              cargo_num=GTFS_CARGO_NUM) -> Timetable:
+    """
+    Read a GTFS feed from a directory or a zip file. Stops without a parent
+    station become stations, every trip becomes one trip per service day
+    from its first to its last stop, named after ``trip_short_name`` (or
+    ``trip_id``). Missing routes get the ``shape_dist_traveled`` of the
+    last stop, read as kilometres, or the great circle distance; missing
+    trains get ``cargo_num`` cars of ``train_type``. Existing routes and
+    trains are not changed.
+    """
+    timetable = Timetable()
+    timetable.insert_only.update({"route", "train"})
+    feed = _GTFSFeed(timetable)
+    for name, parse_row, required in (
+        ("agency.txt", feed.agency, False),
+        ("stops.txt", feed.stop, True),
+        ("routes.txt", feed.route, True),
+        ("trips.txt", feed.trip, True),
+        ("calendar.txt", feed.calendar, False),
+        ("calendar_dates.txt", feed.calendar_date, False),
+        ("stop_times.txt", feed.stop_time, True),
+    ):
+        _read_file(timetable, path, name, parse_row, required)
+
+    for trip_id, (service_id, train) in feed.trips.items():
+        try:
+            feed.add_trips(
+                trip_id, service_id, train, (cargo_num, None, train_type)
+            )
+        except ValueError as error:
+            timetable.error("stop_times.txt", 0, f"trip {trip_id!r} {error}")
+    return timetable
+
+
+def _resize_errors(timetable) -> list[str]:
+    """Trains made smaller than the seats sold on their upcoming trips"""
+    if "train" in timetable.insert_only or not timetable.trains:
+        return []
+    default_places = Train._meta.get_field("places_in_cargo").default
+    errors = []
+    for name, cargo, seat in (
+        Ticket.objects.filter(trip__departure_time__gte=timezone.now())
+        .values_list("trip__train__name")
+        .annotate(Max("cargo"), Max("seat"))
+        .order_by("trip__train__name")
+    ):
+        if name not in timetable.trains:
+            continue
+        cargo_num, places_in_cargo, _ = timetable.trains[name]
+        if places_in_cargo is None:
+            places_in_cargo = default_places
+        if cargo_num < cargo:
+            errors.append(
+                f"train {name}: cargo_num {cargo_num} is below cargo "
+                f"{cargo} sold on upcoming trips"
+            )
+        if places_in_cargo < seat:
+            errors.append(
+                f"train {name}: places_in_cargo {places_in_cargo} is below "
+                f"seat {seat} sold on upcoming trips"
+            )
+    return errors
+
+
+def validate(timetable):
+    """
+    Check the rows against each other and the stored stations, routes and
+    trains, raising ``ValidationError`` with every problem found
+    """
+    errors = list(timetable.errors)
+
+    stations = dict(
+        (name, (latitude, longitude))
+        for name, latitude, longitude in Station.objects.values_list(
+            "name", "latitude", "longitude"
+        )
+    )
+    stations.update(timetable.stations)
+    names_at = {}
+    for name, coordinates in stations.items():
+        names_at.setdefault(coordinates, []).append(name)
+    for coordinates, names in names_at.items():
+        if len(names) > 1 and timetable.stations.keys() & set(names):
+            errors.append(
+                f"stations {', '.join(sorted(names))} share coordinates "
+                f"{coordinates[0]}, {coordinates[1]}"
+            )
+
+    for source, destination in timetable.routes:
+        try:
+            Route.validate_route(source, destination, ValueError)
+        except ValueError as error:
+            errors.append(f"route {source} - {destination}: {error}")
+        for name in (source, destination):
+            if name not in stations:
+                errors.append(
+                    f"route {source} - {destination}: unknown station {name}"
+                )
+
+    routes = set(
+        Route.objects.values_list(
+            "source_station__name", "destination_station__name"
+        )
+    )
+    routes.update(timetable.routes)
+    trains = set(Train.objects.values_list("name", flat=True))
+    trains.update(timetable.trains)
+    missing_routes = Counter()
+    missing_trains = Counter()
+    for route, train, *_ in timetable.trips.values():
+        if route not in routes:
+            missing_routes[route] += 1
+        if train not in trains:
+            missing_trains[train] += 1
+    errors.extend(
+        f"{count} trips: unknown route {source} - {destination}"
+        for (source, destination), count in missing_routes.items()
+    )
+    errors.extend(
+        f"{count} trips: unknown train {train}"
+        for train, count in missing_trains.items()
+    )
+    errors.extend(_resize_errors(timetable))
+
+    if errors:
+        raise ValidationError(errors[:MAX_ERRORS])
+
+
+def _upsert(model, objects, unique_fields, update_fields, insert_only,
+            batch_size):
+    if insert_only or not update_fields:
+        model.objects.bulk_create(
+            objects, batch_size, ignore_conflicts=True
+        )
+    else:
+        model.objects.bulk_create(
+            objects,
+            batch_size,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields,
+        )
+
+
+def _write_stations(timetable, batch_size):
+    _upsert(
+        Station,
+        [
+            Station(name=name, latitude=latitude, longitude=longitude)
+            for name, (latitude, longitude) in timetable.stations.items()
+        ],
+        ["name"],
+        ["latitude", "longitude"],
+        "station" in timetable.insert_only,
+        batch_size,
+    )
+    return dict(Station.objects.values_list("name", "id"))
+
+
+def _write_routes(timetable, station_ids, batch_size):
+    _upsert(
+        Route,
+        [
+            Route(
+                source_station_id=station_ids[source],
+                destination_station_id=station_ids[destination],
+                distance=distance,
+            )
+            for (source, destination), distance in timetable.routes.items()
+        ],
+        ["source_station", "destination_station"],
+        ["distance"],
+        "route" in timetable.insert_only,
+        batch_size,
+    )
+    names = {station_id: name for name, station_id in station_ids.items()}
+    return {
+        (names[source_id], names[destination_id]): route_id
+        for route_id, source_id, destination_id in Route.objects.values_list(
+            "id", "source_station_id", "destination_station_id"
+        )
+    }
+
+
+def _write_trains(timetable, batch_size):
+    """Write trains and return their ids and the ids of resized trains"""
+    type_names = {
+        train_type for _, _, train_type in timetable.trains.values()
+    }
+    TrainType.objects.bulk_create(
+        [TrainType(name=name) for name in type_names],
+        ignore_conflicts=True,
+    )
+    type_ids = dict(
+        TrainType.objects.filter(name__in=type_names).values_list(
+            "name", "id"
+        )
+    )
+
+    insert_only = "train" in timetable.insert_only
+    existing = {
+        name: (train_id, (cargo_num, places_in_cargo))
+        for name, train_id, cargo_num, places_in_cargo in (
+            Train.objects.values_list(
+                "name", "id", "cargo_num", "places_in_cargo"
+            )
+        )
+    }
+    trains = []
+    for name, (cargo_num, places_in_cargo, train_type) in (
+        timetable.trains.items()
+    ):
+        train = Train(
+            name=name, cargo_num=cargo_num, train_type_id=type_ids[train_type]
+        )
+        if places_in_cargo is not None:
+            train.places_in_cargo = places_in_cargo
+        trains.append(train)
+    _upsert(
+        Train,
+        trains,
+        ["name"],
+        ["cargo_num", "places_in_cargo", "train_type"],
+        insert_only,
+        batch_size,
+    )
+    resized = [
+        existing[train.name][0]
+        for train in trains
+        if not insert_only
+        and train.name in existing
+        and existing[train.name][1] != (
+            train.cargo_num, train.places_in_cargo
+        )
+    ]
+    return dict(Train.objects.values_list("name", "id")), resized
+
+
+def _crew_ids(timetable, batch_size):
+    names = {
+        name
+        for *_, crew in timetable.trips.values()
+        if crew
+        for name in crew
+    }
+    if not names:
+        return {}
+    crew_ids = {}
+    for crew_id, first_name, last_name in Crew.objects.order_by(
+        "-id"
+    ).values_list("id", "first_name", "last_name"):
+        crew_ids[(first_name, last_name)] = crew_id
+    created = Crew.objects.bulk_create(
+        [
+            Crew(first_name=first_name, last_name=last_name)
+            for first_name, last_name in names - crew_ids.keys()
+        ],
+        batch_size,
+    )
+    crew_ids.update(
+        ((crew.first_name, crew.last_name), crew.id) for crew in created
+    )
+    return crew_ids
+
+
+def _write_trips(timetable, route_ids, train_ids, crew_ids, batch_size,
+                 progress):
+    fields = [f"{field}_id" if field in ("route", "train") else field
+              for field in TRIP_FIELDS]
+    unique_fields = [fields[TRIP_FIELDS.index(field)] for field in TRIP_KEY]
+    update_fields = [
+        field for field in fields if field not in unique_fields
+    ]
+    through = Trip.crew.through
+    trips = list(timetable.trips.values())
+    done = 0
+    for batch in batches(trips, batch_size):
+        trip_ids = insert_rows(
+            Trip,
+            fields,
+            [
+                (
+                    route_ids[route], train_ids[train], departure_time,
+                    arrival_time,
+                )
+                for route, train, departure_time, arrival_time, _ in batch
+            ],
+            unique_fields,
+            update_fields,
+        )
+
+        crewed = [
+            (trip_id, crew)
+            for trip_id, (*_, crew) in zip(trip_ids, batch)
+            if crew is not None
+        ]
+        if crewed:
+            delete_rows(
+                through, "trip", [trip_id for trip_id, _ in crewed]
+            )
+            insert_rows(
+                through,
+                ["trip_id", "crew_id"],
+                [
+                    (trip_id, crew_ids[name])
+                    for trip_id, crew in crewed
+                    for name in set(crew)
+                ],
+            )
+
+        done += len(batch)
+        if progress:
+            progress("trip", done, len(trips))
+
+
+def import_timetable(timetable, batch_size=IMPORT_BATCH_SIZE, dry_run=False,
+                     progress=None) -> dict:
+    """
+    Validate and write ``timetable`` in one transaction, rolled back when
+    ``dry_run``. ``progress(label, done, total)`` is called as rows are
+    written. Return ``{label: (rows, created)}`` per model.
+    """
+    validate(timetable)
+
+    models = {
+        "station": (Station, timetable.stations),
+        "route": (Route, timetable.routes),
+        "train": (Train, timetable.trains),
+        "trip": (Trip, timetable.trips),
+    }
+    with transaction.atomic():
+        counts = {
+            label: model.objects.count()
+            for label, (model, _) in models.items()
+        }
+
+        station_ids = _write_stations(timetable, batch_size)
+        if progress:
+            progress("station", len(timetable.stations),
+                     len(timetable.stations))
+        route_ids = _write_routes(timetable, station_ids, batch_size)
+        if progress:
+            progress("route", len(timetable.routes), len(timetable.routes))
+        train_ids, resized = _write_trains(timetable, batch_size)
+        if progress:
+            progress("train", len(timetable.trains), len(timetable.trains))
+        crew_ids = _crew_ids(timetable, batch_size)
+        _write_trips(
+            timetable, route_ids, train_ids, crew_ids, batch_size, progress
+        )
+
+        counts = {
+            label: (len(rows), model.objects.count() - counts[label])
+            for label, (model, rows) in models.items()
+        }
+
+        if dry_run:
+            transaction.set_rollback(True)
+        else:
+            for train_id in resized:
+                transaction.on_commit(
+                    partial(invalidate_train_seat_maps, train_id)
+                )
+            # bulk_create sends no post_save
+            transaction.on_commit(partial(
+                bump_versions,
+                "station", "route", "train", "traintype", "trip", "crew",
+            ))
+    return counts
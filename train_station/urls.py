@@ -7,8 +7,12 @@ from train_station.views import (
     StationViewSet,
     RouteViewSet,
     CrewViewSet,
+    ScheduleViewSet,
     TripViewSet,
     OrderViewSet,
+    SeatHoldViewSet,
+    OrderRequestViewSet,
+    ExportViewSet,
 )
 
 
@@ -18,8 +22,12 @@ router.register("trains", TrainViewSet)
 router.register("stations", StationViewSet)
 router.register("routes", RouteViewSet)
 router.register("crews", CrewViewSet)
+router.register("schedules", ScheduleViewSet)
 router.register("trips", TripViewSet)
 router.register("orders", OrderViewSet)
+router.register("seat_holds", SeatHoldViewSet)
+router.register("order_requests", OrderRequestViewSet)
+router.register("exports", ExportViewSet, basename="export")
 
 urlpatterns = [path("", include(router.urls))]
 
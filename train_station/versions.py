@@ -0,0 +1,163 @@
+"""
+Per-model change stamps kept in the Django cache.
+
+Every write to a model bumps its stamp, so in-process indexes and cached
+responses can tell whether the data they were built from is still
+current without querying the model tables. A stamp is
+``(token, timestamp)``. The cache must be shared by every process (see
+``CACHES``) for a bump by one worker or management command to reach the
+others. Bumps are also written to ``ModelVersion``, which stamps missing
+from the cache are read back from, so clearing the cache does not make
+current data look changed.
+
+Object stamps track changes of a single row, such as the seats of one
+trip, and live in the cache only: a lost stamp is recreated with a new
+token, which can only make data look changed.
+"""
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+
+from train_station.models import ModelVersion
+
+
+VERSION_KEY = "model_version:{label}"
+OBJECT_VERSION_KEY = "object_version:{label}:{pk}"
+VERSION_TIMEOUT = None
+
+
+def _new_version() -> tuple[str, float]:
+    return uuid.uuid4().hex, time.time()
+
+
+def _store_versions(versions, update):
+    ModelVersion.objects.bulk_create(
+        [
+            ModelVersion(label=label, token=token, timestamp=timestamp)
+            for label, (token, timestamp) in versions.items()
+        ],
+        **(
+            {
+                "update_conflicts": True,
+                "unique_fields": ["label"],
+                "update_fields": ["token", "timestamp"],
+            }
+            if update else {"ignore_conflicts": True}
+        ),
+    )
+
+
+def _stored_versions(labels) -> dict:
+    """Stamps of ``labels`` from the database, created where missing"""
+    versions = {
+        label: (token, timestamp)
+        for label, token, timestamp in ModelVersion.objects.filter(
+            label__in=labels
+        ).values_list("label", "token", "timestamp")
+    }
+    missing = [label for label in labels if label not in versions]
+    if missing:
+        _store_versions(
+            {label: _new_version() for label in missing}, update=False
+        )
+        versions.update(_stored_versions(missing))
+    return versions
+
+
+def get_versions(*labels) -> dict:
+    keys = {VERSION_KEY.format(label=label): label for label in labels}
+    versions = {
+        keys[key]: version for key, version in cache.get_many(keys).items()
+    }
+    missing = [label for label in labels if label not in versions]
+    if missing:
+        for label, version in _stored_versions(missing).items():
+            cache.add(VERSION_KEY.format(label=label), version,
+                      VERSION_TIMEOUT)
+        versions.update(
+            (keys[key], version)
+            for key, version in cache.get_many([
+                VERSION_KEY.format(label=label) for label in missing
+            ]).items()
+        )
+    return versions
+
+
+def bump_versions(*labels) -> dict:
+    versions = {label: _new_version() for label in labels}
+    _store_versions(versions, update=True)
+    cache.set_many(
+        {
+            VERSION_KEY.format(label=label): version
+            for label, version in versions.items()
+        },
+        VERSION_TIMEOUT,
+    )
+    return versions
+
+
+def get_object_version(label, pk) -> str:
+    key = OBJECT_VERSION_KEY.format(label=label, pk=pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def bump_object_versions(label, *pks):
+    cache.set_many(
+        {
+            OBJECT_VERSION_KEY.format(label=label, pk=pk): uuid.uuid4().hex
+            for pk in pks
+        },
+        VERSION_TIMEOUT,
+    )
+
+
+class ProcessIndex:
+    """
+    Holder of an in-memory index shared by the threads of one process.
+
+    ``loader`` builds the index from the database; the holder remembers the
+    change stamps of ``models`` the index was built from and rebuilds it
+    when another process bumps one of them.
+    """
+
+    def __init__(self, loader, models):
+        self.loader = loader
+        self.models = tuple(models)
+        self._index = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            version = get_versions(*self.models)
+            if self._index is None or self._version != version:
+                self._index = self.loader()
+                self._version = version
+            return self._index
+
+    def update(self, previous_versions, versions, apply=None):
+        """
+        Apply an incremental change with ``apply(index)`` if the index was
+        current before the change (``previous_versions``) and record the
+        stamps it is current with now. Otherwise, or without ``apply``,
+        the index is dropped and rebuilt on next use.
+        """
+        with self._lock:
+            if self._index is None:
+                return
+            if apply is None or self._version != {
+                model: previous_versions[model] for model in self.models
+            }:
+                self._index = None
+                return
+            apply(self._index)
+            self._version = {
+                model: versions.get(model, self._version[model])
+                for model in self.models
+            }
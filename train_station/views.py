@@ -1,4 +1,25 @@
-from rest_framework import mixins, viewsets
+import hashlib
+import math
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import http_date, quote_etag
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import (
+    APIException,
+    NotFound,
+    ValidationError,
+)
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.viewsets import GenericViewSet
 
@@ -8,10 +29,14 @@ from train_station.models import (
     Station,
     Route,
     Crew,
+    Schedule,
     Trip,
-    Order
+    Order,
+    SeatHold,
+    OrderRequest,
 )
 from train_station.serializers import (
+    DynamicFieldsMixin,
     TrainTypeSerializer,
     TrainSerializer,
     TrainDetailSerializer,
@@ -21,23 +46,243 @@ from train_station.serializers import (
     RouteDetailSerializer,
     RouteListSerializer,
     CrewSerializer,
+    ScheduleSerializer,
     TripSerializer,
     TripDetailSerializer,
     TripListSerializer,
     OrderSerializer,
     OrderListSerializer,
+    SeatHoldSerializer,
+    AllocatedOrderSerializer,
+    OrderRequestSerializer,
+)
+from train_station.autocomplete import get_station_names
+from train_station.booking import (
+    confirm_hold,
+    SeatsTaken,
+    TRIP_AVAILABILITY,
+)
+from train_station.distance_matrix import get_distance_matrix
+from train_station.exceptions import SeatConflict
+from train_station.exports import EXPORTS, NDJSON, OUTPUTS, export
+from train_station.fast_serializers import TripListFastSerializer
+from train_station.idempotency import (
+    get_idempotency_store,
+    request_fingerprint,
+)
+from train_station.journeys import (
+    EARLIEST_ARRIVAL,
+    FEWEST_TRANSFERS,
+    get_timetable,
+    journey_legs,
 )
+from train_station.order_queue import enqueue_order, queued_intake_enabled
+from train_station.pagination import SelectablePagination
+from train_station.response_cache import get_or_render, response_digest
+from train_station.schedules import materialize_schedules
+from train_station.seat_map import get_cached_seat_map, get_seat_map
+from train_station.spatial import get_station_grid
+from train_station.station_graph import get_station_graph
+from train_station.versions import get_object_version, get_versions
+
+
+# a day, longer transfers are separate journeys
+MAX_MIN_TRANSFER_MINUTES = 24 * 60
+# largest BigAutoField value, larger ids overflow the database parameter
+MAX_ID = 2 ** 63 - 1
+
+
+def _station_param(request, name) -> int:
+    value = request.query_params.get(name, "")
+    if not value.isdigit():
+        raise ValidationError({name: "A valid station id is required."})
+    return int(value)
+
+
+def _related_lookups(tree, prefix=""):
+    for name, subtree in tree.items():
+        if subtree:
+            yield from _related_lookups(subtree, f"{prefix}{name}__")
+        else:
+            yield f"{prefix}{name}"
+
+
+class SparseFieldsMixin:
+    """
+    Trim ``select_related`` and ``prefetch_related`` down to the relations
+    still rendered when ``?fields=`` or ``?expand=`` leave some out.
+    """
+
+    def _trim_lookups(self, serializer, lookups) -> list:
+        trimmed = []
+        for lookup in lookups:
+            parts = (
+                lookup if isinstance(lookup, str) else lookup.prefetch_to
+            ).split("__")
+            depth = serializer.related_depth(parts)
+            if depth < len(parts):
+                lookup = "__".join(parts[:depth])
+            if lookup and lookup not in trimmed:
+                trimmed.append(lookup)
+        return trimmed
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        params = self.request.query_params
+        if "fields" not in params and "expand" not in params:
+            return queryset
+        serializer = self.get_serializer()
+        if not isinstance(serializer, DynamicFieldsMixin):
+            return queryset
+
+        select_related = queryset.query.select_related
+        prefetch_related = self._trim_lookups(
+            serializer, queryset._prefetch_related_lookups
+        )
+        queryset = queryset.prefetch_related(None).prefetch_related(
+            *prefetch_related
+        )
+        if isinstance(select_related, dict):
+            select_related = self._trim_lookups(
+                serializer, _related_lookups(select_related)
+            )
+            queryset = queryset.select_related(None)
+            if select_related:
+                queryset = queryset.select_related(*select_related)
+        return queryset
+
 
+class ConditionalGetMixin:
+    """
+    Send ``ETag`` and ``Last-Modified`` built from the change stamps of
+    ``version_models`` with list and retrieve responses, and answer 304
+    without querying the model tables when the ``If-None-Match`` copy is
+    still current. Reading the stamps is a cache lookup, which is one
+    query of the cache table when the cache is ``DatabaseCache``.
+    """
 
-class TrainTypeViewSet(viewsets.ModelViewSet):
+    version_models = ()
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        versions = get_versions(*self.version_models)
+        etag = quote_etag(hashlib.blake2b(
+            "|".join([
+                request.get_full_path(),
+                request.accepted_media_type,
+                *(versions[model][0] for model in self.version_models),
+            ]).encode(),
+            digest_size=16,
+        ).hexdigest())
+        # rounded up, so it is never earlier than the change it reports
+        last_modified = math.ceil(max(
+            timestamp for _, timestamp in versions.values()
+        ))
+
+        # If-Modified-Since is not evaluated: a second is too coarse to
+        # tell a copy from a change made later within the same second
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED
+        ):
+            response.headers["ETag"] = etag
+            response.headers["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class CachedResponseMixin:
+    """
+    Serve list and retrieve responses from the response cache, keyed on
+    the URL, media type, permission classes and the change stamps of
+    ``cache_models``. Retrieve responses are keyed on the object stamp
+    ``object_version_label`` of their object instead of the stamps of
+    ``object_version_models``, whose rows it tracks per object.
+    """
+
+    cache_models = ()
+    object_version_label = None
+    object_version_models = ()
+
+    def get_cache_parts(self) -> tuple[list, tuple]:
+        """Request parts and models the cache key is built from"""
+        if self.action != "retrieve" or self.object_version_label is None:
+            return [], self.cache_models
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        if lookup.isdigit():
+            lookup = int(lookup)
+        return (
+            [get_object_version(self.object_version_label, lookup)],
+            tuple(
+                model for model in self.cache_models
+                if model not in self.object_version_models
+            ),
+        )
+
+    def _cached(self, handler, request, *args, **kwargs):
+        # inside a transaction the response may show writes that are not
+        # committed yet, and so have not bumped their change stamps
+        if transaction.get_connection().in_atomic_block:
+            return handler(request, *args, **kwargs)
+
+        parts, models = self.get_cache_parts()
+        digest = response_digest(
+            [
+                type(self).__name__,
+                self.action,
+                request.build_absolute_uri(),
+                request.accepted_media_type,
+                *(
+                    permission.__name__
+                    for permission in self.permission_classes
+                ),
+                *parts,
+            ],
+            models,
+        )
+        response = None
+
+        def render():
+            nonlocal response
+            response = handler(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                return response.data
+            return None
+
+        data, hit = get_or_render(digest, render)
+        if response is None:
+            response = Response(data)
+        response.headers["X-Cache"] = "HIT" if hit else "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(super().retrieve, request, *args, **kwargs)
+
+
+class TrainTypeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = TrainType.objects.all()
     serializer_class = TrainTypeSerializer
     permission_classes = (IsAdminUser, )
+    version_models = ("traintype",)
 
 
-class TrainViewSet(viewsets.ModelViewSet):
+class TrainViewSet(
+    ConditionalGetMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = Train.objects.select_related("train_type")
     serializer_class = TrainSerializer
+    version_models = ("train", "traintype")
 
     def get_serializer_class(self):
         serializer = self.serializer_class
@@ -51,17 +296,148 @@ class TrainViewSet(viewsets.ModelViewSet):
         return serializer
 
 
-class StationViewSet(viewsets.ModelViewSet):
+class StationViewSet(
+    ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet
+):
     queryset = Station.objects.all()
     serializer_class = StationSerializer
+    version_models = ("station",)
+    cache_models = version_models
+
+    @staticmethod
+    def _float_param(request, name, minimum, maximum, required=True):
+        value = request.query_params.get(name)
+        if value is None and not required:
+            return None
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            value = math.nan
+        if not minimum <= value <= maximum:
+            raise ValidationError(
+                {name: f"A number between {minimum} and {maximum} "
+                       f"is required."}
+            )
+        return value
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "lat",
+                type=OpenApiTypes.FLOAT,
+                required=True,
+                description="Latitude of the point",
+            ),
+            OpenApiParameter(
+                "lon",
+                type=OpenApiTypes.FLOAT,
+                required=True,
+                description="Longitude of the point",
+            ),
+            OpenApiParameter(
+                "radius",
+                type=OpenApiTypes.FLOAT,
+                description="Only stations within this many km",
+            ),
+            OpenApiParameter(
+                "limit",
+                type=OpenApiTypes.INT,
+                description="Most stations to return, 10 by default",
+            ),
+        ]
+    )
+    @action(detail=False, methods=["get"])
+    def nearby(self, request):
+        """Stations closest to a point, nearest first"""
+        latitude = self._float_param(request, "lat", -90, 90)
+        longitude = self._float_param(request, "lon", -180, 180)
+        radius = self._float_param(
+            request, "radius", 0, 20038, required=False
+        )
+        max_limit = getattr(settings, "NEARBY_STATIONS_MAX_LIMIT", 100)
+        limit = request.query_params.get("limit", "10")
+        if not limit.isdigit() or not 1 <= int(limit) <= max_limit:
+            raise ValidationError(
+                {"limit": f"An integer between 1 and {max_limit} "
+                          f"is required."}
+            )
 
-class RouteViewSet(viewsets.ModelViewSet):
+        # station details of the same state the query ran on
+        grid = get_station_grid().snapshot()
+        stations = []
+        for station_id, distance in grid.nearby(
+            latitude, longitude, radius, int(limit)
+        ):
+            name, station_latitude, station_longitude, _ = (
+                grid.stations[station_id]
+            )
+            station = StationSerializer(Station(
+                id=station_id,
+                name=name,
+                latitude=station_latitude,
+                longitude=station_longitude
+            )).data
+            station["distance"] = round(distance, 3)
+            stations.append(station)
+        return Response(stations)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "q",
+                type=OpenApiTypes.STR,
+                required=True,
+                description="Beginning of the station name",
+            ),
+            OpenApiParameter(
+                "limit",
+                type=OpenApiTypes.INT,
+                description="Most stations to return, 10 by default",
+            ),
+            OpenApiParameter(
+                "fuzzy",
+                type=OpenApiTypes.BOOL,
+                description="Also suggest similar names (ex. ?fuzzy=true)",
+            ),
+        ]
+    )
+    @action(detail=False, methods=["get"])
+    def autocomplete(self, request):
+        """Stations whose name starts with the query"""
+        query = request.query_params.get("q", "")
+        if not query.strip():
+            raise ValidationError({"q": "This parameter is required."})
+        max_limit = getattr(settings, "AUTOCOMPLETE_MAX_LIMIT", 50)
+        limit = request.query_params.get("limit", "10")
+        if not limit.isdigit() or not 1 <= int(limit) <= max_limit:
+            raise ValidationError(
+                {"limit": f"An integer between 1 and {max_limit} "
+                          f"is required."}
+            )
+        fuzzy = request.query_params.get("fuzzy", "").lower()
+
+        index = get_station_names()
+        return Response([
+            {"id": station_id, "name": index.names[station_id]}
+            for station_id in index.search(
+                query, int(limit), fuzzy=fuzzy in ("1", "true", "yes")
+            )
+        ])
+
+
+class RouteViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    SparseFieldsMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Route.objects.select_related(
         "source_station",
         "destination_station"
     )
     serializer_class = RouteSerializer
+    version_models = ("route", "station")
+    cache_models = version_models
 
     def get_serializer_class(self):
         serializer = self.serializer_class
@@ -74,6 +450,88 @@ class RouteViewSet(viewsets.ModelViewSet):
 
         return serializer
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "from",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Source station id",
+            ),
+            OpenApiParameter(
+                "to",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Destination station id",
+            ),
+            OpenApiParameter(
+                "algorithm",
+                type=OpenApiTypes.STR,
+                enum=("astar", "dijkstra"),
+                description="Search algorithm, astar by default",
+            ),
+        ]
+    )
+    @action(detail=False, methods=["get"])
+    def path(self, request):
+        """Shortest chain of routes between two stations"""
+        source_id = _station_param(request, "from")
+        destination_id = _station_param(request, "to")
+        algorithm = request.query_params.get("algorithm", "astar")
+        if algorithm not in ("astar", "dijkstra"):
+            raise ValidationError(
+                {"algorithm": "Must be one of: astar, dijkstra."}
+            )
+
+        graph = get_station_graph()
+        path = graph.shortest_path(source_id, destination_id, algorithm)
+        if path is None:
+            raise NotFound("No path between these stations.")
+
+        distance, stations, routes = path
+        return Response({
+            "source": source_id,
+            "destination": destination_id,
+            "distance": distance,
+            "stations": [
+                {"id": station_id, "name": graph.names[station_id]}
+                for station_id in stations
+            ],
+            "routes": routes,
+        })
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "from",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Source station id",
+            ),
+            OpenApiParameter(
+                "to",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Destination station id",
+            ),
+        ]
+    )
+    @action(detail=False, methods=["get"])
+    def distance(self, request):
+        """Network distance between two stations over the routes"""
+        source_id = _station_param(request, "from")
+        destination_id = _station_param(request, "to")
+
+        distance = get_distance_matrix().distance(source_id, destination_id)
+        if distance is None:
+            raise NotFound("No path between these stations.")
+
+        return Response({
+            "source": source_id,
+            "destination": destination_id,
+            "distance": distance,
+        })
+
 
 class CrewViewSet(viewsets.ModelViewSet):
     queryset = Crew.objects.all()
@@ -81,10 +539,60 @@ class CrewViewSet(viewsets.ModelViewSet):
     permission_classes = (IsAdminUser,)
 
 
-class TripViewSet(viewsets.ModelViewSet):
+class ScheduleViewSet(viewsets.ModelViewSet):
+    queryset = Schedule.objects.prefetch_related("crew")
+    serializer_class = ScheduleSerializer
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "days",
+                type=OpenApiTypes.INT,
+                description="Days from today to create trips for "
+                            "(ex. ?days=30), SCHEDULE_HORIZON by default",
+            ),
+        ]
+    )
+    @action(detail=True, methods=["post"])
+    def materialize(self, request, pk=None):
+        """Create the trips of the schedule within the horizon"""
+        days = request.query_params.get("days")
+        if days is not None and (
+            not days.isdigit() or not 1 <= int(days) <= 366
+        ):
+            raise ValidationError(
+                {"days": "An integer between 1 and 366 is required."}
+            )
+        schedule = self.get_object()
+        created = materialize_schedules(
+            days=days and int(days),
+            schedules=Schedule.objects.filter(pk=schedule.pk),
+        )
+        return Response({"created": created})
+
+
+class TripViewSet(
+    CachedResponseMixin, SparseFieldsMixin, viewsets.ModelViewSet
+):
     queryset = (Trip.objects.select_related("train", "route")
                 .prefetch_related("crew"))
     serializer_class = TripSerializer
+    pagination_class = SelectablePagination
+    cache_models = (
+        "trip",
+        "route",
+        "station",
+        "train",
+        "traintype",
+        "crew",
+        "ticket",
+        "seathold",
+    )
+    # a list is keyed on every booking, as which trips it shows is only
+    # known once it is rendered
+    object_version_label = TRIP_AVAILABILITY
+    object_version_models = ("ticket", "seathold")
 
     def get_serializer_class(self):
         serializer = self.serializer_class
@@ -97,8 +605,123 @@ class TripViewSet(viewsets.ModelViewSet):
 
         return serializer
 
+    ordering_fields = ("tickets_available", "-tickets_available")
+
+    def _fast_list(self) -> bool:
+        params = self.request.query_params
+        return (
+            self.action == "list"
+            and settings.TRIP_LIST_FAST_PATH
+            and "fields" not in params
+            and "expand" not in params
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        # the fast path only renders pages, schema and forms use the rest
+        if args and self._fast_list():
+            return TripListFastSerializer(*args, **kwargs)
+        return super().get_serializer(*args, **kwargs)
+
+    @staticmethod
+    def _param_to_int(name, value, minimum=None, maximum=None):
+        try:
+            value = int(value)
+        except ValueError:
+            raise ValidationError({name: "A valid integer is required."})
+        if (minimum is not None and value < minimum) or (
+            maximum is not None and value > maximum
+        ):
+            raise ValidationError(
+                {name: f"Must be between {minimum} and {maximum}."}
+            )
+        return value
+
+    def _param_to_id(self, name, value):
+        return self._param_to_int(name, value, 1, MAX_ID)
+
+    @staticmethod
+    def _param_to_day_start(name, value):
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValidationError({name: "A valid date is required."})
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    def _filter_trips(self, queryset):
+        params = self.request.query_params
+        source = params.get("source")
+        destination = params.get("destination")
+        departure_from = params.get("departure_from")
+        departure_to = params.get("departure_to")
+        train_type = params.get("train_type")
+
+        if source:
+            queryset = queryset.filter(
+                route__source_station_id=self._param_to_id("source", source)
+            )
+
+        if destination:
+            queryset = queryset.filter(
+                route__destination_station_id=self._param_to_id(
+                    "destination", destination
+                )
+            )
+
+        if departure_from:
+            queryset = queryset.filter(
+                departure_time__gte=self._param_to_day_start(
+                    "departure_from", departure_from
+                )
+            )
+
+        if departure_to:
+            queryset = queryset.filter(
+                departure_time__lt=self._param_to_day_start(
+                    "departure_to", departure_to
+                ) + timedelta(days=1)
+            )
+
+        if train_type:
+            queryset = queryset.filter(
+                train__train_type_id=self._param_to_id(
+                    "train_type", train_type
+                )
+            )
+
+        return queryset
+
     def get_queryset(self):
         queryset = self.queryset
+        if self.action in ("list", "retrieve"):
+            queryset = queryset.with_tickets_available()
+
+        if self.action == "list":
+            queryset = queryset.select_related(
+                "route__source_station",
+                "route__destination_station"
+            )
+            queryset = self._filter_trips(queryset)
+            min_tickets_available = self.request.query_params.get(
+                "min_tickets_available"
+            )
+            ordering = self.request.query_params.get("ordering")
+
+            if min_tickets_available:
+                queryset = queryset.filter(
+                    tickets_available__gte=self._param_to_int(
+                        "min_tickets_available", min_tickets_available,
+                        minimum=0, maximum=MAX_ID
+                    )
+                )
+
+            if ordering in self.ordering_fields:
+                queryset = queryset.order_by(ordering, "departure_time")
+
+            if self._fast_list():
+                queryset = TripListFastSerializer.values(queryset)
+
         if self.action == "retrieve":
             queryset = queryset.select_related(
                 "train__train_type",
@@ -106,20 +729,303 @@ class TripViewSet(viewsets.ModelViewSet):
                 "route__destination_station"
             ).prefetch_related("crew")
 
+        if self.action == "seats":
+            queryset = Trip.objects.select_related("train")
+
         return queryset
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "source",
+                type=OpenApiTypes.INT,
+                description="Filter by source station id (ex. ?source=2)",
+            ),
+            OpenApiParameter(
+                "destination",
+                type=OpenApiTypes.INT,
+                description="Filter by destination station id "
+                            "(ex. ?destination=3)",
+            ),
+            OpenApiParameter(
+                "departure_from",
+                type=OpenApiTypes.DATE,
+                description="Trips departing on this day or later "
+                            "(ex. ?departure_from=2024-05-01)",
+            ),
+            OpenApiParameter(
+                "departure_to",
+                type=OpenApiTypes.DATE,
+                description="Trips departing on this day or earlier "
+                            "(ex. ?departure_to=2024-05-07)",
+            ),
+            OpenApiParameter(
+                "train_type",
+                type=OpenApiTypes.INT,
+                description="Filter by train type id (ex. ?train_type=1)",
+            ),
+            OpenApiParameter(
+                "min_tickets_available",
+                type=OpenApiTypes.INT,
+                description="Only trips with at least this many free seats "
+                            "(ex. ?min_tickets_available=10)",
+            ),
+            OpenApiParameter(
+                "ordering",
+                type=OpenApiTypes.STR,
+                enum=ordering_fields,
+                description="Sort trips by free seats "
+                            "(ex. ?ordering=-tickets_available)",
+            ),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "expanded",
+                type=OpenApiTypes.BOOL,
+                description="Also list taken seats per cargo "
+                            "(ex. ?expanded=true)",
+            ),
+        ]
+    )
+    @action(detail=True, methods=["get"], url_path="seats")
+    def seats(self, request, pk=None):
+        """Seat occupancy bitset of the trip, one bit per seat"""
+        seat_map = get_cached_seat_map(int(pk)) if pk.isdigit() else None
+        if seat_map is None:
+            seat_map = get_seat_map(self.get_object())
+
+        expanded = request.query_params.get("expanded", "").lower()
+        return Response(
+            seat_map.to_payload(expanded=expanded in ("1", "true", "yes"))
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "from",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Source station id",
+            ),
+            OpenApiParameter(
+                "to",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Destination station id",
+            ),
+            OpenApiParameter(
+                "departure",
+                type=OpenApiTypes.DATETIME,
+                description="Leave not before this time, now by default",
+            ),
+            OpenApiParameter(
+                "min_transfer",
+                type=OpenApiTypes.INT,
+                description="Minutes needed to change trains",
+            ),
+            OpenApiParameter(
+                "max_legs",
+                type=OpenApiTypes.INT,
+                description="Most trips in one journey",
+            ),
+            OpenApiParameter(
+                "optimize",
+                type=OpenApiTypes.STR,
+                enum=(EARLIEST_ARRIVAL, FEWEST_TRANSFERS),
+                description="Prefer the earliest arrival (default) "
+                            "or the fewest transfers",
+            ),
+        ]
+    )
+    @action(detail=False, methods=["get"])
+    def journeys(self, request):
+        """Best connection of one or more trips between two stations"""
+        params = request.query_params
+        source_id = _station_param(request, "from")
+        destination_id = _station_param(request, "to")
+        if source_id == destination_id:
+            raise ValidationError({"to": "Must differ from the source."})
+
+        departure = timezone.now()
+        if "departure" in params:
+            try:
+                departure = parse_datetime(params["departure"])
+            except ValueError:
+                departure = None
+            if departure is None:
+                raise ValidationError(
+                    {"departure": "A valid date and time is required."}
+                )
+
+        min_transfer = getattr(
+            settings, "JOURNEY_MIN_TRANSFER", timedelta(minutes=10)
+        )
+        if "min_transfer" in params:
+            minutes = self._param_to_int(
+                "min_transfer", params["min_transfer"]
+            )
+            if not 0 <= minutes <= MAX_MIN_TRANSFER_MINUTES:
+                raise ValidationError({
+                    "min_transfer": f"Must be between 0 and "
+                                    f"{MAX_MIN_TRANSFER_MINUTES}."
+                })
+            min_transfer = timedelta(minutes=minutes)
+
+        most_legs = getattr(settings, "JOURNEY_MAX_LEGS", 4)
+        max_legs = self._param_to_int(
+            "max_legs", params.get("max_legs", most_legs)
+        )
+        if not 1 <= max_legs <= most_legs:
+            raise ValidationError(
+                {"max_legs": f"Must be between 1 and {most_legs}."}
+            )
+
+        optimize = params.get("optimize", EARLIEST_ARRIVAL)
+        if optimize not in (EARLIEST_ARRIVAL, FEWEST_TRANSFERS):
+            raise ValidationError({
+                "optimize": f"Must be one of: {EARLIEST_ARRIVAL}, "
+                            f"{FEWEST_TRANSFERS}."
+            })
+
+        journey = get_timetable().plan(
+            source_id,
+            destination_id,
+            departure,
+            min_transfer=min_transfer,
+            max_legs=max_legs,
+            optimize=optimize,
+        )
+        if journey is None:
+            raise NotFound("No journey between these stations.")
+
+        names = get_station_graph().names
+        legs = journey_legs(journey)
+        for leg in legs:
+            for field in ("source", "destination"):
+                leg[field] = {"id": leg[field], "name": names[leg[field]]}
+        return Response({
+            "source": source_id,
+            "destination": destination_id,
+            "departure_time": legs[0]["departure_time"],
+            "arrival_time": legs[-1]["arrival_time"],
+            "transfers": len(legs) - 1,
+            "legs": legs,
+        })
+
+
+class IdempotentCreateMixin:
+    """
+    Replay the first response to a create request sent again with the same
+    ``Idempotency-Key`` header by the same user, without running it again.
+    """
+
+    idempotency_header = "Idempotency-Key"
+
+    def _replay(self, stored, fingerprint):
+        if stored is None or stored.in_progress:
+            return Response(
+                {"detail": "A request with this Idempotency-Key "
+                           "is still being processed."},
+                status=status.HTTP_409_CONFLICT
+            )
+        if stored.fingerprint != fingerprint:
+            return Response(
+                {"detail": "This Idempotency-Key was already used "
+                           "with a different request body."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        return Response(
+            stored.data,
+            status=stored.status_code,
+            headers={"Idempotent-Replayed": "true"}
+        )
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(self.idempotency_header)
+        if not key:
+            return super().create(request, *args, **kwargs)
+        if len(key) > 255:
+            raise ValidationError(
+                {self.idempotency_header: "Ensure this header has "
+                                          "no more than 255 characters."}
+            )
+
+        store = get_idempotency_store()
+        fingerprint = request_fingerprint(request.data)
+        stored = store.get(request.user.id, key)
+        if stored is not None or not store.reserve(
+            request.user.id, key, fingerprint
+        ):
+            return self._replay(
+                stored or store.get(request.user.id, key), fingerprint
+            )
+
+        try:
+            response = super().create(request, *args, **kwargs)
+        except APIException as exc:
+            response = self.handle_exception(exc)
+        except Exception:
+            store.release(request.user.id, key)
+            raise
+        store.complete(
+            request.user.id, key, response.status_code, response.data
+        )
+        return response
+
+
+class QueuedCreateMixin:
+    """
+    In queued intake mode only validate the order and leave booking to the
+    ``process_order_queue`` worker, answering 202 with a status URL.
+    """
+
+    def create(self, request, *args, **kwargs):
+        if not queued_intake_enabled(request):
+            return super().create(request, *args, **kwargs)
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        order_request = enqueue_order(
+            request.user, serializer.validated_data["tickets"]
+        )
+        data = OrderRequestSerializer(
+            order_request, context=self.get_serializer_context()
+        ).data
+        return Response(
+            data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": data["status_url"]}
+        )
+
 
 class OrderViewSet(
+    SparseFieldsMixin,
+    IdempotentCreateMixin,
+    QueuedCreateMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     GenericViewSet,
 ):
     queryset = Order.objects.prefetch_related(
+        Prefetch(
+            "tickets__trip", queryset=Trip.objects.with_tickets_available()
+        ),
         "tickets__trip__train",
-        "tickets__trip__route",
-        "tickets__trip__crew"
+        "tickets__trip__route__source_station",
+        "tickets__trip__route__destination_station",
+        "tickets__trip__crew",
+        "archived_tickets__trip__train",
+        "archived_tickets__trip__route__source_station",
+        "archived_tickets__trip__route__destination_station",
+        "archived_tickets__trip__crew",
     )
     serializer_class = OrderSerializer
+    pagination_class = SelectablePagination
     permission_classes = (IsAuthenticated,)
 
     def get_queryset(self):
@@ -129,7 +1035,105 @@ class OrderViewSet(
         if self.action == "list":
             return OrderListSerializer
 
+        if self.action == "allocate":
+            return AllocatedOrderSerializer
+
         return OrderSerializer
 
     def perform_create(self, serializer):
         serializer.save(customer=self.request.user)
+
+    @extend_schema(responses=OrderSerializer)
+    @action(detail=False, methods=["post"])
+    def allocate(self, request):
+        """Order a number of seats on a trip, chosen by the server"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        order = serializer.save(customer=request.user)
+        return Response(
+            OrderSerializer(order).data, status=status.HTTP_201_CREATED
+        )
+
+
+class SeatHoldViewSet(
+    SparseFieldsMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.CreateModelMixin,
+    mixins.DestroyModelMixin,
+    GenericViewSet,
+):
+    queryset = SeatHold.objects.active().prefetch_related("seats")
+    serializer_class = SeatHoldSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        queryset = self.queryset.filter(customer=self.request.user)
+        if self.action == "confirm":
+            queryset = queryset.select_related("trip__train")
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(customer=self.request.user)
+
+    @extend_schema(request=None, responses=OrderSerializer)
+    @action(detail=True, methods=["post"])
+    def confirm(self, request, pk=None):
+        """Buy the held seats, turning the hold into an order"""
+        try:
+            order = confirm_hold(self.get_object(), ValidationError)
+        except SeatsTaken as error:
+            raise SeatConflict(error.seats)
+        return Response(
+            OrderSerializer(order).data, status=status.HTTP_201_CREATED
+        )
+
+
+class OrderRequestViewSet(
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    GenericViewSet,
+):
+    queryset = OrderRequest.objects.all()
+    serializer_class = OrderRequestSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return self.queryset.filter(customer=self.request.user)
+
+
+class ExportViewSet(viewsets.ViewSet):
+    """Stream every trip, order or ticket as NDJSON or CSV"""
+
+    permission_classes = (IsAdminUser,)
+    lookup_value_regex = "|".join(EXPORTS)
+
+    def perform_content_negotiation(self, request, force=False):
+        # the export format is picked with ?output=, errors are JSON
+        return super().perform_content_negotiation(request, force=True)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "output",
+                type=OpenApiTypes.STR,
+                enum=list(OUTPUTS),
+                description="Export format, ndjson by default "
+                            "(ex. ?output=csv)",
+            ),
+        ],
+        responses={200: OpenApiTypes.BINARY},
+    )
+    def retrieve(self, request, pk=None):
+        output = request.query_params.get("output", NDJSON)
+        if output not in OUTPUTS:
+            raise ValidationError(
+                {"output": f"Choose one of: {', '.join(OUTPUTS)}."}
+            )
+        response = StreamingHttpResponse(
+            export(pk, output), content_type=OUTPUTS[output]
+        )
+        response.headers["Content-Disposition"] = (
+            f'attachment; filename="{pk}.{output}"'
+        )
+        return response
@@ -54,6 +54,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "django.middleware.gzip.GZipMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -100,6 +101,30 @@ DATABASES = {
 }
 
 
+# Cache
+# Shared by every process, as change stamps, seat maps and cached responses
+# written by one worker or management command are read by all the others.
+# Redis when REDIS_URL is set, otherwise a table in the database, created
+# with "manage.py createcachetable"
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "train_station_cache",
+            "OPTIONS": {"MAX_ENTRIES": 100_000},
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -148,6 +173,22 @@ INTERNAL_IPS = [
 ]
 
 REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "train_station.renderers.ORJSONRenderer",
+        "train_station.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "train_station.parsers.ORJSONParser",
+        "train_station.parsers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    "TEST_REQUEST_RENDERER_CLASSES": [
+        "rest_framework.renderers.MultiPartRenderer",
+        "rest_framework.renderers.JSONRenderer",
+        "train_station.renderers.MessagePackRenderer",
+    ],
     "DEFAULT_PAGINATION_CLASS":
         "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 100,
@@ -186,3 +227,37 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": False,
 }
+
+SEAT_HOLD_TTL = timedelta(minutes=10)
+BOOKING_MAX_RETRIES = 3
+
+IDEMPOTENCY_STORE = "train_station.idempotency.DatabaseIdempotencyStore"
+
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+ORDER_INTAKE_QUEUED = False
+ORDER_REQUEST_MAX_ATTEMPTS = 3
+
+JOURNEY_MIN_TRANSFER = timedelta(minutes=10)
+JOURNEY_MAX_LEGS = 4
+JOURNEY_SEARCH_WINDOW = timedelta(days=1)
+
+NEARBY_STATIONS_MAX_LIMIT = 100
+
+DISTANCE_MATRIX_PATH = BASE_DIR / "distance_matrix.npz"
+
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+RESPONSE_CACHE_TIMEOUT = 60
+
+TRIP_LIST_FAST_PATH = True
+
+SCHEDULE_HORIZON = timedelta(days=90)
+
+GTFS_FEED_PATH = BASE_DIR / "gtfs.zip"
+
+GTFS_AGENCY = {
+    "agency_id": "TS",
+    "agency_name": "Train Station",
+    "agency_url": os.getenv("GTFS_AGENCY_URL", "https://example.com"),
+}